@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from urllib.parse import parse_qs
+
+logger = logging.getLogger(__name__)
+
+# Per route class: concurrent requests, requests allowed to wait for a slot,
+# longest wait before giving up, and the status returned on rejection.
+# Keep the sum of limits below the threadpool size (anyio default: 40) so a
+# saturated class can never starve the others of worker threads.
+ADMISSION_LIMITS = {
+    "search": {"limit": 8, "queue": 32, "timeout": 2.0, "status": 503},
+    "metrics": {"limit": 16, "queue": 64, "timeout": 10.0, "status": 503},
+    "heavy": {"limit": 4, "queue": 8, "timeout": 30.0, "status": 503},
+    "llm": {"limit": 2, "queue": 4, "timeout": 30.0, "status": 429},
+}
+
+SEARCH_PATHS = {"/search"}
+LLM_PATHS = {"/generate_summary"}
+HEAVY_PATHS = {"/correlations/pairs", "/factor_risk", "/scenarios", "/rolling_correlations", "/rolling_var"}
+HEAVY_TICKER_COUNT = 100  # Metric requests with at least this many tickers count as heavy
+HEAVY_ALL_RANGE_TICKER_COUNT = 25  # ...or this many with range=All
+WAIT_SAMPLES = 1000  # Recent queue waits kept per class for percentiles
+
+
+def route_class(path: str, query_string: bytes) -> str | None:
+    """Admission class for a request path + query, or None for unlimited routes."""
+    if path in SEARCH_PATHS:
+        return "search"
+    if path in LLM_PATHS:
+        return "llm"
+    if path in HEAVY_PATHS:
+        return "heavy"
+
+    params = parse_qs(query_string.decode("latin-1"))
+    stocks = params.get("stocks")
+    if not stocks:
+        return None  # System / status routes are never limited
+    if len(stocks) >= HEAVY_TICKER_COUNT:
+        return "heavy"
+    if params.get("range") == ["All"] and len(stocks) >= HEAVY_ALL_RANGE_TICKER_COUNT:
+        return "heavy"
+    return "metrics"
+
+
+class Rejected(Exception):
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+
+
+class AdmissionGate:
+    """
+    Concurrency limit with a bounded FIFO wait queue for one route class.
+    Requests beyond `limit` wait (up to `timeout`) while fewer than `queue`
+    others are waiting; everything else is rejected immediately.
+    """
+
+    def __init__(self, name: str, limit: int, queue: int, timeout: float, status: int):
+        self.name = name
+        self.limit = limit
+        self.max_queue = queue
+        self.timeout = timeout
+        self.status = status
+
+        self.active = 0
+        self.queued = 0
+        self._waiters = deque()  # asyncio futures, FIFO
+
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.max_wait = 0.0
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self._service_ewma = None  # Smoothed seconds per request (Retry-After estimate)
+
+    def retry_after(self) -> int:
+        service = self._service_ewma or 1.0
+        return max(1, math.ceil(service * (self.queued + 1) / self.limit))
+
+    async def acquire(self) -> None:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            self._record_wait(0.0)
+            return
+
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise Rejected(self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(0.0)  # Slot was handed over as the timeout fired
+            self.timeouts += 1
+            self.rejected += 1
+            raise Rejected(self.retry_after())
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(0.0)  # Slot was handed over just as the client went away
+            raise
+        finally:
+            self.queued -= 1
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+        # release() already counted this request as active
+        self.admitted += 1
+        self._record_wait(time.perf_counter() - start)
+
+    def release(self, service_seconds: float) -> None:
+        if service_seconds > 0:
+            self._service_ewma = service_seconds if self._service_ewma is None \
+                else 0.9 * self._service_ewma + 0.1 * service_seconds
+
+        # Hand the slot straight to the next live waiter (FIFO, no barging)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _record_wait(self, seconds: float) -> None:
+        self._waits.append(seconds)
+        self.max_wait = max(self.max_wait, seconds)
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits)
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "timeout": self.timeout,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "wait_p50": waits[len(waits) // 2] if waits else None,
+            "wait_p95": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else None,
+            "wait_max": self.max_wait,
+            "service_seconds": self._service_ewma,
+        }
+
+
+GATES = {name: AdmissionGate(name, **cfg) for name, cfg in ADMISSION_LIMITS.items()}
+
+
+def admission_stats() -> dict:
+    return {name: gate.stats() for name, gate in GATES.items()}
+
+
+class AdmissionControlMiddleware:
+    """
+    Per-route-class concurrency limits with bounded queues (backpressure).
+
+    Plain ASGI rather than BaseHTTPMiddleware so the slot is held until the
+    response body has been fully sent (NDJSON streams do their work there).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        name = route_class(scope["path"], scope.get("query_string", b""))
+        if name is None:
+            return await self.app(scope, receive, send)
+
+        gate = GATES[name]
+        try:
+            await gate.acquire()
+        except Rejected as e:
+            logger.warning("Rejected %s request | class=%s | queued=%d", scope["path"], name, gate.queued)
+            await self._reject(send, gate.status, e.retry_after, name)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release(time.perf_counter() - start)
+
+    @staticmethod
+    async def _reject(send, status: int, retry_after: int, name: str) -> None:
+        body = ('{"error": "Server busy (%s), retry later."}' % name).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(retry_after).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,181 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date
+
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+from services import stocks
+from services.stocks import get_data_version, resolve_benchmarks
+from utils.helpers import ALLOWED_BENCHMARKS, INTERVALS
+
+logger = logging.getLogger(__name__)
+
+# Browsers / the Next.js fetch cache / reverse proxies may reuse a response for
+# CACHE_MAX_AGE_SECONDS, then serve it stale while revalidating with If-None-Match.
+CACHE_MAX_AGE_SECONDS = 300
+CACHE_STALE_WHILE_REVALIDATE_SECONDS = 3600
+
+# Optional server-side cache of fully serialized bodies, keyed by ETag
+RESPONSE_CACHE_ENABLED = True
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class ResponseCache:
+    """Byte-bounded LRU of serialized response bodies keyed by ETag."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # etag -> (body, media_type)
+        self._lock = threading.Lock()
+
+    def get(self, etag: str):
+        with self._lock:
+            entry = self._entries.get(etag)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(etag)
+            self.hits += 1
+            return entry
+
+    def put(self, etag: str, body: bytes, media_type: str) -> None:
+        if len(body) > self.max_bytes:
+            return  # Would evict everything else, not worth it
+        with self._lock:
+            if etag in self._entries:
+                return
+            self._entries[etag] = (body, media_type)
+            self.bytes += len(body)
+            while self.bytes > self.max_bytes:
+                _, (old_body, _) = self._entries.popitem(last=False)
+                self.bytes -= len(old_body)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+RESPONSE_CACHE = ResponseCache(RESPONSE_CACHE_MAX_BYTES)
+
+
+def _request_tickers(request: Request) -> list[str] | None:
+    # Tickers whose prices the metric depends on: the stocks plus any benchmark.
+    # None when they cannot be resolved here (the route answers with an error).
+    stocks = request.query_params.getlist("stocks")
+    benchmark = request.query_params.get("benchmark")
+    if request.url.path == "/beta":
+        # Same resolution as the route, so the ETag follows the benchmark it actually uses
+        try:
+            extra = list(resolve_benchmarks(stocks, benchmark).values())
+        except (ValueError, KeyError):
+            return None
+    elif benchmark in ALLOWED_BENCHMARKS:
+        extra = [ALLOWED_BENCHMARKS[benchmark]]
+    else:
+        extra = []
+    return list(dict.fromkeys(stocks + extra))
+
+
+def compute_etag(request: Request, version: str) -> str:
+    # Relative ranges (1M, 1Y, YTD...) move their cutoff every day even when the
+    # data version does not (weekends, holidays, SERVE_STALE): key on the date too
+    key = "\n".join([
+        request.url.path,
+        "&".join(f"{k}={v}" for k, v in request.query_params.multi_items()),
+        version,
+        date.today().isoformat(),
+    ])
+    return 'W/"' + hashlib.sha1(key.encode("utf-8")).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # Weak comparison: ignore W/ prefixes, accept lists and "*"
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == etag.removeprefix("W/") for c in candidates)
+
+
+def _cache_headers(etag: str) -> dict:
+    return {
+        "ETag": etag,
+        "Cache-Control": (
+            f"public, max-age={CACHE_MAX_AGE_SECONDS}, "
+            f"stale-while-revalidate={CACHE_STALE_WHILE_REVALIDATE_SECONDS}"
+        ),
+    }
+
+
+class ConditionalCacheMiddleware(BaseHTTPMiddleware):
+    """
+    ETag / If-None-Match handling for metric routes (any GET with `stocks`).
+
+    The ETag is derived from the path, query string, current date and the data
+    version of the tickers involved, so a 304 (or a cached body) can be answered
+    before the route loads prices or computes anything.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        if request.method != "GET" or "stocks" not in request.query_params:
+            return await call_next(request)
+
+        interval = request.query_params.get("interval", "1d")
+        if interval not in INTERVALS:
+            return await call_next(request)  # Route answers with a 400
+
+        # /beta may look up exchanges (a yfinance call on first sight): keep it off the event loop
+        tickers = await run_in_threadpool(_request_tickers, request)
+        if tickers is None:
+            return await call_next(request)
+
+        version = get_data_version(tickers, interval)
+        if version is not None and interval == "1d" and not stocks.SERVE_STALE and stocks.stale_tickers(tickers):
+            version = None  # Route is about to re-download, the cached version is outdated
+
+        if version is not None:
+            etag = compute_etag(request, version)
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers=_cache_headers(etag))
+
+            if RESPONSE_CACHE_ENABLED:
+                cached = RESPONSE_CACHE.get(etag)
+                if cached is not None:
+                    body, media_type = cached
+                    return Response(content=body, media_type=media_type, headers=_cache_headers(etag))
+
+        response = await call_next(request)
+        if response.status_code != 200 \
+                or not response.headers.get("content-type", "").startswith("application/json"):
+            return response
+
+        # Tickers were loaded by the route; only tag if no refresh raced the computation
+        version_after = get_data_version(tickers, interval)
+        if version_after is None or (version is not None and version_after != version):
+            return response
+
+        etag = compute_etag(request, version_after)
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        if RESPONSE_CACHE_ENABLED:
+            RESPONSE_CACHE.put(etag, body, "application/json")
+
+        headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+        headers.update(_cache_headers(etag))
+        return Response(content=body, status_code=200, headers=headers, media_type="application/json")
@@ -1,14 +1,51 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from routes.PortfolioTools import portfolio_metrics, generate_summary, search
+from routes.PortfolioTools import portfolio_metrics, generate_summary, search, live, scenarios, snapshot
 from routes.Metrics import volatility, correlations, rolling_drawdown, sharpesortino, covariances, max_drawdown, beta, \
-    returns
+    returns, rolling_correlations, factor_risk, rolling_var
+from routes.System import scheduler, cache, admission
+from services.scheduler import cache_warmer
+from services import shared_panel, offload
 from core.logging import setup_logging
+from core.http_cache import ConditionalCacheMiddleware
+from core.admission import AdmissionControlMiddleware
 
 setup_logging()
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background cache warmer: stale-while-revalidate + post-close refreshes.
+    # With a shared price panel only one worker process refreshes and publishes;
+    # the others stand by and take over the refresher lock if it is released.
+    cache_warmer.start_or_standby()
+    yield
+    await cache_warmer.stop()
+    offload.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.exception_handler(shared_panel.PanelUnavailable)
+async def panel_unavailable_handler(request: Request, exc: shared_panel.PanelUnavailable):
+    # Reader worker waited for the refresher to publish these tickers and gave up
+    return JSONResponse(
+        content={"error": str(exc)},
+        status_code=503,
+        headers={"Retry-After": str(shared_panel.PANEL_RETRY_AFTER_SECONDS)},
+    )
+
+# Per-route-class concurrency limits with bounded queues; innermost, so 304s and
+# cached bodies from the layer below never take a slot
+app.add_middleware(AdmissionControlMiddleware)
+
+# ETag / 304 + optional serialized-body cache for metric routes
+# (registered before CORS so CORS stays the outermost layer, also for 304s)
+app.add_middleware(ConditionalCacheMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,6 +53,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Retry-After"],
 )
 
 # Include routers
@@ -28,5 +66,14 @@ app.include_router(beta.router, tags=["risk"])
 app.include_router(sharpesortino.router, tags=["risk"])
 app.include_router(max_drawdown.router, tags=["risk"])
 app.include_router(rolling_drawdown.router, tags=["risk"])
+app.include_router(rolling_correlations.router, tags=["risk"])
+app.include_router(factor_risk.router, tags=["risk"])
+app.include_router(rolling_var.router, tags=["risk"])
 app.include_router(generate_summary.router, tags=["risk"])
 app.include_router(portfolio_metrics.router, tags=["risk"])
+app.include_router(snapshot.router, tags=["risk"])
+app.include_router(live.router, tags=["risk"])
+app.include_router(scenarios.router, tags=["risk"])
+app.include_router(scheduler.router, tags=["system"])
+app.include_router(cache.router, tags=["system"])
+app.include_router(admission.router, tags=["system"])
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Query
 from fastapi.responses import JSONResponse
-from utils.helpers import get_calendar_cutoff, LOCAL_BENCHMARKS, ALLOWED_BENCHMARKS
-from services.stocks import fetch_stock_data, get_stock_exchange
+from utils.helpers import get_calendar_offset, INTERVALS, range_start
+from services.stocks import fetch_aligned, resolve_benchmarks
+from services.calendar_index import COMMON_ROW_MODES
 import numpy as np
 
 router = APIRouter()
@@ -10,42 +11,32 @@ router = APIRouter()
 def get_beta(
     stocks: list[str] = Query(...),
     range: str = Query("1Y"),
-    benchmark: str | None = Query(None)  # optional custom benchmark
+    benchmark: str | None = Query(None),  # optional custom benchmark
+    interval: str = Query("1d"),
+    align: str = Query("intersect")  # intersect | ffill
 ):
 
     if not stocks:
         return JSONResponse(content={"error": "No stocks provided"}, status_code=400)
+    if interval not in INTERVALS:
+        return JSONResponse(content={"error": f"Invalid interval: {interval}"}, status_code=400)
+    if align not in COMMON_ROW_MODES:
+        return JSONResponse(content={"error": f"Invalid alignment: {align}"}, status_code=400)
 
-    # Determine the benchmark for each stock
-    benchmarks = {}
-    for stock in stocks:
-        if not benchmark:
-            # Use local benchmark per exchange
-            exchange = get_stock_exchange(stock)
-            benchmarks[stock] = LOCAL_BENCHMARKS[exchange]
-        else:
-            # Validate custom benchmark
-            if benchmark not in ALLOWED_BENCHMARKS:
-                return JSONResponse(
-                    content={"error": f"Invalid benchmark '{benchmark}'"},
-                    status_code=400
-                )
-            # Use the same custom benchmark for all stocks
-            benchmarks[stock] = ALLOWED_BENCHMARKS[benchmark]
+    # Determine the benchmark for each stock (local exchange index unless a custom one is given)
+    try:
+        benchmarks = resolve_benchmarks(stocks, benchmark)
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
 
     # Create unique tickers list (stocks + benchmarks)
-    all_tickers = list(set(stocks + list(benchmarks.values())))
-
-    # Fetch stock prices
-    prices = fetch_stock_data(all_tickers)
+    all_tickers = sorted(set(stocks + list(benchmarks.values())))
 
-    # Calculate daily returns
-    returns = prices.pct_change().dropna()
+    # Per-bar returns on the cached, aligned calendar
+    returns = fetch_aligned(all_tickers, interval, range_start(range, 1)).returns(align)
 
     # Apply calendar cutoff
-    calendar_cutoff = get_calendar_cutoff(range, returns)
-    if calendar_cutoff is not None:
-        returns = returns.loc[returns.index >= calendar_cutoff]
+    returns = returns.iloc[get_calendar_offset(range, returns.index):]
 
     # Compute beta per stock vs its benchmark
     beta_results = {}
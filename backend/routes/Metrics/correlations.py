@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Query
 from fastapi.responses import JSONResponse
-from utils.helpers import get_calendar_cutoff
-from services.clustering import cluster_matrix
-from services.stocks import fetch_stock_data
+from utils.helpers import get_calendar_offset, INTERVALS, range_start
+from services.clustering import canonical_order, window_key, CLUSTER_METHODS
+from services.stocks import fetch_aligned, get_data_version
+from services.calendar_index import ALIGN_MODES
+from services.correlation_engine import standardize, top_k_pairs, threshold_pairs, approximate_order
 
 router = APIRouter()
 
@@ -10,18 +12,66 @@ router = APIRouter()
 @router.get("/correlations")
 def get_correlations(
     stocks: list[str] = Query(...),
-    range: str = Query("1Y")
+    range: str = Query("1Y"),
+    method: str = Query("average"),  # hierarchical linkage method for the heatmap ordering
+    optimal_ordering: bool = Query(False),  # optimal leaf ordering (computed once, then memoized)
+    interval: str = Query("1d"),
+    align: str = Query("intersect")  # pairwise: each pair over its own overlapping trading days
 ):
-    prices = fetch_stock_data(stocks)
-    returns = prices.pct_change().dropna()
-    calendar_cutoff = get_calendar_cutoff(range, returns)
+    if method not in CLUSTER_METHODS:
+        return JSONResponse(content={"error": f"Invalid clustering method: {method}"}, status_code=400)
+    if interval not in INTERVALS:
+        return JSONResponse(content={"error": f"Invalid interval: {interval}"}, status_code=400)
+    if align not in ALIGN_MODES:
+        return JSONResponse(content={"error": f"Invalid alignment: {align}"}, status_code=400)
 
-    returns_sliced = returns.loc[returns.index >= calendar_cutoff]
-    correlations, corr_labels = cluster_matrix(returns_sliced.corr())
+    stocks = list(dict.fromkeys(stocks))
+    returns = fetch_aligned(stocks, interval, range_start(range, 1)).returns(align)
+    returns_sliced = returns.iloc[get_calendar_offset(range, returns.index):]
+    corr = returns_sliced.corr()
+
+    # Same memoized ordering as /covariances, so both heatmaps line up
+    corr_labels = canonical_order(
+        stocks, window_key(returns_sliced, align), get_data_version(stocks, interval), lambda names: corr, method, optimal_ordering
+    )
+    correlations = corr.loc[corr_labels, corr_labels]
     return JSONResponse(
         content={
             "correlations": correlations.fillna(0).to_dict(),
             "correlation_labels": corr_labels,
             "range_used": range,
         }
-    )
\ No newline at end of file
+    )
+
+
+# ----- Large-Universe Correlation Pairs Endpoint -----
+@router.get("/correlations/pairs")
+def get_correlation_pairs(
+    stocks: list[str] = Query(...),
+    range: str = Query("1Y"),
+    k: int = Query(5, ge=1, le=100),  # partners per ticker (top-k mode)
+    threshold: float | None = Query(None, ge=-1, le=1),  # switch to "all pairs >= threshold" mode
+    absolute: bool = Query(False),  # threshold on |corr| instead of corr
+    interval: str = Query("1d"),
+):
+    if interval not in INTERVALS:
+        return JSONResponse(content={"error": f"Invalid interval: {interval}"}, status_code=400)
+
+    # Screening mode for large N: blocked float32 correlations, never an N x N matrix
+    # Each ticker's own-calendar returns; standardize() mean-fills the gaps
+    stocks = list(dict.fromkeys(stocks))
+    returns = fetch_aligned(stocks, interval, range_start(range, 1)).returns("pairwise")
+    returns_sliced = returns.iloc[get_calendar_offset(range, returns.index):]
+
+    z, tickers, dropped = standardize(returns_sliced)
+    order = [tickers[i] for i in approximate_order(z)]
+
+    content = {"order": order, "dropped": dropped, "range_used": range}
+    if threshold is None:
+        content["pairs"] = top_k_pairs(z, tickers, k)
+        content["k"] = k
+    else:
+        pairs, truncated = threshold_pairs(z, tickers, threshold, absolute)
+        content.update({"pairs": pairs, "threshold": threshold, "absolute": absolute, "truncated": truncated})
+
+    return JSONResponse(content=content)
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Query
 from fastapi.responses import JSONResponse
-from utils.helpers import get_calendar_cutoff
-from services.clustering import cluster_matrix
-from services.stocks import fetch_stock_data
+from utils.helpers import get_calendar_offset, INTERVALS, range_start
+from services.clustering import canonical_order, window_key, CLUSTER_METHODS
+from services.stocks import fetch_aligned, get_data_version
+from services.calendar_index import ALIGN_MODES
 
 router = APIRouter()
 
@@ -10,14 +11,29 @@ router = APIRouter()
 @router.get("/covariances")
 def get_covariances(
     stocks: list[str] = Query(...),
-    range: str = Query("1Y")
+    range: str = Query("1Y"),
+    method: str = Query("average"),  # hierarchical linkage method for the heatmap ordering
+    optimal_ordering: bool = Query(False),  # optimal leaf ordering (computed once, then memoized)
+    interval: str = Query("1d"),
+    align: str = Query("intersect")  # pairwise: each pair over its own overlapping trading days
 ):
-    prices = fetch_stock_data(stocks)
-    returns = prices.pct_change().dropna()
-    calendar_cutoff = get_calendar_cutoff(range, returns)
+    if method not in CLUSTER_METHODS:
+        return JSONResponse(content={"error": f"Invalid clustering method: {method}"}, status_code=400)
+    if interval not in INTERVALS:
+        return JSONResponse(content={"error": f"Invalid interval: {interval}"}, status_code=400)
+    if align not in ALIGN_MODES:
+        return JSONResponse(content={"error": f"Invalid alignment: {align}"}, status_code=400)
 
-    returns_sliced = returns.loc[returns.index >= calendar_cutoff]
-    covariances, cov_labels = cluster_matrix(returns_sliced.cov())
+    stocks = list(dict.fromkeys(stocks))
+    returns = fetch_aligned(stocks, interval, range_start(range, 1)).returns(align)
+    returns_sliced = returns.iloc[get_calendar_offset(range, returns.index):]
+    cov = returns_sliced.cov()
+
+    # Ordered by correlation clustering (shared with /correlations), not by covariance magnitude
+    cov_labels = canonical_order(
+        stocks, window_key(returns_sliced, align), get_data_version(stocks, interval), lambda names: returns_sliced[names].corr(), method, optimal_ordering
+    )
+    covariances = cov.loc[cov_labels, cov_labels]
     return JSONResponse(
         content={
             "covariances": covariances.fillna(0).to_dict(),
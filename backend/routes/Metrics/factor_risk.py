@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import JSONResponse
+import numpy as np
+from utils.helpers import get_calendar_offset, merge_positions
+from services.stocks import fetch_aligned, get_data_version
+from services.factor_model import cached_factor_model, portfolio_risk
+
+router = APIRouter()
+
+# ----- Factor Risk Endpoint -----
+@router.get("/factor_risk")
+def get_factor_risk(
+    stocks: list[str] = Query(...),
+    weights: list[float] | None = Query(None),  # default: equal weights
+    range: str = Query("1Y"),
+    k: int = Query(3, ge=1, le=50)  # number of statistical factors
+):
+    if weights is not None and len(stocks) != len(weights):
+        return JSONResponse(content={"error": "Length of stocks and weights must match."}, status_code=400)
+    # One position per ticker: duplicates are merged (their weights summed)
+    if weights is None:
+        stocks = list(dict.fromkeys(stocks))
+        weights = [1.0] * len(stocks)
+    else:
+        stocks, weights = merge_positions(stocks, weights)
+
+    weights = np.array(weights)
+    weights_sum = float(weights.sum())
+    if weights_sum == 0:
+        return JSONResponse(content={"error": "Weights must not all be zero."}, status_code=400)
+    weights = weights / weights_sum
+
+    # Fetch first: it refreshes expired tickers, so the version read below is
+    # the one the returns were built from (aligned returns are cached per version)
+    returns = fetch_aligned(stocks).returns("intersect")
+    returns = returns.iloc[get_calendar_offset(range, returns.index):]
+    if len(returns) < 2 or len(returns.columns) < k + 1:
+        return JSONResponse(
+            content={"error": f"Need at least 2 observations and {k + 1} stocks for {k} factor(s)."},
+            status_code=400
+        )
+
+    model = cached_factor_model(
+        stocks, str(returns.index[0]), get_data_version(stocks), k, lambda tickers: returns[tickers]
+    )
+
+    # One entry per factor (`range` is the query parameter here, so zip the columns)
+    factors = [
+        {
+            "variance": float(variance),
+            "explained_variance_ratio": float(ratio),
+            "loadings": dict(zip(model["tickers"], column.tolist())),
+        }
+        for variance, ratio, column in zip(model["factor_var"], model["explained_variance_ratio"], model["loadings"].T)
+    ]
+
+    return JSONResponse(content={
+        "factors": factors,
+        "idiosyncratic_vol": {t: float(np.sqrt(v) * 100) for t, v in zip(model["tickers"], model["specific_var"])},
+        "portfolio": portfolio_risk(model, dict(zip(stocks, weights.tolist()))),
+        "observations": model["observations"],
+        "range_used": range,
+        "k": len(factors),
+    })
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Query
 from fastapi.responses import JSONResponse
-from utils.helpers import get_calendar_cutoff
+from utils.helpers import get_calendar_offset, INTERVALS, range_start
 from services.stocks import fetch_stock_data
+from services.offload import run_frame_job
+from services.metric_jobs import max_drawdowns
 
 router = APIRouter()
 
@@ -9,18 +11,17 @@ router = APIRouter()
 @router.get("/max_drawdown")
 def get_max_drawdown(
     stocks: list[str] = Query(...),
-    range: str = Query("1Y")
+    range: str = Query("1Y"),
+    interval: str = Query("1d")
 ):
-    prices = fetch_stock_data(stocks)
-    calendar_cutoff = get_calendar_cutoff(range, prices)
-    prices_sliced = prices.loc[prices.index >= calendar_cutoff]
+    if interval not in INTERVALS:
+        return JSONResponse(content={"error": f"Invalid interval: {interval}"}, status_code=400)
 
-    max_drawdown = {}
-    for stock in stocks:
-        series = prices_sliced[stock].dropna()
-        peak = series.expanding(min_periods=1).max()
-        drawdown = (series - peak) / peak
-        max_drawdown[stock] = drawdown.min()  # most negative value = max drawdown
+    prices = fetch_stock_data(stocks, interval, range_start(range))
+    prices_sliced = prices.iloc[get_calendar_offset(range, prices.index):]
+
+    # Per-stock loop runs in the process pool for large universes
+    max_drawdown = run_frame_job(max_drawdowns, prices_sliced[stocks])
 
     return JSONResponse(content={"max_drawdown": max_drawdown, "range_used": range})
 
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Query
-from fastapi.responses import JSONResponse
-from utils.helpers import convert_timestamps, get_calendar_cutoff
-from services.stocks import fetch_stock_data
+from fastapi.responses import JSONResponse, StreamingResponse
+from utils.helpers import convert_timestamps, get_calendar_offset, ndjson_line, frame_to_ndjson, NDJSON_MEDIA_TYPE, \
+    INTERVALS, date_format, range_start
+from services.stocks import fetch_aligned
+from services.calendar_index import ALIGN_MODES
 
 router = APIRouter()
 
@@ -9,12 +11,25 @@ router = APIRouter()
 @router.get("/returns")
 def get_returns(
     stocks: list[str] = Query(...),
-    range: str = Query("1Y")
+    range: str = Query("1Y"),
+    interval: str = Query("1d"),
+    align: str = Query("intersect"),  # intersect | ffill | pairwise (each ticker on its own calendar)
+    format: str = Query("json", pattern="^(json|ndjson)$")  # ndjson streams one ticker per line
 ):
-    prices = fetch_stock_data(stocks)
-    returns = prices.pct_change().dropna() * 100
-    calendar_cutoff = get_calendar_cutoff(range, returns)
+    if interval not in INTERVALS:
+        return JSONResponse(content={"error": f"Invalid interval: {interval}"}, status_code=400)
+    if align not in ALIGN_MODES:
+        return JSONResponse(content={"error": f"Invalid alignment: {align}"}, status_code=400)
 
-    returns_sliced = returns.loc[returns.index >= calendar_cutoff]
+    returns = fetch_aligned(stocks, interval, range_start(range, 1)).returns(align)
+    returns_sliced = returns.iloc[get_calendar_offset(range, returns.index):] * 100
 
-    return JSONResponse(content={"returns": convert_timestamps(returns_sliced).fillna(0).to_dict(), "range_used": range})
\ No newline at end of file
+    if format == "ndjson":
+        def stream():
+            # Header line carries the shared date axis, then one line per ticker
+            yield ndjson_line({"range_used": range, "dates": returns_sliced.index.strftime(date_format(returns_sliced.index)).tolist()})
+            yield from frame_to_ndjson(returns_sliced)
+
+        return StreamingResponse(stream(), media_type=NDJSON_MEDIA_TYPE)
+
+    return JSONResponse(content={"returns": convert_timestamps(returns_sliced).fillna(0).to_dict(), "range_used": range})
@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import JSONResponse
+import numpy as np
+from utils.helpers import get_calendar_offset, ROLLING_WINDOWS, ALLOWED_BENCHMARKS, INTERVALS, window_bars, \
+    session_exchange, range_start, date_format
+from services.stocks import fetch_aligned
+from services.rolling_correlation import (
+    rolling_pairwise_correlation, rolling_benchmark_correlation, average_pairwise_correlation
+)
+
+router = APIRouter()
+
+DTYPES = {"float64": np.float64, "float32": np.float32}
+MAX_PAIRWISE_TICKERS = 100  # Full pairwise output is T x N x N; larger sets use average_only or a benchmark
+
+
+def _to_list(values: np.ndarray, dtype: str) -> list:
+    values = np.nan_to_num(values, nan=0.0)
+    # float32 output: drop the noise digits so the payload actually shrinks
+    return (np.round(values, 6) if dtype == "float32" else values).tolist()
+
+
+# ----- Rolling Correlations Endpoint -----
+@router.get("/rolling_correlations")
+def get_rolling_correlations(
+    stocks: list[str] = Query(...),
+    range: str = Query("1Y"),
+    window: str = Query("30d"),
+    benchmark: str | None = Query(None),  # correlate each stock with this benchmark instead of pairwise
+    average_only: bool = Query(False),  # only the average pairwise correlation series
+    dtype: str = Query("float64"),
+    interval: str = Query("1d")
+):
+    if window not in ROLLING_WINDOWS:
+        return JSONResponse(content={"error": f"Invalid rolling window: {window}"}, status_code=400)
+    if benchmark is not None and benchmark not in ALLOWED_BENCHMARKS:
+        return JSONResponse(content={"error": f"Invalid benchmark '{benchmark}'"}, status_code=400)
+    if dtype not in DTYPES:
+        return JSONResponse(content={"error": f"Invalid dtype: {dtype}"}, status_code=400)
+    if interval not in INTERVALS:
+        return JSONResponse(content={"error": f"Invalid interval: {interval}"}, status_code=400)
+
+    stocks = list(dict.fromkeys(stocks))
+    if not benchmark and not average_only and len(stocks) > MAX_PAIRWISE_TICKERS:
+        return JSONResponse(
+            content={"error": f"At most {MAX_PAIRWISE_TICKERS} tickers for pairwise correlations; "
+                              "use average_only=true or a benchmark"},
+            status_code=400
+        )
+    benchmark_ticker = ALLOWED_BENCHMARKS[benchmark] if benchmark else None
+    tickers = stocks + ([benchmark_ticker] if benchmark_ticker and benchmark_ticker not in stocks else [])
+    N = window_bars(window, interval, session_exchange(tickers))
+
+    returns = fetch_aligned(tickers, interval, range_start(range, ROLLING_WINDOWS[window])).returns("intersect")
+
+    # Keep N - 1 rows before the cutoff so the first in-range date has a full window
+    cutoff_idx = get_calendar_offset(range, returns.index)
+    returns = returns.iloc[max(0, cutoff_idx - N + 1):]
+    dates = returns.index[N - 1:]
+    date_labels = dates.strftime(date_format(dates)).tolist()
+
+    x = returns[stocks].to_numpy(dtype=np.float64)
+    content = {"dates": date_labels, "window": window, "range_used": range}
+
+    if benchmark_ticker:
+        y = returns[benchmark_ticker].to_numpy(dtype=np.float64)
+        corr = rolling_benchmark_correlation(x, y, N, DTYPES[dtype])
+        content["benchmark"] = benchmark
+        content["correlations"] = {s: _to_list(corr[:, i], dtype) for i, s in enumerate(stocks)}
+    elif average_only:
+        content["average"] = _to_list(average_pairwise_correlation(x, N, DTYPES[dtype]), dtype)
+    else:
+        corr = rolling_pairwise_correlation(x, N, DTYPES[dtype])
+        content["correlations"] = {
+            f"{a}|{b}": _to_list(corr[:, i, j], dtype)
+            for i, a in enumerate(stocks) for j, b in enumerate(stocks) if i < j
+        }
+
+    return JSONResponse(content=content)
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Query
 from fastapi.responses import JSONResponse
-from utils.helpers import get_calendar_cutoff, ROLLING_WINDOWS
-from services.stocks import fetch_stock_data
+from functools import reduce
+from utils.helpers import get_calendar_offset, ROLLING_WINDOWS, INTERVALS, range_start
+from services.stocks import fetch_derived
 
 router = APIRouter()
 
@@ -10,30 +11,34 @@ router = APIRouter()
 def get_rolling_drawdown(
     stocks: list[str] = Query(...),
     range: str = Query("1Y"),
-    window: str = Query("30d")  # rolling window, default 30 days
+    window: str = Query("30d"),  # rolling window, default 30 days
+    interval: str = Query("1d")
 ):
+    if interval not in INTERVALS:
+        return JSONResponse(content={"error": f"Invalid interval: {interval}"}, status_code=400)
+
     if window not in ROLLING_WINDOWS:
         return JSONResponse(
             content={"error": f"Invalid rolling window: {window}"},
             status_code=400
         )
 
-    N = ROLLING_WINDOWS[window]  # convert "30d" -> integer rows
+    # Drawdown from the rolling peak is materialized per ticker on refresh
+    derived = fetch_derived(stocks, interval, range_start(range, ROLLING_WINDOWS[window]))
+    series = {s: derived[s]["rolling_drawdown"][window] for s in stocks}
 
-    prices = fetch_stock_data(stocks)
-    calendar_cutoff = get_calendar_cutoff(range, prices)
-    prices_sliced = prices.loc[prices.index >= calendar_cutoff]
+    # Union of trading dates, as with the aligned price frame
+    index = reduce(lambda a, b: a.union(b), [dd.index for dd in series.values()])
+    index = index[get_calendar_offset(range, index):]
 
+    # Record building stays in-process: shipping the records back from a pool
+    # worker would pickle about as much as it saves
+    dates = [str(idx) for idx in index]
     rolling_drawdown = {}
     for stock in stocks:
-        series = prices_sliced[stock]
-        rolling_peak = series.rolling(window=N, min_periods=1).max()
-        drawdown = (series - rolling_peak) / rolling_peak
-        drawdown = drawdown.fillna(0)  # <- fill NaNs to avoid JSON issues
-
+        drawdown = series[stock].reindex(index).fillna(0)  # <- fill NaNs to avoid JSON issues
         rolling_drawdown[stock] = [
-            {"date": str(idx), "drawdown": float(dd)}
-            for idx, dd in drawdown.items()
+            {"date": d, "drawdown": dd} for d, dd in zip(dates, drawdown.tolist())
         ]
 
     return JSONResponse(
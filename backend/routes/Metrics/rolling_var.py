@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import JSONResponse
+import numpy as np
+from utils.helpers import get_calendar_offset, VAR_WINDOWS, INTERVALS, window_bars, session_exchange, \
+    range_start, date_format, merge_positions
+from services.stocks import fetch_aligned
+from services.intraday_store import history_bars
+from services.rolling_var import rolling_var_es, VAR_LEVELS
+
+router = APIRouter()
+
+
+def _to_list(values: np.ndarray) -> list:
+    return np.round(values, 6).tolist()
+
+
+# ----- Rolling VaR / Expected Shortfall Endpoint -----
+@router.get("/rolling_var")
+def get_rolling_var(
+    stocks: list[str] = Query(...),
+    weights: list[float] | None = Query(None),  # adds the weighted portfolio (as /portfolio_metrics)
+    range: str = Query("1Y"),
+    window: str = Query("252d"),
+    levels: list[float] = Query(list(VAR_LEVELS)),
+    interval: str = Query("1d")
+):
+    if window not in VAR_WINDOWS:
+        return JSONResponse(content={"error": f"Invalid rolling window: {window}"}, status_code=400)
+    if interval not in INTERVALS:
+        return JSONResponse(content={"error": f"Invalid interval: {interval}"}, status_code=400)
+    if any(not 0.5 <= level < 1 for level in levels):
+        return JSONResponse(content={"error": f"Invalid confidence level(s): {levels}"}, status_code=400)
+    if weights is not None and len(weights) != len(stocks):
+        return JSONResponse(content={"error": "Length of stocks and weights must match."}, status_code=400)
+    if weights is not None and sum(weights) == 0:
+        return JSONResponse(content={"error": "Weights must not all be zero."}, status_code=400)
+
+    # One column per ticker: duplicates are merged (their weights summed)
+    if weights is not None:
+        stocks, weights = merge_positions(stocks, weights)
+    else:
+        stocks = list(dict.fromkeys(stocks))
+
+    exchange = session_exchange(stocks)
+    N = window_bars(window, interval, exchange)  # Trading days -> bars
+    available = history_bars(interval, exchange)
+    if available is not None and N > available:
+        return JSONResponse(
+            content={"error": f"Window {window} needs {N} {interval} bars; at most {available} are kept"},
+            status_code=400
+        )
+
+    returns = fetch_aligned(stocks, interval, range_start(range, VAR_WINDOWS[window])).returns("intersect")
+
+    # Keep N - 1 rows before the cutoff so the first in-range date has a full window
+    cutoff_idx = get_calendar_offset(range, returns.index)
+    returns = returns.iloc[max(0, cutoff_idx - N + 1):]
+    dates = returns.index[N - 1:]
+
+    # Columns: stocks, then the daily-rebalanced portfolio if weights were given
+    # By position, so each name in `names` labels its own column
+    x = returns.to_numpy(dtype=np.float64)[:, returns.columns.get_indexer(stocks)]
+    names = list(stocks)
+    if weights is not None:
+        w = np.array(weights, dtype=np.float64)
+        x = np.column_stack([x, x @ (w / w.sum())])
+        names.append("portfolio")
+
+    var, es = rolling_var_es(x * 100, N, levels)  # Losses in % of value
+
+    def by_name(result: dict) -> dict:
+        return {
+            name: {f"{level:g}": _to_list(result[level][:, j]) for level in levels}
+            for j, name in enumerate(names)
+        }
+
+    return JSONResponse(content={
+        "dates": dates.strftime(date_format(dates)).tolist(),
+        "var": by_name(var),
+        "es": by_name(es),
+        "window": window,
+        "levels": levels,
+        "range_used": range,
+    })
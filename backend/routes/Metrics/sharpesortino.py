@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Query
 from fastapi.responses import JSONResponse
 import numpy as np
-from utils.helpers import get_calendar_cutoff
-from services.stocks import fetch_stock_data
+from utils.helpers import get_calendar_offset, INTERVALS, range_start
+from services.stocks import fetch_aligned
+from services.calendar_index import ALIGN_MODES
 
 router = APIRouter()
 
@@ -11,13 +12,17 @@ router = APIRouter()
 def get_sharpe_sortino(
     stocks: list[str] = Query(...),
     range: str = Query("1Y"),
-    risk_free: float = Query(0.0)  # annualized risk-free rate (default 0)
+    risk_free: float = Query(0.0),  # annualized risk-free rate (default 0)
+    interval: str = Query("1d"),
+    align: str = Query("intersect")  # pairwise: each ticker's ratios over its own trading days
 ):
-    prices = fetch_stock_data(stocks)
-    returns = prices.pct_change().dropna()
+    if interval not in INTERVALS:
+        return JSONResponse(content={"error": f"Invalid interval: {interval}"}, status_code=400)
+    if align not in ALIGN_MODES:
+        return JSONResponse(content={"error": f"Invalid alignment: {align}"}, status_code=400)
 
-    calendar_cutoff = get_calendar_cutoff(range, returns)
-    returns_sliced = returns.loc[returns.index >= calendar_cutoff]
+    returns = fetch_aligned(stocks, interval, range_start(range, 1)).returns(align)
+    returns_sliced = returns.iloc[get_calendar_offset(range, returns.index):]
 
     sharpe_ratios = {}
     sortino_ratios = {}
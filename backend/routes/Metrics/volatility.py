@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Query
-from fastapi.responses import JSONResponse
-from utils.helpers import convert_timestamps, ROLLING_WINDOWS, get_calendar_cutoff
-from services.stocks import fetch_stock_data
-import numpy as np
+from fastapi.responses import JSONResponse, StreamingResponse
+from functools import reduce
+import pandas as pd
+from utils.helpers import convert_timestamps, ROLLING_WINDOWS, get_calendar_offset, ndjson_line, frame_to_ndjson, \
+    NDJSON_MEDIA_TYPE, INTERVALS, date_format, range_start
+from services.stocks import fetch_derived
 
 router = APIRouter()
 
@@ -12,8 +14,13 @@ router = APIRouter()
 def get_volatility(
         stocks: list[str] = Query(...),
         range: str = Query("1Y"),
-        rolling: list[str] = Query(["30d"])
+        rolling: list[str] = Query(["30d"]),
+        interval: str = Query("1d"),
+        format: str = Query("json", pattern="^(json|ndjson)$")  # ndjson streams one window/ticker per line
 ):
+    if interval not in INTERVALS:
+        return JSONResponse(content={"error": f"Invalid interval: {interval}"}, status_code=400)
+
     invalid = [r for r in rolling if r not in ROLLING_WINDOWS]
     if invalid:
         return JSONResponse(
@@ -21,18 +28,27 @@ def get_volatility(
             status_code=400,
         )
 
-    prices = fetch_stock_data(stocks)
-    returns = prices.pct_change().dropna()
-    calendar_cutoff = get_calendar_cutoff(range, returns)
+    # Rolling volatility is materialized per ticker on refresh; only slice + align here
+    derived = fetch_derived(stocks, interval, range_start(range, max(ROLLING_WINDOWS[r] for r in rolling)))
+
+    # Dates on which every requested stock has a return
+    index = reduce(lambda a, b: a.intersection(b), [derived[s]["returns"].index for s in stocks])
+    index = index[get_calendar_offset(range, index):]  # slice by calendar days
+
+    def window_frame(roll: str) -> pd.DataFrame:
+        return pd.DataFrame({s: derived[s]["volatility"][roll].reindex(index) for s in stocks}, index=index)
+
+    if format == "ndjson":
+        def stream():
+            # Header line carries the shared date axis, then one line per (window, ticker)
+            yield ndjson_line({"range_used": range, "rolling_used": rolling, "dates": index.strftime(date_format(index)).tolist()})
+            for roll in rolling:
+                yield from frame_to_ndjson(window_frame(roll), window=roll)
+
+        return StreamingResponse(stream(), media_type=NDJSON_MEDIA_TYPE)
 
     vol_results = {}
     for roll in rolling:
-        N = ROLLING_WINDOWS[roll]
-        vol = returns.rolling(window=N).std() * np.sqrt(252) * 100
-        if calendar_cutoff is not None:
-            vol = vol.loc[vol.index >= calendar_cutoff]  # slice by calendar days
-        vol_results[roll] = convert_timestamps(vol.fillna(0)).to_dict()
-
-    print(vol_results)
+        vol_results[roll] = convert_timestamps(window_frame(roll).fillna(0)).to_dict()
 
     return JSONResponse(content={"volatility": vol_results, "range_used": range, "rolling_used": rolling})
@@ -0,0 +1,92 @@
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+import asyncio
+import numpy as np
+import logging
+
+from utils.helpers import ROLLING_WINDOWS
+from services.stocks import fetch_stock_data
+from services.live import PortfolioLiveState, Subscription, feed_hub
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+def _validate(message: dict) -> tuple[list[str], np.ndarray, list[str]]:
+    # Same rules as /portfolio_metrics
+    stocks = message.get("stocks") or []
+    weights = message.get("weights") or []
+    rolling = message.get("rolling") or ["30d"]
+
+    if not stocks:
+        raise ValueError("No stocks provided")
+    if len(stocks) != len(weights):
+        raise ValueError("Length of stocks and weights must match.")
+    invalid = [r for r in rolling if r not in ROLLING_WINDOWS]
+    if invalid:
+        raise ValueError(f"Invalid rolling window(s): {invalid}")
+
+    # A ticker listed twice is one position: merge its weights (the live feed
+    # completes a bar once every distinct ticker has reported)
+    merged = {}
+    for stock, weight in zip(stocks, weights):
+        merged[stock] = merged.get(stock, 0.0) + float(weight)
+
+    weights = np.array(list(merged.values()), dtype=np.float64)
+    if float(weights.sum()) == 0:
+        raise ValueError("Weights must not all be zero.")
+    return list(merged), weights / weights.sum(), list(rolling)
+
+
+# ----- Live Portfolio WebSocket -----
+@router.websocket("/ws/portfolio")
+async def portfolio_live(websocket: WebSocket):
+    # Protocol: client sends {"stocks": [...], "weights": [...], "rolling": [...]},
+    # server replies {"type": "snapshot", ...} then {"type": "delta", ...} per new bar.
+    await websocket.accept()
+
+    try:
+        stocks, weights, rolling = _validate(await websocket.receive_json())
+    except (ValueError, TypeError, AttributeError) as e:
+        await websocket.send_json({"type": "error", "error": str(e)})
+        await websocket.close(code=1008)
+        return
+    except WebSocketDisconnect:
+        return
+
+    logger.info("WS /ws/portfolio subscribe | stocks=%s | rolling=%s", stocks, rolling)
+
+    state = PortfolioLiveState(stocks, weights, rolling)
+    try:
+        prices = await asyncio.to_thread(fetch_stock_data, stocks)
+    except Exception:
+        logger.exception("Failed to fetch stock data | stocks=%s", stocks)
+        await websocket.send_json({"type": "error", "error": "Failed to fetch stock data."})
+        await websocket.close(code=1011)
+        return
+
+    state.seed(prices)
+    await websocket.send_json({"type": "snapshot", "stocks": stocks, "rolling_used": rolling, **state.snapshot()})
+
+    sub = Subscription(state)
+    feed_hub.subscribe(sub)
+
+    async def watch_client():
+        # Only purpose: notice the disconnect (client messages are ignored)
+        while True:
+            await websocket.receive_text()
+
+    watcher = asyncio.create_task(watch_client())
+    try:
+        while True:
+            getter = asyncio.create_task(sub.queue.get())
+            done, _ = await asyncio.wait({getter, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if watcher in done:
+                getter.cancel()
+                break
+            await websocket.send_json(getter.result())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        watcher.cancel()
+        feed_hub.unsubscribe(sub)
+        logger.info("WS /ws/portfolio closed | stocks=%s", stocks)
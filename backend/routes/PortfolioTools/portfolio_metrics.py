@@ -3,8 +3,10 @@ from fastapi.responses import JSONResponse
 import numpy as np
 import logging
 
-from utils.helpers import convert_timestamps, ROLLING_WINDOWS, get_calendar_cutoff
-from services.stocks import fetch_stock_data
+from utils.helpers import convert_timestamps, get_calendar_offset, INTERVALS, ROLLING_WINDOWS, window_bars, \
+    annualization_factor, periods_per_year, session_exchange, range_start
+from services.stocks import fetch_aligned
+from services.calendar_index import COMMON_ROW_MODES
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -14,13 +16,29 @@ def get_portfolio_metrics(
     stocks: list[str] = Query(...),
     weights: list[float] = Query(...),
     range: str = Query("1Y"),
-    rolling: list[str] = Query(["30d"])
+    rolling: list[str] = Query(["30d"]),
+    interval: str = Query("1d"),
+    align: str = Query("intersect")  # intersect | ffill (closed markets contribute a 0 return)
 ):
     logger.info(
-        "GET /portfolio_metrics | stocks=%s | weights=%s | range=%s | rolling=%s",
-        stocks, weights, range, rolling
+        "GET /portfolio_metrics | stocks=%s | weights=%s | range=%s | rolling=%s | interval=%s | align=%s",
+        stocks, weights, range, rolling, interval, align
     )
 
+    if interval not in INTERVALS:
+        logger.warning("Validation failed: invalid interval | interval=%s", interval)
+        return JSONResponse(
+            content={"error": f"Invalid interval: {interval}"},
+            status_code=400,
+        )
+
+    if align not in COMMON_ROW_MODES:
+        logger.warning("Validation failed: invalid alignment | align=%s", align)
+        return JSONResponse(
+            content={"error": f"Invalid alignment: {align}"},
+            status_code=400,
+        )
+
     if len(stocks) != len(weights):
         logger.warning(
             "Validation failed: len(stocks) != len(weights) | len(stocks)=%d | len(weights)=%d",
@@ -44,8 +62,8 @@ def get_portfolio_metrics(
     logger.debug("Weights normalized | weights=%s", weights.tolist())
 
     try:
-        prices = fetch_stock_data(stocks)
-        logger.info("Fetched stock prices | rows=%d | cols=%d", prices.shape[0], prices.shape[1])
+        aligned = fetch_aligned(stocks, interval, range_start(range, max(ROLLING_WINDOWS.get(r, 0) for r in rolling)))
+        logger.info("Fetched stock prices | rows=%d | cols=%d", len(aligned.dates), len(aligned.tickers))
     except Exception:
         logger.exception("Failed to fetch stock data | stocks=%s", stocks)
         return JSONResponse(
@@ -53,11 +71,12 @@ def get_portfolio_metrics(
             status_code=500,
         )
 
-    returns = prices.pct_change().dropna()
+    returns = aligned.returns(align)
+    exchange = session_exchange(stocks)  # Sets intraday bars per day
     logger.info("Computed returns | rows=%d", len(returns))
 
     try:
-        max_roll_days = max(ROLLING_WINDOWS[r] for r in rolling)
+        max_roll_days = max(window_bars(r, interval, exchange) for r in rolling)
     except KeyError as e:
         logger.warning("Invalid rolling window key | rolling=%s | missing=%s", rolling, str(e))
         return JSONResponse(
@@ -67,29 +86,25 @@ def get_portfolio_metrics(
 
     logger.debug("Max rolling days | max_roll_days=%d", max_roll_days)
 
-    calendar_cutoff = get_calendar_cutoff(range, returns)
-    if calendar_cutoff is not None:
-        cutoff_idx = returns.index.searchsorted(calendar_cutoff)
-        extended_idx = max(0, cutoff_idx - max_roll_days)
-        extended_cutoff = returns.index[extended_idx]
-        returns = returns.loc[returns.index >= extended_cutoff]
+    # Integer offsets (binary search): keep max_roll_days rows before the range for full windows
+    cutoff_idx = get_calendar_offset(range, returns.index)
+    extended_idx = max(0, cutoff_idx - max_roll_days)
+    returns = returns.iloc[extended_idx:]
+    in_range = cutoff_idx - extended_idx  # First in-range row of the extended frame
 
-        logger.info(
-            "Applied calendar cutoff | range=%s | cutoff=%s | extended_cutoff=%s | kept_rows=%d",
-            range, calendar_cutoff, extended_cutoff, len(returns)
-        )
-    else:
-        logger.info("No calendar cutoff applied | range=%s | rows=%d", range, len(returns))
+    logger.info(
+        "Applied calendar cutoff | range=%s | cutoff_idx=%d | extended_idx=%d | kept_rows=%d",
+        range, cutoff_idx, extended_idx, len(returns)
+    )
 
     portfolio_returns = (returns * weights).sum(axis=1)
     logger.info("Computed portfolio returns | rows=%d", len(portfolio_returns))
 
     portfolio_vol = {}
     for roll in rolling:
-        roll_days = ROLLING_WINDOWS[roll]
-        vol_series = portfolio_returns.rolling(window=roll_days).std() * np.sqrt(252) * 100
-        if calendar_cutoff is not None:
-            vol_series = vol_series.loc[vol_series.index >= calendar_cutoff]
+        roll_days = window_bars(roll, interval, exchange)
+        vol_series = portfolio_returns.rolling(window=roll_days).std() * annualization_factor(interval, exchange) * 100
+        vol_series = vol_series.iloc[in_range:]
 
         portfolio_vol[roll] = convert_timestamps(vol_series.fillna(0)).to_dict()
         logger.debug(
@@ -97,8 +112,7 @@ def get_portfolio_metrics(
             roll, roll_days, len(vol_series)
         )
 
-    if calendar_cutoff is not None:
-        portfolio_returns = portfolio_returns.loc[portfolio_returns.index >= calendar_cutoff]
+    portfolio_returns = portfolio_returns.iloc[in_range:]
 
     portfolio_returns_dict = (convert_timestamps(portfolio_returns).fillna(0) * 100).to_dict()
 
@@ -107,12 +121,12 @@ def get_portfolio_metrics(
     drawdown = (cumulative - rolling_max) / rolling_max
     portfolio_max_dd = float(drawdown.min()) * 100
 
-    mean_return = portfolio_returns.mean() * 252
-    vol = portfolio_returns.std() * np.sqrt(252)
+    mean_return = portfolio_returns.mean() * periods_per_year(interval, exchange)
+    vol = portfolio_returns.std() * annualization_factor(interval, exchange)
     portfolio_sharpe = float(mean_return / vol) if vol > 0 else None
 
     downside_returns = portfolio_returns[portfolio_returns < 0]
-    downside_vol = downside_returns.std() * np.sqrt(252)
+    downside_vol = downside_returns.std() * annualization_factor(interval, exchange)
     portfolio_sortino = float(mean_return / downside_vol) if downside_vol > 0 else None
 
     logger.info(
@@ -0,0 +1,95 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+import numpy as np
+import pandas as pd
+import logging
+
+from services.stocks import fetch_stock_data
+from services.scenarios import SCENARIOS, replay_scenarios
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+MAX_PORTFOLIOS = 1000
+
+
+class Portfolio(BaseModel):
+    name: str | None = None
+    stocks: list[str]
+    weights: list[float]
+
+
+class CustomScenario(BaseModel):
+    name: str
+    start: str
+    end: str
+
+
+class ScenarioRequest(BaseModel):
+    portfolios: list[Portfolio]
+    scenarios: list[str] = list(SCENARIOS)
+    custom: list[CustomScenario] = []
+
+
+@router.get("/scenarios")
+def list_scenarios():
+    return {"scenarios": SCENARIOS}
+
+
+@router.post("/scenarios")
+def run_scenarios(request: ScenarioRequest):
+    logger.info(
+        "POST /scenarios | portfolios=%d | scenarios=%s | custom=%d",
+        len(request.portfolios), request.scenarios, len(request.custom)
+    )
+
+    if not request.portfolios:
+        return JSONResponse(content={"error": "No portfolios provided"}, status_code=400)
+    if len(request.portfolios) > MAX_PORTFOLIOS:
+        return JSONResponse(content={"error": f"At most {MAX_PORTFOLIOS} portfolios per request"}, status_code=400)
+
+    unknown = [s for s in request.scenarios if s not in SCENARIOS]
+    if unknown:
+        return JSONResponse(content={"error": f"Unknown scenario(s): {unknown}"}, status_code=400)
+
+    scenarios = {s: SCENARIOS[s] for s in request.scenarios}
+    for c in request.custom:
+        if c.name in SCENARIOS or c.name in scenarios:
+            return JSONResponse(content={"error": f"Scenario name '{c.name}' is already taken"}, status_code=400)
+        try:
+            start, end = pd.Timestamp(c.start), pd.Timestamp(c.end)
+        except ValueError:
+            return JSONResponse(content={"error": f"Invalid dates for scenario '{c.name}'"}, status_code=400)
+        if pd.isna(start) or pd.isna(end):  # Empty strings parse to NaT instead of raising
+            return JSONResponse(content={"error": f"Invalid dates for scenario '{c.name}'"}, status_code=400)
+        if end <= start:
+            return JSONResponse(content={"error": f"Scenario '{c.name}' must end after it starts"}, status_code=400)
+        scenarios[c.name] = {"label": c.name, "start": start.strftime("%Y-%m-%d"), "end": end.strftime("%Y-%m-%d")}
+
+    # One weight matrix (portfolios x union of tickers)
+    tickers = list(dict.fromkeys(t for p in request.portfolios for t in p.stocks))
+    column = {t: i for i, t in enumerate(tickers)}
+    weights = np.zeros((len(request.portfolios), len(tickers)))
+    for row, p in enumerate(request.portfolios):
+        if len(p.stocks) != len(p.weights):
+            return JSONResponse(content={"error": f"Portfolio {row}: length of stocks and weights must match."}, status_code=400)
+        total = float(np.sum(p.weights))
+        if total == 0:
+            return JSONResponse(content={"error": f"Portfolio {row}: weights must not all be zero."}, status_code=400)
+        for t, w in zip(p.stocks, p.weights):
+            weights[row, column[t]] += w / total
+
+    try:
+        prices = fetch_stock_data(tickers)
+    except Exception:
+        logger.exception("Failed to fetch stock data | tickers=%d", len(tickers))
+        return JSONResponse(content={"error": "Failed to fetch stock data."}, status_code=500)
+
+    results = replay_scenarios(prices, weights, scenarios)
+
+    return JSONResponse(content={
+        "portfolios": [p.name or f"portfolio_{i}" for i, p in enumerate(request.portfolios)],
+        "scenarios": scenarios,
+        "results": results,
+    })
@@ -0,0 +1,97 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import JSONResponse
+import numpy as np
+import logging
+
+from utils.helpers import ROLLING_WINDOWS, get_calendar_offset, INTERVALS, window_bars, annualization_factor, \
+    periods_per_year, session_exchange, range_start, date_format, merge_positions
+from services.stocks import fetch_aligned
+from services.calendar_index import COMMON_ROW_MODES
+from services.aggregate import latest_values, column_means, rolling_volatility, max_drawdowns, sharpe_sortino, \
+    compute_overall, to_json_list
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+def _scalar(value: float) -> float | None:
+    return None if np.isnan(value) else float(value)
+
+
+# ----- Portfolio Snapshot Endpoint -----
+@router.get("/portfolio_snapshot")
+def get_portfolio_snapshot(
+    stocks: list[str] = Query(...),
+    weights: list[float] = Query(...),
+    range: str = Query("1Y"),
+    rolling: str = Query("30d"),
+    interval: str = Query("1d"),
+    align: str = Query("intersect")  # intersect | ffill, as /portfolio_metrics
+):
+    """
+    Latest values and range averages for the summary cards in one small
+    response: the same definitions as /portfolio_metrics (portfolio) and the
+    per-stock routes, computed from one shared returns matrix.
+    """
+    if len(stocks) != len(weights):
+        return JSONResponse(content={"error": "Length of stocks and weights must match."}, status_code=400)
+    if rolling not in ROLLING_WINDOWS:
+        return JSONResponse(content={"error": f"Invalid rolling window: {rolling}"}, status_code=400)
+    if interval not in INTERVALS:
+        return JSONResponse(content={"error": f"Invalid interval: {interval}"}, status_code=400)
+    if align not in COMMON_ROW_MODES:
+        return JSONResponse(content={"error": f"Invalid alignment: {align}"}, status_code=400)
+
+    stocks, weights = merge_positions(stocks, weights)  # Duplicate tickers: one column, summed weight
+    weights = np.array(weights, dtype=np.float64)
+    if weights.sum() == 0:
+        return JSONResponse(content={"error": "Weights must not all be zero."}, status_code=400)
+    weights = weights / weights.sum()
+
+    returns = fetch_aligned(stocks, interval, range_start(range, ROLLING_WINDOWS[rolling])).returns(align)
+    exchange = session_exchange(stocks)  # Sets intraday bars per day
+    N = window_bars(rolling, interval, exchange)
+
+    # Keep N rows before the cutoff so in-range volatility has full windows (as /portfolio_metrics)
+    cutoff_idx = get_calendar_offset(range, returns.index)
+    extended = returns.iloc[max(0, cutoff_idx - N):]
+    start = cutoff_idx - max(0, cutoff_idx - N)
+
+    # Columns 0..n-1: stocks, column n: daily-rebalanced portfolio
+    x = extended[stocks].to_numpy(dtype=np.float64)
+    x = np.column_stack([x, x @ weights])
+
+    vol = rolling_volatility(x, N, annualization_factor(interval, exchange))[start:]
+    in_range = x[start:]
+    latest_vol = latest_values(vol)
+    avg_vol = column_means(vol)
+    avg_return = column_means(in_range) * 100
+    max_dd = max_drawdowns(in_range)
+    sharpe, sortino = sharpe_sortino(in_range, periods_per_year(interval, exchange))
+
+    dates = extended.index[start:]
+    content = {
+        "portfolio": {
+            "latest_vol": _scalar(latest_vol[-1]),
+            "avg_vol": _scalar(avg_vol[-1]),
+            "avg_return": _scalar(avg_return[-1]),
+            "cumulative_return": float((np.prod(1 + in_range[:, -1]) - 1) * 100),
+            "max_drawdown": _scalar(max_dd[-1]),
+            "sharpe": _scalar(sharpe[-1]),
+            "sortino": _scalar(sortino[-1]),
+        },
+        # Per-stock values as arrays aligned with "tickers"
+        "stocks": {
+            "tickers": stocks,
+            "latest_vol": to_json_list(latest_vol[:-1]),
+            "avg_return": to_json_list(avg_return[:-1]),
+            "max_drawdown": to_json_list(max_dd[:-1]),
+            "sharpe": to_json_list(sharpe[:-1]),
+            "sortino": to_json_list(sortino[:-1]),
+        },
+        "overall": compute_overall(latest_vol[:-1], avg_return[:-1], sharpe[:-1], sortino[:-1], max_dd[:-1]),
+        "as_of": dates[-1].strftime(date_format(dates)) if len(dates) else None,
+        "range_used": range,
+        "rolling_used": rolling,
+    }
+    return JSONResponse(content=content)
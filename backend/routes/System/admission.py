@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from core.admission import admission_stats
+
+router = APIRouter()
+
+# ----- Admission Control Statistics Endpoint -----
+@router.get("/admission/status")
+def get_admission_status():
+    # Per route class: limit, active, queue depth, rejections and queue wait times
+    return admission_stats()
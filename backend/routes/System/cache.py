@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from core.http_cache import RESPONSE_CACHE
+from services.calendar_index import align_cache_stats
+from services.stocks import STOCK_CACHE
+
+router = APIRouter()
+
+# ----- Cache Statistics Endpoint -----
+@router.get("/cache/status")
+def get_cache_status():
+    return {
+        "price_cache": STOCK_CACHE.stats(),
+        "response_cache": RESPONSE_CACHE.stats(),
+        "align_cache": align_cache_stats(),
+    }
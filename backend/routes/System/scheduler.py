@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from services.scheduler import cache_warmer
+
+router = APIRouter()
+
+# ----- Cache Warmer Status Endpoint -----
+@router.get("/scheduler/status")
+def get_scheduler_status():
+    # Popularity counts, pending stale refreshes and last refresh time per ticker/exchange
+    return cache_warmer.status()
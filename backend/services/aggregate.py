@@ -1,70 +1,85 @@
 from typing import Dict
 import numpy as np
+import pandas as pd
 
-def flatten_volatility(volatility: dict) -> float:
-    """
-    Extract the latest volatility value from the single rolling window.
-    Input shape:
-        { "30d": {date: float, ...} }
-    Output:
-        float (latest value)
-    """
-    if not volatility:
-        return 0.0  # or None, depending on your needs
+# Array-backed snapshot helpers. Every function takes a (T, N) matrix of
+# per-period returns (rows = dates, columns = series) and returns one value
+# per column, so a whole portfolio is summarised in a handful of vector ops.
 
-    # Get the only window (e.g. "30d")
-    (roll, ts_data), = volatility.items()
 
-    if not ts_data:
-        return 0.0
+def latest_values(values: np.ndarray) -> np.ndarray:
+    """Last non-NaN value of each column (NaN for an all-NaN column)."""
+    valid = ~np.isnan(values)
+    if values.shape[0] == 0:
+        return np.full(values.shape[1], np.nan)
+    last = values.shape[0] - 1 - np.argmax(valid[::-1], axis=0)
+    latest = values[last, np.arange(values.shape[1])]
+    latest[~valid.any(axis=0)] = np.nan
+    return latest
 
-    # Latest date
-    last_date = max(ts_data.keys())
-    return ts_data[last_date]
 
+def column_means(values: np.ndarray) -> np.ndarray:
+    """NaN-skipping mean per column (NaN, not a warning, for an empty column)."""
+    counts = (~np.isnan(values)).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, np.nansum(values, axis=0) / counts, np.nan)
 
-def flatten_returns(returns: Dict) -> Dict[str, Dict[str, float]]:
-    """
-    Convert returns time series into snapshot { "AAPL": {"1M": 3.5}, ... }.
-    Uses latest available date.
-    """
-    flat = {}
-    if not returns:
-        return flat
-    last_date = max(returns.keys())
-    for stock, value in returns[last_date].items():
-        flat[stock] = {"return": value}
-    return flat
-
-
-def compute_overall(vol: Dict[str, Dict[str, float]],
-                    returns: Dict[str, Dict[str, float]],
-                    sharpe: Dict[str, float],
-                    sortino: Dict[str, float],
-                    max_drawdown: Dict[str, float]) -> Dict[str, float]:
+
+def column_stds(values: np.ndarray) -> np.ndarray:
+    """NaN-skipping sample std (ddof=1) per column; NaN with fewer than two values."""
+    counts = (~np.isnan(values)).sum(axis=0)
+    centred = values - column_means(values)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 1, np.sqrt(np.nansum(centred ** 2, axis=0) / (counts - 1)), np.nan)
+
+
+def rolling_volatility(returns: np.ndarray, window: int, annualization: float) -> np.ndarray:
+    """Annualised rolling volatility in % (same definition as /volatility), shape (T, N)."""
+    return pd.DataFrame(returns).rolling(window=window).std().to_numpy() * annualization * 100
+
+
+def max_drawdowns(returns: np.ndarray) -> np.ndarray:
+    """Max drawdown in % of the compounded return path per column."""
+    if returns.shape[0] == 0:
+        return np.zeros(returns.shape[1])
+    cumulative = np.cumprod(1 + np.nan_to_num(returns), axis=0)
+    peak = np.maximum.accumulate(cumulative, axis=0)
+    return ((cumulative - peak) / peak).min(axis=0) * 100
+
+
+def sharpe_sortino(returns: np.ndarray, periods_per_year: int) -> tuple[np.ndarray, np.ndarray]:
+    """Annualised Sharpe and Sortino per column (risk-free 0, as in /portfolio_metrics)."""
+    mean_return = column_means(returns) * periods_per_year
+    vol = column_stds(returns) * np.sqrt(periods_per_year)
+    downside_vol = column_stds(np.where(returns < 0, returns, np.nan)) * np.sqrt(periods_per_year)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sharpe = np.where(vol > 0, mean_return / vol, np.nan)
+        sortino = np.where(downside_vol > 0, mean_return / downside_vol, np.nan)
+    return sharpe, sortino
+
+
+def compute_overall(vol: np.ndarray,
+                    returns: np.ndarray,
+                    sharpe: np.ndarray,
+                    sortino: np.ndarray,
+                    max_drawdown: np.ndarray) -> Dict[str, float | None]:
     """
-    Aggregate per-stock metrics into portfolio averages.
+    Aggregate per-stock metrics (one value per stock) into cross-sectional
+    averages. Stocks without a value (NaN) are left out of each average.
     """
-    # Volatility: average across stocks for each rolling window
-    overall_vol = {
-        roll: np.mean([vals[roll] for vals in vol.values() if roll in vals])
-        for roll in {r for vals in vol.values() for r in vals}
-    }
+    def mean(values: np.ndarray) -> float | None:
+        values = values[~np.isnan(values)]
+        return float(values.mean()) if len(values) else None
 
-    # Returns: average across stocks
-    overall_returns = {
-        k: np.mean([vals[k] for vals in returns.values() if k in vals])
-        for k in {r for vals in returns.values() for r in vals}
+    return {
+        "vol": mean(vol),
+        "returns": mean(returns),
+        "sharpe": mean(sharpe),
+        "sortino": mean(sortino),
+        "max_drawdown": mean(max_drawdown),
     }
 
-    overall_sharpe = float(np.mean(list(sharpe.values()))) if sharpe else 0.0
-    overall_sortino = float(np.mean(list(sortino.values()))) if sortino else 0.0
-    overall_max_dd = float(np.mean(list(max_drawdown.values()))) if max_drawdown else 0.0
 
-    return {
-        "vol": overall_vol,
-        "returns": overall_returns,
-        "sharpe": overall_sharpe,
-        "sortino": overall_sortino,
-        "max_drawdown": overall_max_dd,
-    }
+def to_json_list(values: np.ndarray) -> list:
+    """NaN -> None so arrays serialise as valid JSON."""
+    return [None if np.isnan(v) else float(v) for v in values]
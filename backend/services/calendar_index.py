@@ -0,0 +1,166 @@
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from services.price_cache import entry_bytes
+
+# How tickers trading on different calendars are put on one date axis:
+#   intersect - only dates every ticker traded; returns span exchange holidays
+#   ffill     - every union date; closed markets carry their last price (0 return)
+#   pairwise  - each ticker's own-calendar returns on the union axis (NaN elsewhere),
+#               so pairwise statistics (corr / cov) use each pair's own overlap
+ALIGN_MODES = ("intersect", "ffill", "pairwise")
+COMMON_ROW_MODES = ("intersect", "ffill")  # For metrics that need every ticker on every row
+ALIGN_CACHE_MAX_BYTES = 256 * 1024 * 1024  # Aligned arrays + derived frames kept (LRU), on top of the price cache
+
+# (tickers, interval, data version) -> AlignedPrices
+_ALIGN_CACHE = OrderedDict()
+_ALIGN_LOCK = threading.Lock()
+
+
+class AlignedPrices:
+    """
+    Close prices for a ticker set on their union calendar, built once per data
+    version. Holds the (T, N) value matrix, per-ticker position maps into the
+    union axis, and lazily derived per-mode price / return frames. Callers get
+    frames backed by the cached arrays (Copy-on-Write keeps them read-only) and
+    slice them by integer offset, so repeat requests neither re-align nor copy.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        if not frame.index.is_monotonic_increasing:
+            frame = frame.sort_index()  # Offsets come from binary search on the date axis
+        self.tickers = list(frame.columns)
+        self.dates = frame.index
+        self.values = frame.to_numpy(dtype=np.float64)
+        self.valid = ~np.isnan(self.values)
+
+        # Union calendar = dates where at least one ticker traded (shared-panel
+        # frames wrap the full panel axis, which can have rows none of them has)
+        traded = self.valid.any(axis=1)
+        if not traded.all():
+            self.dates = self.dates[traded]
+            self.values = self.values[traded]
+            self.valid = self.valid[traded]
+        self._positions = {}
+        self._prices = {}
+        self._returns = {}
+        self._lock = threading.Lock()
+
+    def nbytes(self) -> int:
+        """Resident size: value / validity matrices plus every derived frame built so far."""
+        with self._lock:
+            # The union price frame wraps self.values without a copy
+            frames = [f for mode, f in self._prices.items() if mode != "union"] + list(self._returns.values())
+            positions = list(self._positions.values())
+        return self.values.nbytes + self.valid.nbytes + entry_bytes(positions) + entry_bytes(frames)
+
+    def positions(self, ticker: str) -> np.ndarray:
+        """Row positions in the union axis on which `ticker` has a price."""
+        with self._lock:
+            if ticker not in self._positions:
+                self._positions[ticker] = np.flatnonzero(self.valid[:, self.tickers.index(ticker)])
+            return self._positions[ticker]
+
+    def _frame(self, values: np.ndarray, rows: np.ndarray | None = None) -> pd.DataFrame:
+        index = self.dates if rows is None else self.dates[rows]
+        return pd.DataFrame(values, index=index, columns=self.tickers, copy=False)
+
+    def prices(self, mode: str = "union") -> pd.DataFrame:
+        with self._lock:
+            cached = self._prices.get(mode)
+        if cached is not None:
+            return cached
+
+        if mode == "union":
+            frame = self._frame(self.values)
+        elif mode == "intersect":
+            rows = np.flatnonzero(self.valid.all(axis=1))
+            frame = self._frame(self.values[rows], rows)
+        elif mode == "ffill":
+            # Row of each ticker's last price at or before every union date
+            last = np.where(self.valid, np.arange(len(self.dates))[:, None], 0)
+            np.maximum.accumulate(last, axis=0, out=last)
+            frame = self._frame(self.values[last, np.arange(len(self.tickers))])
+        else:
+            raise ValueError(f"Invalid price alignment: {mode}")
+
+        with self._lock:
+            self._prices[mode] = frame
+        return frame
+
+    def returns(self, mode: str = "intersect") -> pd.DataFrame:
+        """Simple per-bar returns under `mode`; leading rows without a full set of returns are dropped."""
+        with self._lock:
+            cached = self._returns.get(mode)
+        if cached is not None:
+            return cached
+
+        if mode in ("intersect", "ffill"):
+            returns = self.prices(mode).pct_change().dropna()
+        elif mode == "pairwise":
+            values = np.full_like(self.values, np.nan)
+            for j, t in enumerate(self.tickers):
+                pos = self.positions(t)
+                values[pos[1:], j] = self.values[pos[1:], j] / self.values[pos[:-1], j] - 1
+            rows = np.flatnonzero(~np.isnan(values).all(axis=1))
+            returns = self._frame(values[rows], rows)
+        else:
+            raise ValueError(f"Invalid alignment: {mode}")
+
+        with self._lock:
+            self._returns[mode] = returns
+        return returns
+
+
+def _evict(keep: tuple) -> None:
+    # Sizes are re-measured on every call: entries grow as per-mode frames are
+    # derived after they were cached. The entry in use always stays.
+    total = sum(entry.nbytes() for entry in _ALIGN_CACHE.values())
+    while total > ALIGN_CACHE_MAX_BYTES and len(_ALIGN_CACHE) > 1:
+        key = next(iter(_ALIGN_CACHE))
+        if key == keep:
+            return
+        total -= _ALIGN_CACHE.pop(key).nbytes()
+
+
+def aligned(tickers: list[str], interval: str, data_version: str | None,
+            load: Callable[[], pd.DataFrame]) -> AlignedPrices:
+    """
+    Cached AlignedPrices for `tickers` (in the given column order). `load()`
+    returns their union-calendar price frame and is only called on a miss;
+    an unknown data version is never cached. The cache is bounded by
+    ALIGN_CACHE_MAX_BYTES, counting lazily derived frames too.
+    """
+    key = (tuple(tickers), interval, data_version)
+    if data_version is not None:
+        with _ALIGN_LOCK:
+            entry = _ALIGN_CACHE.get(key)
+            if entry is not None:
+                _ALIGN_CACHE.move_to_end(key)
+                _evict(keep=key)
+                return entry
+
+    entry = AlignedPrices(load())
+    if data_version is not None:
+        with _ALIGN_LOCK:
+            _ALIGN_CACHE[key] = entry
+            _evict(keep=key)
+    return entry
+
+
+def align_cache_stats() -> dict:
+    with _ALIGN_LOCK:
+        return {
+            "entries": len(_ALIGN_CACHE),
+            "bytes": sum(entry.nbytes() for entry in _ALIGN_CACHE.values()),
+            "max_bytes": ALIGN_CACHE_MAX_BYTES,
+        }
+
+
+def clear_align_cache() -> None:
+    with _ALIGN_LOCK:
+        _ALIGN_CACHE.clear()
@@ -1,19 +1,82 @@
-from scipy.cluster.hierarchy import linkage, leaves_list
+from scipy.cluster.hierarchy import linkage, leaves_list, optimal_leaf_ordering
 from scipy.spatial.distance import squareform
+from collections import OrderedDict
+from typing import Callable
+import threading
 import pandas as pd
 
-def cluster_matrix(matrix: pd.DataFrame) -> (pd.DataFrame, list):
-    if matrix.shape[0] <= 2:
-        return matrix, list(matrix.columns)
+# Linkage methods that are valid on a precomputed (1 - corr) distance matrix
+CLUSTER_METHODS = ("average", "complete", "single", "weighted")
+CLUSTER_CACHE_SIZE = 128  # Memoized orderings kept (LRU)
 
-    if (matrix.values >= -1).all() and (matrix.values <= 1).all():
-        dist = 1 - matrix
-    else:
-        dist = matrix.max().max() - matrix
+# (sorted tickers, window, data version, method) -> {"linkage", "dist", "order", "optimal_order"}
+_ORDER_CACHE = OrderedDict()
+_ORDER_LOCK = threading.Lock()
 
-    dist_condensed = squareform(dist.values, checks=False)
-    linkage_matrix = linkage(dist_condensed, method="average")
-    leaf_order = leaves_list(linkage_matrix)
 
-    reordered = matrix.iloc[leaf_order, leaf_order]
-    return reordered, list(reordered.columns)
+def _correlation_distance(corr: pd.DataFrame):
+    dist = (1 - corr.fillna(0)).clip(lower=0)
+    return squareform(dist.values, checks=False)
+
+
+def window_key(returns: pd.DataFrame, align: str) -> str:
+    """Cache key for the rows a heatmap covers: resolved first date and alignment mode."""
+    start = returns.index[0].isoformat() if len(returns) else None
+    return f"{start}@{align}"
+
+
+def canonical_order(
+    tickers: list[str],
+    window: str,
+    data_version: str | None,
+    correlation: Callable[[list[str]], pd.DataFrame],
+    method: str = "average",
+    optimal_ordering: bool = False,
+) -> list[str]:
+    """
+    Heatmap ordering for a ticker set, always derived from correlation so the
+    correlation and covariance heatmaps line up. `correlation(sorted_tickers)`
+    is only called on a cache miss; results are memoized per
+    (ticker set, window, data version, method). `window` identifies the rows
+    the correlation covers, e.g. the resolved first date: a range name alone
+    would keep serving yesterday's cutoff while the data version is unchanged. The optimal leaf ordering is
+    computed at most once per entry and reused.
+    """
+    if len(set(tickers)) <= 2:
+        return list(dict.fromkeys(tickers))
+
+    names = sorted(set(tickers))
+    key = (tuple(names), window, data_version, method)
+    with _ORDER_LOCK:
+        entry = _ORDER_CACHE.get(key) if data_version is not None else None
+        if entry is not None:
+            _ORDER_CACHE.move_to_end(key)
+
+    if entry is None:
+        dist = _correlation_distance(correlation(names).loc[names, names])
+        linkage_matrix = linkage(dist, method=method)
+        entry = {
+            "linkage": linkage_matrix,
+            "dist": dist,
+            "order": [names[i] for i in leaves_list(linkage_matrix)],
+            "optimal_order": None,
+        }
+        if data_version is not None:  # Unknown version: nothing safe to key on
+            with _ORDER_LOCK:
+                _ORDER_CACHE[key] = entry
+                while len(_ORDER_CACHE) > CLUSTER_CACHE_SIZE:
+                    _ORDER_CACHE.popitem(last=False)
+
+    if not optimal_ordering:
+        return entry["order"]
+
+    if entry["optimal_order"] is None:
+        # O(N^3): done once per cached linkage, then reused
+        ordered = optimal_leaf_ordering(entry["linkage"], entry["dist"])
+        entry["optimal_order"] = [names[i] for i in leaves_list(ordered)]
+    return entry["optimal_order"]
+
+
+def clear_order_cache() -> None:
+    with _ORDER_LOCK:
+        _ORDER_CACHE.clear()
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+BLOCK_SIZE = 512  # Columns per block: peak extra memory is BLOCK_SIZE x N float32
+MIN_OBSERVATIONS = 20  # Tickers with fewer returns in range are left out
+MAX_THRESHOLD_PAIRS = 100_000  # Hard cap on pairs returned in threshold mode
+SERIATION_ITERATIONS = 30
+
+
+def standardize(returns: pd.DataFrame) -> tuple[np.ndarray, list[str], list[str]]:
+    """
+    Centre and unit-normalise each return column as float32 so that Z.T @ Z is
+    the correlation matrix. Missing returns are mean-filled (they contribute 0
+    after centring), which approximates pairwise-complete correlation.
+    Returns (Z, kept tickers, dropped tickers).
+    """
+    counts = returns.notna().sum()
+    kept = [c for c in returns.columns if counts[c] >= MIN_OBSERVATIONS]
+    dropped = [c for c in returns.columns if counts[c] < MIN_OBSERVATIONS]
+
+    values = returns[kept].to_numpy(dtype=np.float32, copy=True)
+    mean = np.nanmean(values, axis=0) if len(values) else np.zeros(len(kept), dtype=np.float32)
+    values -= mean
+    np.nan_to_num(values, copy=False, nan=0.0)
+
+    norms = np.linalg.norm(values, axis=0)
+    norms[norms == 0] = np.inf  # Constant series: correlation 0 with everything
+    values /= norms
+    return values, kept, dropped
+
+
+def iter_correlation_blocks(z: np.ndarray, block_size: int = BLOCK_SIZE):
+    """Yield (start, block) where block = corr[start:start+B, :] computed from Z."""
+    n = z.shape[1]
+    for start in range(0, n, block_size):
+        yield start, z[:, start:start + block_size].T @ z
+
+
+def top_k_pairs(z: np.ndarray, tickers: list[str], k: int, block_size: int = BLOCK_SIZE) -> dict:
+    """Top-k most and least correlated partners for every ticker, without an N x N matrix."""
+    n = len(tickers)
+    k = min(k, n - 1)
+    result = {}
+    if k <= 0:
+        return {t: {"most": [], "least": []} for t in tickers}
+
+    for start, block in iter_correlation_blocks(z, block_size):
+        rows = np.arange(block.shape[0])
+        block[rows, start + rows] = np.nan  # Ignore self-correlation
+
+        high = np.where(np.isnan(block), -np.inf, block)
+        low = np.where(np.isnan(block), np.inf, block)
+        most = np.argpartition(-high, k - 1, axis=1)[:, :k]
+        least = np.argpartition(low, k - 1, axis=1)[:, :k]
+
+        for r in rows:
+            m = most[r][np.argsort(-block[r, most[r]])]
+            l = least[r][np.argsort(block[r, least[r]])]
+            result[tickers[start + r]] = {
+                "most": [{"ticker": tickers[j], "corr": float(block[r, j])} for j in m],
+                "least": [{"ticker": tickers[j], "corr": float(block[r, j])} for j in l],
+            }
+    return result
+
+
+def threshold_pairs(z: np.ndarray, tickers: list[str], threshold: float,
+                    absolute: bool = False, block_size: int = BLOCK_SIZE) -> tuple[list[dict], bool]:
+    """
+    Unique pairs (i < j) with corr >= threshold (or |corr| >= threshold),
+    strongest first. Returns (pairs, truncated). Past MAX_THRESHOLD_PAIRS only
+    the strongest are kept: candidates from each block are merged with the
+    current best and cut back with np.argpartition, so memory stays bounded.
+    """
+    rows = np.empty(0, dtype=np.int64)
+    cols = np.empty(0, dtype=np.int64)
+    corrs = np.empty(0, dtype=np.float32)
+    truncated = False
+    for start, block in iter_correlation_blocks(z, block_size):
+        scores = np.abs(block) if absolute else block
+        r, c = np.nonzero(scores >= threshold)
+        keep = c > start + r  # Upper triangle only, also drops the diagonal
+        r, c = r[keep], c[keep]
+
+        rows = np.concatenate([rows, start + r])
+        cols = np.concatenate([cols, c])
+        corrs = np.concatenate([corrs, block[r, c]])
+        if len(corrs) > MAX_THRESHOLD_PAIRS:
+            truncated = True
+            strength = np.abs(corrs) if absolute else corrs
+            best = np.argpartition(-strength, MAX_THRESHOLD_PAIRS - 1)[:MAX_THRESHOLD_PAIRS]
+            rows, cols, corrs = rows[best], cols[best], corrs[best]
+
+    strength = np.abs(corrs) if absolute else corrs
+    order = np.argsort(-strength, kind="stable")
+    pairs = [
+        {"a": tickers[i], "b": tickers[j], "corr": float(v)}
+        for i, j, v in zip(rows[order].tolist(), cols[order].tolist(), corrs[order].tolist())
+    ]
+    return pairs, truncated
+
+
+def approximate_order(z: np.ndarray, iterations: int = SERIATION_ITERATIONS, seed: int = 0) -> np.ndarray:
+    """
+    Approximate seriation for large N: angular ordering on the two leading
+    eigenvectors of the correlation matrix, found by block power iteration
+    using only Z (corr @ V = Z.T @ (Z @ V)), so O(T * N) per iteration.
+    """
+    n = z.shape[1]
+    if n <= 2:
+        return np.arange(n)
+
+    rng = np.random.default_rng(seed)
+    v = rng.standard_normal((n, 2)).astype(np.float32)
+    for _ in range(iterations):
+        v, _ = np.linalg.qr(z.T @ (z @ v))
+
+    # Fix eigenvector signs so the ordering is deterministic
+    v *= np.sign(v.sum(axis=0, keepdims=True) + 1e-12)
+    angles = np.arctan2(v[:, 1], v[:, 0])
+    return np.argsort(angles, kind="stable")
@@ -0,0 +1,102 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+FACTOR_CACHE_SIZE = 64  # Fitted models kept (LRU)
+OVERSAMPLES = 10
+POWER_ITERATIONS = 4
+
+# (sorted tickers, window start date, data version, k) -> fitted model dict
+_MODEL_CACHE = OrderedDict()
+_MODEL_LOCK = threading.Lock()
+
+
+def randomized_svd(x: np.ndarray, k: int, oversamples: int = OVERSAMPLES,
+                   n_iter: int = POWER_ITERATIONS, seed: int = 0):
+    """
+    Truncated SVD of x (T x N) via random range finding with power iterations
+    (Halko, Martinsson & Tropp). Costs O(T * N * (k + oversamples)) instead of
+    a full O(T * N * min(T, N)) decomposition.
+    """
+    rng = np.random.default_rng(seed)
+    rank = min(k + oversamples, *x.shape)
+    q, _ = np.linalg.qr(x @ rng.standard_normal((x.shape[1], rank)))
+    for _ in range(n_iter):
+        # Re-orthonormalise each half-step to keep small singular values accurate
+        q, _ = np.linalg.qr(x.T @ q)
+        q, _ = np.linalg.qr(x @ q)
+
+    u_small, s, vt = np.linalg.svd(q.T @ x, full_matrices=False)
+    return (q @ u_small)[:, :k], s[:k], vt[:k]
+
+
+def fit_factor_model(returns: pd.DataFrame, k: int) -> dict:
+    """
+    Statistical (PCA) factor model of daily returns: loadings B (N x k), factor
+    variances and per-asset idiosyncratic variances, all annualised.
+    """
+    x = returns.to_numpy(dtype=np.float64)
+    t_len = x.shape[0]
+    x = x - x.mean(axis=0)
+    k = max(1, min(k, *x.shape))
+
+    _, s, vt = randomized_svd(x, k)
+    loadings = vt.T  # N x k, orthonormal columns
+    loadings *= np.where(loadings.sum(axis=0) < 0, -1.0, 1.0)  # Deterministic signs
+
+    factor_var = s ** 2 / (t_len - 1)  # Variance of each factor's returns
+    asset_var = (x ** 2).sum(axis=0) / (t_len - 1)
+    specific_var = np.clip(asset_var - (loadings ** 2) @ factor_var, 0.0, None)
+
+    return {
+        "tickers": list(returns.columns),
+        "loadings": loadings,
+        "factor_var": factor_var * 252,
+        "specific_var": specific_var * 252,
+        "explained_variance_ratio": factor_var / asset_var.sum() if asset_var.sum() > 0 else np.zeros_like(factor_var),
+        "observations": t_len,
+    }
+
+
+def cached_factor_model(tickers: list[str], start: str, data_version: str | None, k: int, returns) -> dict:
+    """
+    Memoized fit per (universe, window start, data version, k); `returns()` is
+    only called on a miss. Keyed on the resolved start date rather than the
+    range label, whose cutoff moves every day.
+    """
+    key = (tuple(sorted(set(tickers))), start, data_version, k)
+    if data_version is not None:
+        with _MODEL_LOCK:
+            model = _MODEL_CACHE.get(key)
+            if model is not None:
+                _MODEL_CACHE.move_to_end(key)
+                return model
+
+    model = fit_factor_model(returns(list(key[0])), k)
+    if data_version is not None:
+        with _MODEL_LOCK:
+            _MODEL_CACHE[key] = model
+            while len(_MODEL_CACHE) > FACTOR_CACHE_SIZE:
+                _MODEL_CACHE.popitem(last=False)
+    return model
+
+
+def portfolio_risk(model: dict, weights: dict[str, float]) -> dict:
+    """Split annualised portfolio variance into factor and idiosyncratic parts. O(N * k)."""
+    w = np.array([weights.get(t, 0.0) for t in model["tickers"]], dtype=np.float64)
+    exposures = model["loadings"].T @ w  # k
+    contributions = exposures ** 2 * model["factor_var"]
+    factor_var = float(contributions.sum())
+    specific_var = float((w ** 2) @ model["specific_var"])
+    total_var = factor_var + specific_var
+
+    return {
+        "total_vol": np.sqrt(total_var) * 100,
+        "factor_vol": np.sqrt(factor_var) * 100,
+        "idiosyncratic_vol": np.sqrt(specific_var) * 100,
+        "factor_share": factor_var / total_var if total_var > 0 else None,
+        "exposures": exposures.tolist(),
+        "factor_contributions": (contributions / total_var).tolist() if total_var > 0 else [0.0] * len(exposures),
+    }
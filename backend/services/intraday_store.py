@@ -0,0 +1,220 @@
+import json
+import logging
+import os
+import threading
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from utils.helpers import INTERVALS, INTERVAL_SOURCES, EXCHANGE_SESSIONS, bars_per_day, get_ticker_exchange_code
+
+logger = logging.getLogger(__name__)
+
+INTRADAY_DIR = os.path.join("cache", "intraday")
+INTRADAY_EXPIRY_MINUTES = 15
+
+# Longest history Yahoo serves per source interval; stored partitions that
+# lie entirely before it are pruned (they could never be re-downloaded anyway)
+SOURCE_PERIODS = {"1m": "7d", "5m": "60d", "1h": "730d"}
+
+OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+
+_STORE_LOCK = threading.RLock()
+
+
+# ----- chunked on-disk store: INTRADAY_DIR/<interval>/<ticker>/<YYYY-MM>.pkl -----
+def _ticker_dir(ticker: str, interval: str) -> str:
+    return os.path.join(INTRADAY_DIR, interval, quote(ticker, safe=""))
+
+
+def _meta_path(ticker: str, interval: str) -> str:
+    return os.path.join(_ticker_dir(ticker, interval), "meta.json")
+
+
+def read_meta(ticker: str, interval: str) -> dict | None:
+    try:
+        with open(_meta_path(ticker, interval), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _partition_key(ts: pd.Timestamp) -> str:
+    return ts.strftime("%Y-%m")
+
+
+def load_bars(ticker: str, interval: str, start: pd.Timestamp | None = None) -> pd.DataFrame:
+    """Stored OHLCV bars (UTC, tz-naive index); only partitions from `start`'s month are read."""
+    directory = _ticker_dir(ticker, interval)
+    if not os.path.isdir(directory):
+        return pd.DataFrame(columns=OHLCV)
+
+    first = _partition_key(start) if start is not None else None
+    parts = sorted(name for name in os.listdir(directory) if name.endswith(".pkl"))
+    frames = [pd.read_pickle(os.path.join(directory, name)) for name in parts if first is None or name[:7] >= first]
+    if not frames:
+        return pd.DataFrame(columns=OHLCV)
+
+    bars = pd.concat(frames)
+    return bars.loc[bars.index >= start] if start is not None else bars
+
+
+def store_bars(ticker: str, interval: str, bars: pd.DataFrame) -> None:
+    """Merge bars into their monthly partitions; only touched partitions are rewritten."""
+    directory = _ticker_dir(ticker, interval)
+    os.makedirs(directory, exist_ok=True)
+
+    with _STORE_LOCK:
+        for key, chunk in bars.groupby(bars.index.strftime("%Y-%m")):
+            path = os.path.join(directory, f"{key}.pkl")
+            if os.path.exists(path):
+                existing = pd.read_pickle(path)
+                chunk = pd.concat([existing[~existing.index.isin(chunk.index)], chunk]).sort_index()
+            tmp = f"{path}.{os.getpid()}.tmp"
+            chunk.to_pickle(tmp)
+            os.replace(tmp, path)
+
+        meta = {
+            "last_updated": pd.Timestamp.now(tz="UTC").isoformat(),
+            "last_bar": bars.index[-1].isoformat() if len(bars) else None,
+        }
+        with open(_meta_path(ticker, interval), "w") as f:
+            json.dump(meta, f)
+
+
+def _retention_days(source: str) -> int:
+    return int(SOURCE_PERIODS[source].rstrip("d"))
+
+
+def history_bars(interval: str, exchange: str = "NYSE") -> int | None:
+    """Most bars of `interval` the store can hold for `exchange` (None: daily, full history)."""
+    source = INTERVAL_SOURCES[interval]
+    if source not in SOURCE_PERIODS:
+        return None
+    # Retention is in calendar days; roughly 5 in 7 are trading days
+    return _retention_days(source) * 5 // 7 * bars_per_day(interval, exchange)
+
+
+def prune_partitions(ticker: str, interval: str, now: pd.Timestamp | None = None) -> list[str]:
+    """Delete monthly partitions that end before the source's retention window. Returns their keys."""
+    directory = _ticker_dir(ticker, interval)
+    if not os.path.isdir(directory):
+        return []
+
+    now = now if now is not None else pd.Timestamp.now(tz="UTC").tz_localize(None)
+    oldest = _partition_key(now - pd.Timedelta(days=_retention_days(interval)))
+    pruned = []
+    with _STORE_LOCK:
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".pkl") and name[:7] < oldest:
+                os.remove(os.path.join(directory, name))
+                pruned.append(name[:7])
+    if pruned:
+        logger.info("Pruned intraday partitions | ticker=%s | interval=%s | months=%s", ticker, interval, pruned)
+    return pruned
+
+
+# ----- resampling -----
+DAY_NS = pd.Timedelta(days=1).value
+
+
+def resample_ohlc(bars: pd.DataFrame, interval: str, exchange: str = "NYSE") -> pd.DataFrame:
+    """
+    OHLC-aware downsampling of sorted bars (UTC, tz-naive) to a coarser
+    intraday interval in one pass. Buckets are anchored at `exchange`'s
+    session open in its local time (a 30m LSE bar starts at 08:00 / 08:30
+    London, DST included) and never cross local midnight; first/max/min/last/sum
+    per bucket come from np.*.reduceat on the bucket starts.
+    """
+    if bars.empty:
+        return bars
+
+    tz, open_time, _ = EXCHANGE_SESSIONS.get(exchange, EXCHANGE_SESSIONS["NYSE"])
+    width = pd.Timedelta(interval).value
+    session_open = pd.Timedelta(f"{open_time}:00").value
+
+    # Local wall-clock nanoseconds, so the open falls at the same offset every day
+    local = bars.index.tz_localize("UTC").tz_convert(tz).tz_localize(None)
+    wall = local.values.astype("datetime64[ns]").view("int64")
+    anchor = wall // DAY_NS * DAY_NS + session_open
+    buckets = anchor + (wall - anchor) // width * width  # Local bucket start
+
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(buckets)) + 1])
+    ends = np.concatenate([starts[1:], [len(bars)]]) - 1
+
+    labels = (pd.DatetimeIndex(buckets[starts].astype("datetime64[ns]"))
+              .tz_localize(tz, ambiguous=False, nonexistent="shift_forward")
+              .tz_convert("UTC").tz_localize(None))
+    out = pd.DataFrame({
+        "Open": bars["Open"].to_numpy()[starts],
+        "High": np.maximum.reduceat(bars["High"].to_numpy(), starts),
+        "Low": np.minimum.reduceat(bars["Low"].to_numpy(), starts),
+        "Close": bars["Close"].to_numpy()[ends],
+        "Volume": np.add.reduceat(bars["Volume"].to_numpy(), starts),
+    }, index=labels.rename(bars.index.name).as_unit(bars.index.unit))
+    return out
+
+
+# ----- download + freshness -----
+def is_stale(ticker: str, source: str) -> bool:
+    meta = read_meta(ticker, source)
+    if meta is None:
+        return True
+    age = pd.Timestamp.now(tz="UTC") - pd.Timestamp(meta["last_updated"])
+    return age > pd.Timedelta(minutes=INTRADAY_EXPIRY_MINUTES)
+
+
+def refresh_bars(tickers: list[str], source: str) -> None:
+    """Download the longest available window of `source` bars in one call and merge it into the store."""
+    if not tickers:
+        return
+    fetched = yf.download(
+        tickers, period=SOURCE_PERIODS[source], interval=source,
+        auto_adjust=True, progress=False, threads=True
+    )
+    for t in tickers:
+        # Assumes fetched has a (field, ticker) MultiIndex like the daily download
+        bars = pd.DataFrame({field: fetched[field][t] for field in OHLCV}).dropna(subset=["Close"])
+        if bars.empty:
+            continue
+        if bars.index.tz is not None:
+            bars.index = bars.index.tz_convert("UTC").tz_localize(None)  # One clock for mixed exchanges
+        store_bars(t, source, bars)
+        prune_partitions(t, source)
+
+
+def fetch_intraday_prices(tickers: list[str], interval: str, start: pd.Timestamp | None = None) -> pd.DataFrame:
+    """
+    Aligned Close frame for intraday `interval`, same shape as fetch_stock_data's
+    daily frame. Only partitions from `start` on are read (None: all stored bars).
+    """
+    if interval not in INTERVALS or interval == "1d":
+        raise ValueError(f"Invalid intraday interval: {interval}")
+
+    source = INTERVAL_SOURCES[interval]
+    refresh_bars([t for t in tickers if is_stale(t, source)], source)
+
+    closes = []
+    for t in tickers:
+        bars = load_bars(t, source, start)
+        if interval != source:
+            bars = resample_ohlc(bars, interval, get_ticker_exchange_code(t))
+        closes.append(bars["Close"].astype(np.float64))
+
+    combined = pd.concat(closes, axis=1, sort=True)
+    combined.columns = tickers
+    return combined
+
+
+def data_version(tickers: list[str], interval: str) -> str | None:
+    """Version token for the stored bars behind `tickers` at `interval` (None if missing or stale)."""
+    source = INTERVAL_SOURCES[interval]
+    parts = []
+    for t in sorted(set(tickers)):
+        meta = read_meta(t, source)
+        if meta is None or is_stale(t, source):
+            return None
+        parts.append(f"{t}@{interval}:{meta['last_updated']}:{meta['last_bar']}")
+    return "|".join(parts)
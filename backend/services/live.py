@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from services import stocks
+from utils.helpers import ROLLING_WINDOWS
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = 60  # How often the shared feed checks the cache for new bars
+SUBSCRIBER_QUEUE_SIZE = 100  # Deltas buffered per subscriber before old ones are dropped
+
+
+class RollingWindowStats:
+    """Rolling mean / sample std over the last `window` values with O(1) updates."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, x: float) -> None:
+        self.values.append(x)
+        self.total += x
+        self.total_sq += x * x
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            self.total -= old
+            self.total_sq -= old * old
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.window
+
+    def std(self) -> float | None:
+        n = len(self.values)
+        if n < self.window or n < 2:
+            return None  # Same as pandas rolling(window): no value until the window is full
+        var = (self.total_sq - self.total * self.total / n) / (n - 1)
+        return math.sqrt(max(var, 0.0))
+
+
+class PortfolioLiveState:
+    """
+    Incrementally maintained portfolio metrics (daily-rebalanced weights, as in
+    /portfolio_metrics): rolling volatility per window, cumulative value,
+    running peak, drawdown and max drawdown. Each new bar costs O(stocks + windows).
+    """
+
+    def __init__(self, stocks: list[str], weights: np.ndarray, rolling: list[str]):
+        self.stocks = stocks
+        self.weights = weights
+        self.rolling = rolling
+        self.windows = {r: RollingWindowStats(ROLLING_WINDOWS[r]) for r in rolling}
+        self.last_prices = None
+        self.last_date = None
+        self.cumulative = 1.0
+        self.peak = 1.0
+        self.max_drawdown = 0.0
+        self.last_return = None
+
+    def seed(self, prices: pd.DataFrame) -> None:
+        """Replay history once to build the rolling state (O(T))."""
+        aligned = prices[self.stocks].dropna()
+        for date, row in zip(aligned.index, aligned.to_numpy(dtype=np.float64)):
+            self.on_bar(date, row)
+
+    def on_bar(self, date: pd.Timestamp, prices: np.ndarray) -> dict | None:
+        if self.last_prices is None:
+            self.last_prices, self.last_date = prices, date
+            return None
+
+        portfolio_return = float(np.dot(prices / self.last_prices - 1, self.weights))
+        self.last_prices, self.last_date = prices, date
+        self.last_return = portfolio_return
+
+        for stats in self.windows.values():
+            stats.push(portfolio_return)
+
+        self.cumulative *= 1 + portfolio_return
+        self.peak = max(self.peak, self.cumulative)
+        drawdown = (self.cumulative - self.peak) / self.peak
+        self.max_drawdown = min(self.max_drawdown, drawdown)
+        return self.snapshot()
+
+    def snapshot(self) -> dict:
+        vol = {}
+        for roll, stats in self.windows.items():
+            std = stats.std()
+            vol[roll] = std * np.sqrt(252) * 100 if std is not None else None
+
+        return {
+            "date": self.last_date.strftime("%Y-%m-%d") if self.last_date is not None else None,
+            "return": self.last_return * 100 if self.last_return is not None else None,
+            "vol": vol,
+            "cumulative_return": (self.cumulative - 1) * 100,
+            "drawdown": (self.cumulative - self.peak) / self.peak * 100,
+            "max_drawdown": self.max_drawdown * 100,
+        }
+
+
+class Subscription:
+    """One websocket client: its portfolio state plus the bars still waiting for all its tickers."""
+
+    def __init__(self, state: PortfolioLiveState):
+        self.state = state
+        self.tickers = list(state.stocks)
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._pending = {}  # date -> {ticker: price}
+
+    def on_ticker_bar(self, ticker: str, date: pd.Timestamp, price: float) -> None:
+        if self.state.last_date is not None and date <= self.state.last_date:
+            return
+        self._pending.setdefault(date, {})[ticker] = price
+
+        # Process complete dates in order (mixed calendars: only dates all tickers traded)
+        for d in sorted(self._pending):
+            bar = self._pending[d]
+            if len(bar) < len(self.tickers):
+                continue
+            del self._pending[d]
+            if self.state.last_date is not None and d <= self.state.last_date:
+                continue
+            delta = self.state.on_bar(d, np.array([bar[t] for t in self.tickers], dtype=np.float64))
+            if delta is not None:
+                if self.queue.full():
+                    self.queue.get_nowait()  # Slow consumer: drop the oldest delta
+                self.queue.put_nowait({"type": "delta", **delta})
+
+        # Dates some ticker never traded on can never complete
+        if self.state.last_date is not None:
+            for d in [d for d in self._pending if d <= self.state.last_date]:
+                del self._pending[d]
+
+
+class FeedHub:
+    """
+    Shared per-ticker bar feed. Each subscribed ticker is polled once per tick
+    no matter how many subscriptions hold it; new bars fan out to every
+    subscription on that ticker.
+    """
+
+    def __init__(self):
+        self._subscribers = {}  # ticker -> set[Subscription]
+        self._last_date = {}  # ticker -> last bar date seen by the feed
+        self._task = None
+
+    def subscribe(self, sub: Subscription) -> None:
+        for t in sub.tickers:
+            self._subscribers.setdefault(t, set()).add(sub)
+            if t not in self._last_date and sub.state.last_date is not None:
+                self._last_date[t] = sub.state.last_date
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        for t in sub.tickers:
+            subs = self._subscribers.get(t)
+            if subs is None:
+                continue
+            subs.discard(sub)
+            if not subs:
+                del self._subscribers[t]
+                self._last_date.pop(t, None)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def feeds(self) -> dict:
+        return {t: len(subs) for t, subs in self._subscribers.items()}
+
+    async def poll_once(self) -> None:
+        tickers = list(self._subscribers)
+        if not tickers:
+            return
+        # One cache read per ticker (the warmer keeps the cache fresh)
+        prices = await asyncio.to_thread(stocks.fetch_stock_data, tickers)
+        for t in tickers:
+            series = prices[t].dropna()
+            last = self._last_date.get(t)
+            new = series if last is None else series[series.index > last]
+            if new.empty:
+                continue
+            self._last_date[t] = new.index[-1]
+            for sub in list(self._subscribers.get(t, ())):
+                for date, price in new.items():
+                    sub.on_ticker_bar(t, date, float(price))
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(POLL_SECONDS)
+            try:
+                await self.poll_once()
+            except Exception:
+                logger.exception("Live feed poll failed")
+
+
+feed_hub = FeedHub()
@@ -0,0 +1,33 @@
+import pandas as pd
+
+from utils.helpers import ROLLING_WINDOWS, window_bars, annualization_factor
+
+
+def materialize(series: pd.Series, interval: str = "1d", exchange: str = "NYSE") -> dict:
+    """
+    Per-ticker derived series that only depend on the ticker's own Close history.
+    Computed once when the ticker is (re)fetched and stored next to its prices,
+    so single-stock metric routes can answer with an index slice. Windows are in
+    trading days and are converted to bars of `interval` on `exchange`'s session.
+    """
+    returns = series.pct_change().dropna()
+    running_peak = series.cummax()
+
+    volatility = {}
+    rolling_drawdown = {}
+    for roll in ROLLING_WINDOWS:
+        N = window_bars(roll, interval, exchange)
+        # Annualised rolling volatility in %, same definition as /volatility
+        volatility[roll] = returns.rolling(window=N).std() * annualization_factor(interval, exchange) * 100
+
+        # Drawdown from the rolling N-row peak, same definition as /rolling_drawdown
+        rolling_peak = series.rolling(window=N, min_periods=1).max()
+        rolling_drawdown[roll] = (series - rolling_peak) / rolling_peak
+
+    return {
+        "returns": returns,
+        "volatility": volatility,
+        "rolling_drawdown": rolling_drawdown,
+        "running_peak": running_peak,
+        "drawdown": (series - running_peak) / running_peak,
+    }
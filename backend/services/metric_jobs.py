@@ -0,0 +1,16 @@
+import pandas as pd
+
+# CPU-bound metric kernels run through services/offload.run_frame_job.
+# Module-level and free of app state so process-pool workers can import them.
+
+
+def max_drawdowns(prices: pd.DataFrame) -> dict[str, float]:
+    """Most negative drawdown from the running peak per column (NaNs skipped per ticker)."""
+    max_drawdown = {}
+    for stock in prices.columns:
+        series = prices[stock].dropna()
+        peak = series.expanding(min_periods=1).max()
+        drawdown = (series - peak) / peak
+        max_drawdown[stock] = float(drawdown.min())  # most negative value = max drawdown
+    return max_drawdown
+
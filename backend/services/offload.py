@@ -0,0 +1,87 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+OFFLOAD_ENABLED = True
+OFFLOAD_MIN_CELLS = 2_000_000  # Frames smaller than rows x cols run inline (IPC would cost more than it saves)
+PROCESS_POOL_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+# Never fork the multithreaded server: a child could inherit a lock (price cache,
+# logging) held by another thread at fork time and deadlock on first use.
+PROCESS_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(
+                max_workers=PROCESS_POOL_WORKERS,
+                mp_context=multiprocessing.get_context(PROCESS_START_METHOD),
+            )
+            logger.info("Started metric process pool | workers=%d | start=%s",
+                        PROCESS_POOL_WORKERS, PROCESS_START_METHOD)
+        return _POOL
+
+
+def shutdown() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(cancel_futures=True)
+            _POOL = None
+
+
+atexit.register(shutdown)
+
+
+def _run_shared(func: Callable, shm_name: str, shape: tuple, dtype: str,
+                index: pd.Index, columns: list, args: tuple):
+    # Worker side: map the parent's block and wrap it without copying
+    shm = shared_memory.SharedMemory(name=shm_name)
+    values = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    try:
+        return func(pd.DataFrame(values, index=index, columns=columns, copy=False), *args)
+    finally:
+        del values  # Drop the view before closing the mapping
+        shm.close()
+
+
+def should_offload(frame: pd.DataFrame) -> bool:
+    return OFFLOAD_ENABLED and frame.size >= OFFLOAD_MIN_CELLS
+
+
+def run_frame_job(func: Callable, frame: pd.DataFrame, *args):
+    """
+    Run `func(frame, *args)` inline for small frames, or in the process pool
+    for large ones. Offloaded frames travel as one float64 shared-memory block
+    (only the index, column labels and result are pickled), so CPU-bound
+    Python loops in `func` run on another core without holding this GIL.
+    `func` must be a module-level function and `frame` all-numeric.
+    """
+    if not should_offload(frame):
+        return func(frame, *args)
+
+    values = np.ascontiguousarray(frame.to_numpy(dtype=np.float64))
+    shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    try:
+        np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[:] = values
+        future = _pool().submit(
+            _run_shared, func, shm.name, values.shape, values.dtype.str, frame.index, list(frame.columns), args
+        )
+        return future.result()
+    finally:
+        shm.close()
+        shm.unlink()
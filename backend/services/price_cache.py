@@ -0,0 +1,307 @@
+import json
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from urllib.parse import quote
+
+import pandas as pd
+
+try:
+    import fcntl  # POSIX only; elsewhere index merges are not serialised across processes
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def entry_bytes(value) -> int:
+    """Approximate resident size of a cache entry (pandas/NumPy payloads, recursively)."""
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=False))
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sum(entry_bytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(entry_bytes(v) for v in value)
+    return 0
+
+
+class PriceCache(MutableMapping):
+    """
+    Size-aware ticker -> entry cache with a resident byte budget.
+
+    Every entry is written through to a per-ticker pickle under `directory`, so
+    evicting it from memory is free; a later lookup reloads it transparently.
+    Lightweight metadata (last_updated / last_date) stays in memory for every
+    known ticker, so expiry checks and data versions never touch the disk.
+    The store is opened on first use, so a process that never uses the cache
+    (a shared-panel reader) never reads or creates it.
+
+    index.json is rewritten once per write batch (see batch()), under a file
+    lock and merged with what other processes wrote since it was last read.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, policy: str = "lru"):
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"Unknown eviction policy '{policy}'")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.policy = policy
+
+        self._resident = OrderedDict()  # ticker -> entry, in LRU order (oldest first)
+        self._sizes = {}  # ticker -> resident bytes
+        self._uses = {}  # ticker -> access count (LFU)
+        self._known = None  # ticker -> {"last_updated", "last_date"} for resident + spilled (lazy)
+        self._dirty = set()  # Tickers written / deleted here since the last index flush
+        self._batch_depth = 0
+        self._lock = threading.RLock()
+
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.reloads = 0
+
+        self._index_file = os.path.join(directory, "index.json")
+        self._index_lock_file = os.path.join(directory, "index.lock")
+
+    # ----- on-disk store -----
+    @property
+    def _meta(self) -> dict:
+        if self._known is None:
+            with self._lock:
+                if self._known is None:
+                    os.makedirs(self.directory, exist_ok=True)
+                    self._known = self._load_index()
+        return self._known
+
+    def _path(self, ticker: str) -> str:
+        return os.path.join(self.directory, quote(ticker, safe="") + ".pkl")
+
+    def _read_index(self) -> dict:
+        try:
+            with open(self._index_file, "r") as f:
+                raw = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+        return {
+            t: {
+                "last_updated": pd.Timestamp(m["last_updated"]),
+                "last_date": pd.Timestamp(m["last_date"]) if m["last_date"] else None,
+            }
+            for t, m in raw.items()
+        }
+
+    def _load_index(self) -> dict:
+        return {t: m for t, m in self._read_index().items() if os.path.exists(self._path(t))}
+
+    @contextmanager
+    def _index_lock(self):
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(self._index_lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)  # Releases the lock
+
+    def flush(self) -> None:
+        """
+        Write index.json: the on-disk index (entries other processes added or
+        refreshed are adopted here too) updated with this process's writes and
+        deletes since the last flush.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            meta = self._meta
+            with self._index_lock():
+                merged = self._read_index()
+                for t, m in merged.items():
+                    if t in self._dirty or not os.path.exists(self._path(t)):
+                        continue
+                    ours = meta.get(t)
+                    if ours is None or m["last_updated"] > ours["last_updated"]:
+                        meta[t] = m
+                        if ours is not None and t in self._resident:
+                            # Another process refreshed it: drop our copy, reload on next use
+                            self._resident.pop(t)
+                            self.resident_bytes -= self._sizes.pop(t)
+                for t in self._dirty:
+                    if t in meta:
+                        merged[t] = meta[t]
+                    else:
+                        merged.pop(t, None)
+
+                raw = {
+                    t: {
+                        "last_updated": m["last_updated"].isoformat(),
+                        "last_date": m["last_date"].isoformat() if m["last_date"] is not None else None,
+                    }
+                    for t, m in merged.items()
+                }
+                tmp = f"{self._index_file}.{os.getpid()}.tmp"
+                with open(tmp, "w") as f:
+                    json.dump(raw, f)
+                os.replace(tmp, self._index_file)
+            self._dirty.clear()
+
+    @contextmanager
+    def batch(self):
+        """Defer index writes for a bulk update (one flush at the end instead of one per entry)."""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.flush()
+
+    def _changed(self, ticker: str) -> None:
+        self._dirty.add(ticker)
+        if self._batch_depth == 0:
+            self.flush()
+
+    def _write_entry(self, ticker: str, entry: dict) -> None:
+        path = self._path(ticker)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(entry, f)
+        os.replace(tmp, path)
+
+    def _read_entry(self, ticker: str) -> dict:
+        try:
+            with open(self._path(ticker), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            # Spilled pickle removed behind our back: forget the ticker so callers refetch it
+            with self._lock:
+                if self._meta.pop(ticker, None) is not None:
+                    logger.warning("Price cache entry for %s missing on disk; dropped", ticker)
+                    self._changed(ticker)
+            raise KeyError(ticker) from None
+
+    # ----- residency -----
+    def _touch(self, ticker: str) -> None:
+        self._resident.move_to_end(ticker)
+        self._uses[ticker] = self._uses.get(ticker, 0) + 1
+
+    def _admit(self, ticker: str, entry: dict) -> None:
+        if ticker in self._resident:
+            self.resident_bytes -= self._sizes[ticker]
+        self._resident[ticker] = entry
+        self._sizes[ticker] = entry_bytes(entry)
+        self.resident_bytes += self._sizes[ticker]
+        self._touch(ticker)
+        self._evict(keep=ticker)
+
+    def _victim(self, keep: str) -> str | None:
+        candidates = [t for t in self._resident if t != keep]
+        if not candidates:
+            return None
+        if self.policy == "lfu":
+            # Least used first; OrderedDict order breaks ties by recency
+            return min(candidates, key=lambda t: self._uses.get(t, 0))
+        return candidates[0]
+
+    def _evict(self, keep: str) -> None:
+        # The entry just admitted always stays, even if it alone exceeds the budget
+        while self.resident_bytes > self.max_bytes:
+            victim = self._victim(keep)
+            if victim is None:
+                return
+            self._resident.pop(victim)  # Already on disk (write-through)
+            self.resident_bytes -= self._sizes.pop(victim)
+            self.evictions += 1
+            logger.debug("Evicted %s from price cache | resident_bytes=%d", victim, self.resident_bytes)
+
+    # ----- mapping interface -----
+    def __getitem__(self, ticker: str) -> dict:
+        with self._lock:
+            if ticker in self._resident:
+                self.hits += 1
+                self._touch(ticker)
+                return self._resident[ticker]
+
+            self.misses += 1
+            if ticker not in self._meta:
+                raise KeyError(ticker)
+
+            entry = self._read_entry(ticker)
+            self.reloads += 1
+            self._admit(ticker, entry)
+            return entry
+
+    def __setitem__(self, ticker: str, entry: dict) -> None:
+        with self._lock:
+            meta = self._meta  # Opens the store (directory + index) on first write
+            self._write_entry(ticker, entry)
+            data = entry["data"]
+            meta[ticker] = {
+                "last_updated": entry["last_updated"],
+                "last_date": data.index[-1] if len(data) else None,
+            }
+            self._changed(ticker)
+            self._admit(ticker, entry)
+
+    def __delitem__(self, ticker: str) -> None:
+        with self._lock:
+            if ticker not in self._meta:
+                raise KeyError(ticker)
+            if ticker in self._resident:
+                self._resident.pop(ticker)
+                self.resident_bytes -= self._sizes.pop(ticker)
+            self._uses.pop(ticker, None)
+            del self._meta[ticker]
+            self._changed(ticker)
+            try:
+                os.remove(self._path(ticker))
+            except FileNotFoundError:
+                pass
+
+    def __contains__(self, ticker) -> bool:
+        return ticker in self._meta
+
+    def __iter__(self):
+        return iter(list(self._meta))
+
+    def __len__(self) -> int:
+        return len(self._meta)
+
+    def meta(self, ticker: str) -> dict | None:
+        """last_updated / last_date for a known ticker without loading its data."""
+        return self._meta.get(ticker)
+
+    def peek(self, ticker: str) -> dict:
+        """Read an entry without changing residency or statistics (bulk export)."""
+        with self._lock:
+            if ticker in self._resident:
+                return self._resident[ticker]
+        return self._read_entry(ticker)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "policy": self.policy,
+                "max_bytes": self.max_bytes,
+                "resident_bytes": self.resident_bytes,
+                "resident_tickers": len(self._resident),
+                "known_tickers": len(self._known) if self._known is not None else None,  # None: store not opened
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+                "reloads": self.reloads,
+            }
@@ -0,0 +1,117 @@
+import numpy as np
+
+TIME_CHUNK = 512  # Output rows per chunk (at most)
+CHUNK_BYTES = 64 * 1024 * 1024  # Pairwise mode: budget for the chunk x N x N float64 temporaries
+
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """Sliding sums over `window` rows via a cumulative sum: out[t] = sum(values[t:t+window])."""
+    csum = np.cumsum(values, axis=0, dtype=np.float64)
+    csum = np.concatenate([np.zeros((1,) + values.shape[1:]), csum])
+    return csum[window:] - csum[:-window]
+
+
+def _corr_from_moments(n: int, sxy, sx, sy, sxx, syy):
+    cov = n * sxy - sx * sy
+    var = (n * sxx - sx ** 2) * (n * syy - sy ** 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = cov / np.sqrt(var)
+    return np.clip(corr, -1.0, 1.0)
+
+
+def _pairwise_chunk(n: int) -> int:
+    # Sliding sums and the correlation step each hold a few chunk x N x N float64 temporaries
+    return max(1, min(TIME_CHUNK, CHUNK_BYTES // (8 * 8 * n * n)))
+
+
+def rolling_pairwise_correlation(x: np.ndarray, window: int, dtype=np.float64) -> np.ndarray:
+    """
+    Rolling correlation of every column pair of x (T x N, no NaNs).
+    Returns (T - window + 1) x N x N, where row t covers x[t:t+window].
+
+    Each chunk starts from the exact cross-product sum of its first window
+    (one matmul) and slides it by adding the row entering and subtracting the
+    row leaving, so each output costs O(N^2) regardless of the window length.
+    The chunk length comes from CHUNK_BYTES / N^2, which bounds the temporaries
+    whatever the number of tickers.
+    """
+    t_len, n = x.shape
+    out_len = t_len - window + 1
+    if out_len <= 0:
+        return np.empty((0, n, n), dtype=dtype)
+
+    x = x - x.mean(axis=0)  # Correlation is shift-invariant; keeps the moment sums well conditioned
+    s1 = _window_sums(x, window)  # out_len x N
+    s2 = _window_sums(x ** 2, window)  # out_len x N
+    chunk = _pairwise_chunk(n)
+
+    out = np.empty((out_len, n, n), dtype=dtype)
+    for start in range(0, out_len, chunk):
+        stop = min(start + chunk, out_len)
+        first = x[start:start + window]
+        steps = np.arange(start + 1, stop)
+        entering, leaving = x[steps + window - 1], x[steps - 1]
+
+        sxy = np.empty((stop - start, n, n))
+        sxy[0] = first.T @ first
+        if len(steps):
+            np.cumsum(
+                entering[:, :, None] * entering[:, None, :] - leaving[:, :, None] * leaving[:, None, :],
+                axis=0, out=sxy[1:]
+            )
+            sxy[1:] += sxy[0]
+
+        out[start:stop] = _corr_from_moments(
+            window, sxy,
+            s1[start:stop, :, None], s1[start:stop, None, :],
+            s2[start:stop, :, None], s2[start:stop, None, :],
+        )
+    return out
+
+
+def rolling_benchmark_correlation(x: np.ndarray, y: np.ndarray, window: int, dtype=np.float64) -> np.ndarray:
+    """Rolling correlation of each column of x (T x N) with y (T,). O(T * N)."""
+    if len(x) < window:
+        return np.empty((0, x.shape[1]), dtype=dtype)
+    y = y[:, None]
+    corr = _corr_from_moments(
+        window,
+        _window_sums(x * y, window),
+        _window_sums(x, window), _window_sums(y, window),
+        _window_sums(x ** 2, window), _window_sums(y ** 2, window),
+    )
+    return corr.astype(dtype, copy=False)
+
+
+def average_pairwise_correlation(x: np.ndarray, window: int, dtype=np.float64) -> np.ndarray:
+    """
+    Mean of the off-diagonal rolling correlations, one value per window (diversification gauge).
+
+    Never builds an N x N matrix: with z the window's standardized columns, the
+    sum of all correlations is sum_k (sum_i z[k, i])^2 / window, and the row
+    sums of z for a chunk of windows come from one (chunk + window) x chunk
+    product. Flat columns (zero variance) count as uncorrelated.
+    """
+    n = x.shape[1]
+    out_len = max(len(x) - window + 1, 0)
+    if n < 2:
+        return np.full(out_len, np.nan, dtype=dtype)
+
+    x = x - x.mean(axis=0)  # Correlation is shift-invariant; keeps the moment sums well conditioned
+    means = _window_sums(x, window) / window  # out_len x N
+    var = _window_sums(x ** 2, window) / window - means ** 2
+    valid = var > 0
+    scale = np.where(valid, 1 / np.sqrt(np.where(valid, var, 1.0)), 0.0)  # 1 / std, 0 for flat columns
+    offset = (means * scale).sum(axis=1)
+    lags = np.arange(window)[:, None]
+
+    avg = np.empty(out_len, dtype=dtype)
+    for start in range(0, out_len, TIME_CHUNK):
+        stop = min(start + TIME_CHUNK, out_len)
+        cols = np.arange(stop - start)
+        # proj[r, c] = x[start + r] . scale[start + c]; window c covers rows c .. c + window - 1
+        proj = x[start:stop + window - 1] @ scale[start:stop].T
+        row_sums = proj[cols + lags, cols] - offset[start:stop]  # window x chunk
+        total = (row_sums ** 2).sum(axis=0) / window  # Sum of every correlation, diagonal included
+        avg[start:stop] = (total - valid[start:stop].sum(axis=1)) / (n * (n - 1))
+    return avg
@@ -0,0 +1,57 @@
+import numpy as np
+
+VAR_LEVELS = (0.95, 0.99)
+
+
+def _quantile_rank(level: float, window: int) -> int:
+    # Order statistic of the (1 - level) tail, same as np.quantile(..., method="lower")
+    return int(np.floor((1 - level) * (window - 1)))
+
+
+def rolling_var_es(x: np.ndarray, window: int, levels=VAR_LEVELS) -> tuple[dict, dict]:
+    """
+    Rolling historical VaR and Expected Shortfall for every column of `x`
+    (T x N returns without NaNs), as positive losses in the units of `x`.
+
+    A sorted copy of the current window is kept per column (an N x W matrix).
+    Each step removes the outgoing return and inserts the incoming one, which
+    is a bisect insort/remove done for all columns at once: the ranks come from
+    vectorised comparisons and the shift is a single gather. That costs O(N * W)
+    per step instead of the O(N * W log W) of re-sorting every window.
+
+    Returns ({level: (T - W + 1) x N VaR}, {level: ... ES}); row i covers the
+    window ending at x[i + W - 1].
+    """
+    T, N = x.shape
+    steps = T - window + 1
+    var = {level: np.empty((max(steps, 0), N)) for level in levels}
+    es = {level: np.empty((max(steps, 0), N)) for level in levels}
+    if steps <= 0:
+        return var, es
+
+    ranks = {level: _quantile_rank(level, window) for level in levels}
+    rows = np.arange(N)
+    cols = np.arange(window)
+    window_sorted = np.sort(x[:window].T, axis=1)  # N x W
+
+    for i in range(steps):
+        for level, k in ranks.items():
+            var[level][i] = -window_sorted[:, k]
+            es[level][i] = -window_sorted[:, :k + 1].mean(axis=1)
+
+        if i + window == T:
+            break
+        outgoing, incoming = x[i], x[i + window]
+
+        # Remove: first slot holding the outgoing value (bisect_left on the sorted row)
+        remove = (window_sorted < outgoing[:, None]).sum(axis=1)
+        # Insert: bisect_right of the incoming value among the remaining W - 1 values
+        insert = (window_sorted <= incoming[:, None]).sum(axis=1) - (outgoing <= incoming)
+
+        # Gather: slots before `insert` come from the row with `remove` skipped, `insert` is new
+        src = cols[None, :] - (cols[None, :] > insert[:, None])  # index into the W - 1 survivors
+        src = src + (src >= remove[:, None])  # survivor index -> original slot
+        window_sorted = np.take_along_axis(window_sorted, np.minimum(src, window - 1), axis=1)
+        window_sorted[rows, insert] = incoming
+
+    return var, es
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+# Named historical stress windows: peak-to-trough of the episode (inclusive)
+SCENARIOS = {
+    "gfc_2008": {"label": "2008 Global Financial Crisis", "start": "2007-10-09", "end": "2009-03-09"},
+    "covid_2020": {"label": "2020 COVID crash", "start": "2020-02-19", "end": "2020-03-23"},
+    "rate_shock_2022": {"label": "2022 rate shock", "start": "2022-01-03", "end": "2022-10-12"},
+    "dotcom_2000": {"label": "2000-2002 dot-com bust", "start": "2000-03-24", "end": "2002-10-09"},
+    "euro_debt_2011": {"label": "2011 euro debt crisis", "start": "2011-04-29", "end": "2011-10-03"},
+    "volmageddon_2018": {"label": "2018 Q4 selloff", "start": "2018-09-20", "end": "2018-12-24"},
+}
+
+
+def _empty_result() -> dict:
+    return {
+        "return": None, "max_drawdown": None, "trough_date": None,
+        "recovery_days": None, "recovered_on": None, "start_date": None, "missing": [],
+    }
+
+
+def replay_scenarios(prices: pd.DataFrame, weights: np.ndarray, scenarios: dict) -> dict:
+    """
+    Buy-and-hold replay of every portfolio (rows of `weights`, P x N over
+    prices.columns) through every scenario window.
+
+    Works on the per-asset cumulative return index (prices forward-filled over
+    other markets' holidays): portfolio value paths for all portfolios at once
+    are index[start:] / index[start] @ weights.T, so each scenario is a few
+    (T x N) @ (N x P) products plus vectorized running-max / argmin / argmax.
+    Returns {scenario: [result per portfolio]} with percentages and trading-day
+    recovery counts (None if not recovered by the end of the data). A portfolio
+    holding an asset whose history starts after the scenario start has no
+    result (the asset is listed in "missing") rather than a truncated replay.
+    """
+    index = prices.sort_index().ffill()
+    dates = index.index
+    values = index.to_numpy(dtype=np.float64)
+    n_portfolios = weights.shape[0]
+    results = {}
+
+    # First priced date per asset (after ffill only leading rows are NaN)
+    leading = np.isnan(values).sum(axis=0)
+    never_priced = leading == len(dates)
+    first_dates = dates[np.minimum(leading, max(len(dates) - 1, 0))] if len(dates) else dates
+
+    for key, scenario in scenarios.items():
+        scenario_start = pd.Timestamp(scenario["start"])
+        start = dates.searchsorted(scenario_start)
+        end = dates.searchsorted(pd.Timestamp(scenario["end"]), side="right") - 1
+        if start >= len(dates) or end <= start:
+            results[key] = [_empty_result() for _ in range(n_portfolios)]
+            continue
+
+        base = values[start]
+        held = weights != 0
+        # Not trading yet at the scenario start: also when the whole history begins later
+        missing_assets = never_priced | np.asarray(first_dates > scenario_start)
+        invalid = (held & missing_assets).any(axis=1)
+
+        # Cumulative return index from the scenario start, to the end of the data (for recovery)
+        growth = np.nan_to_num(values[start:] / np.where(np.isnan(base), 1.0, base), nan=0.0)
+        paths = growth @ weights.T  # T_ext x P portfolio value paths, 1.0 at start
+
+        window = paths[: end - start + 1]
+        peaks = np.maximum.accumulate(window, axis=0)
+        drawdowns = window / peaks - 1
+        trough = drawdowns.argmin(axis=0)
+        cols = np.arange(n_portfolios)
+        peak_at_trough = peaks[trough, cols]
+
+        # First date after the trough where the path regains its pre-trough peak
+        t = np.arange(len(paths))[:, None]
+        recovered = (paths >= peak_at_trough) & (t > trough)
+        has_recovered = recovered.any(axis=0)
+        recovery_idx = recovered.argmax(axis=0)
+
+        scenario_results = []
+        for p in range(n_portfolios):
+            if invalid[p]:
+                scenario_results.append({**_empty_result(), "missing": list(index.columns[held[p] & missing_assets])})
+                continue
+            scenario_results.append({
+                "return": float(window[-1, p] - 1) * 100,
+                "max_drawdown": float(drawdowns[trough[p], p]) * 100,
+                "trough_date": dates[start + trough[p]].strftime("%Y-%m-%d"),
+                "recovery_days": int(recovery_idx[p] - trough[p]) if has_recovered[p] else None,
+                "recovered_on": dates[start + recovery_idx[p]].strftime("%Y-%m-%d") if has_recovered[p] else None,
+                "start_date": dates[start].strftime("%Y-%m-%d"),  # First trading day replayed
+                "missing": [],
+            })
+        results[key] = scenario_results
+
+    return results
@@ -0,0 +1,257 @@
+import asyncio
+import logging
+import time
+import pandas as pd
+
+from services import shared_panel, stocks
+from utils.helpers import (
+    EXCHANGE_SESSIONS, LOCAL_BENCHMARKS, ALLOWED_BENCHMARKS, get_ticker_exchange_code
+)
+
+logger = logging.getLogger(__name__)
+
+HOT_TICKER_COUNT = 50  # How many of the most requested tickers are kept warm
+REFRESH_BATCH_SIZE = 20  # Tickers per yfinance bulk download
+REFRESH_BATCH_PAUSE_SECONDS = 2.0  # Pause between batches (rate limit towards Yahoo)
+CLOSE_GRACE_MINUTES = 30  # Wait after the close so the final daily bar is published
+TICK_SECONDS = 30  # How often the scheduler wakes up
+WANTED_POLL_SECONDS = 1.0  # Shared panel: how often readers' missing tickers are picked up
+REFRESHER_RETRY_SECONDS = 15  # Shared panel: standby workers retry the refresher lock this often
+PANEL_PUBLISH_MIN_SECONDS = 5.0  # Shared panel: refreshes within this interval are published together
+
+
+class CacheWarmer:
+    """
+    Keeps STOCK_CACHE warm in the background:
+    - refreshes tickers that requests were served stale (stale-while-revalidate)
+    - after each exchange closes, refreshes the hottest tickers and benchmark
+      indices listed on that exchange, in rate-limited batches
+    """
+
+    def __init__(self):
+        self.running = False
+        self.started_at = None
+        self.last_refresh = {}  # ticker -> ISO timestamp of last successful refresh
+        self.last_session_refresh = {}  # exchange -> local session date already refreshed
+        self.last_error = None
+        self.refresh_count = 0
+        self.panel_version = None
+        self._panel_dirty = False  # Refreshed since the last publish
+        self._last_publish = float("-inf")  # time.monotonic() of the last publish
+        self._wanted_stale = set()  # Stale tickers readers asked for, refreshed on the next pass
+        self._task = None
+        self._standby_task = None
+
+    def hot_tickers(self) -> list[str]:
+        return [t for t, _ in stocks.TICKER_HITS.most_common(HOT_TICKER_COUNT)]
+
+    @staticmethod
+    def benchmark_tickers() -> list[str]:
+        return sorted(set(LOCAL_BENCHMARKS.values()) | set(ALLOWED_BENCHMARKS.values()))
+
+    def tracked_tickers(self) -> list[str]:
+        return list(dict.fromkeys(self.hot_tickers() + self.benchmark_tickers()))
+
+    @staticmethod
+    def _session(exchange: str, now: pd.Timestamp) -> tuple[str, pd.Timestamp]:
+        """Local session date of `exchange` at `now` and the moment its post-close refresh is due."""
+        tz, _, close = EXCHANGE_SESSIONS[exchange]
+        session_date = now.tz_convert(tz).date().isoformat()
+        refresh_at = pd.Timestamp(f"{session_date} {close}", tz=tz) + pd.Timedelta(minutes=CLOSE_GRACE_MINUTES)
+        return session_date, refresh_at
+
+    def due_exchanges(self, now: pd.Timestamp | None = None) -> list[str]:
+        """Exchanges whose session closed (plus grace) and have not been refreshed for it yet."""
+        now = now if now is not None else pd.Timestamp.now(tz="UTC")
+        due = []
+        for exchange, (tz, _, _) in EXCHANGE_SESSIONS.items():
+            if now.tz_convert(tz).weekday() >= 5:
+                continue  # No session at the weekend
+
+            session_date, refresh_at = self._session(exchange, now)
+            if now >= refresh_at and self.last_session_refresh.get(exchange) != session_date:
+                due.append(exchange)
+        return due
+
+    def _mark_sessions(self, exchanges: list[str], now: pd.Timestamp | None = None) -> None:
+        now = now if now is not None else pd.Timestamp.now(tz="UTC")
+        for exchange in exchanges:
+            self.last_session_refresh[exchange] = self._session(exchange, now)[0]
+
+    @staticmethod
+    def _updated_before(ticker: str, moment: pd.Timestamp) -> bool:
+        # last_updated is naive local time (see stocks.refresh_stock_data)
+        meta = stocks.STOCK_CACHE.meta(ticker)
+        return meta is None or meta["last_updated"] < moment.to_pydatetime().astimezone().replace(tzinfo=None)
+
+    async def refresh(self, tickers: list[str]) -> list[str]:
+        """Refresh tickers in rate-limited bulk batches, off the event loop. Returns the tickers that failed."""
+        refreshed_any = False
+        failed = []
+        for i in range(0, len(tickers), REFRESH_BATCH_SIZE):
+            batch = tickers[i:i + REFRESH_BATCH_SIZE]
+            if i:
+                await asyncio.sleep(REFRESH_BATCH_PAUSE_SECONDS)
+            try:
+                refreshed = await asyncio.to_thread(stocks.refresh_stock_data, batch)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.exception("Background refresh failed | batch=%s", batch)
+                failed += batch
+                continue
+
+            stamp = pd.Timestamp.now(tz="UTC").isoformat()
+            for t in refreshed:
+                self.last_refresh[t] = stamp
+            self.refresh_count += len(refreshed)
+            refreshed_any = refreshed_any or bool(refreshed)
+            logger.info("Background refresh | requested=%d | refreshed=%d", len(batch), len(refreshed))
+
+        if refreshed_any:
+            self._panel_dirty = True
+            await self.publish_panel()
+        return failed
+
+    async def publish_panel(self, force: bool = False) -> None:
+        """
+        Publish STOCK_CACHE to the shared panel so other workers flip to the new
+        version. At most once per PANEL_PUBLISH_MIN_SECONDS unless forced: later
+        refreshes stay pending and the loop publishes them together.
+        """
+        if not shared_panel.SHARED_PANEL_ENABLED:
+            return
+        if not force and time.monotonic() - self._last_publish < PANEL_PUBLISH_MIN_SECONDS:
+            return
+        self._last_publish = time.monotonic()
+        self._panel_dirty = False
+        try:
+            self.panel_version = await asyncio.to_thread(stocks.publish_panel)
+        except Exception as e:
+            self._panel_dirty = True
+            self.last_error = f"{type(e).__name__}: {e}"
+            logger.exception("Publishing shared price panel failed")
+
+    def _drain_wanted(self) -> None:
+        # Requests seen by the reader workers: count popularity, remember what needs fetching
+        wanted = shared_panel.take_wanted()
+        stocks.TICKER_HITS.update(wanted)
+        self._wanted_stale.update(stocks.stale_tickers(list(dict.fromkeys(wanted))))
+
+    async def refresh_wanted_missing(self) -> list[str]:
+        """
+        Fetch tickers readers asked for that are not in the store at all (they
+        are waiting on the panel for them). Expired ones wait for the next pass.
+        """
+        self._drain_wanted()
+        missing = sorted(t for t in self._wanted_stale if t not in stocks.STOCK_CACHE)
+        self._wanted_stale.difference_update(missing)
+        await self.refresh(missing)
+        return missing
+
+    async def run_once(self, now: pd.Timestamp | None = None) -> list[str]:
+        """One scheduler pass. Returns the tickers that were submitted for refresh."""
+        todo = stocks.take_pending_refresh()
+
+        if shared_panel.SHARED_PANEL_ENABLED:
+            self._drain_wanted()
+            todo += sorted(self._wanted_stale)
+            self._wanted_stale.clear()
+
+        now = now if now is not None else pd.Timestamp.now(tz="UTC")
+        due = self.due_exchanges(now)
+        if due:
+            # Tracked tickers not updated since their exchange's close (plus grace)
+            refresh_at = {exchange: self._session(exchange, now)[1] for exchange in due}
+            todo += [
+                t for t in self.tracked_tickers()
+                if get_ticker_exchange_code(t) in due
+                and self._updated_before(t, refresh_at[get_ticker_exchange_code(t)])
+            ]
+            logger.info("Post-close refresh | exchanges=%s", due)
+
+        todo = list(dict.fromkeys(todo))
+        failed = {get_ticker_exchange_code(t) for t in await self.refresh(todo)}
+        # A session counts as refreshed only if none of its batches failed; otherwise the next pass retries
+        self._mark_sessions([exchange for exchange in due if exchange not in failed], now)
+        return todo
+
+    async def _loop(self) -> None:
+        # Startup warm: only what is missing/expired; the first pass below catches up on today's closes
+        await self.refresh(stocks.stale_tickers(self.tracked_tickers()))
+        if self.panel_version is None:
+            await self.publish_panel(force=True)  # Nothing was stale: publish what was loaded from disk
+        last_pass = None
+        while True:
+            try:
+                if last_pass is None or time.monotonic() - last_pass >= TICK_SECONDS:
+                    last_pass = time.monotonic()
+                    await self.run_once()
+                else:
+                    await self.refresh_wanted_missing()
+                if self._panel_dirty:
+                    await self.publish_panel()  # Refreshes coalesced since the last publish
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.exception("Cache warmer pass failed")
+            await asyncio.sleep(WANTED_POLL_SECONDS if shared_panel.SHARED_PANEL_ENABLED else TICK_SECONDS)
+
+    async def _standby(self) -> None:
+        # Readers keep retrying the refresher lock so one takes over if the refresher dies
+        while not shared_panel.acquire_refresher_lock():
+            await asyncio.sleep(REFRESHER_RETRY_SECONDS)
+        logger.info("Taking over as price panel refresher")
+        self._standby_task = None
+        self.start()
+
+    def start_or_standby(self) -> None:
+        """Start in the refresher process; other shared-panel workers wait to take over."""
+        if not shared_panel.SHARED_PANEL_ENABLED or shared_panel.acquire_refresher_lock():
+            self.start()
+        elif self._standby_task is None:
+            self._standby_task = asyncio.create_task(self._standby())
+
+    def start(self) -> None:
+        if self.running:
+            return
+        stocks.migrate_legacy_cache()  # Only the store owner writes it
+        # Sessions that already closed today are not marked: the first pass refreshes
+        # tracked tickers last updated before that close
+        stocks.SERVE_STALE = True
+        self.running = True
+        self.started_at = pd.Timestamp.now(tz="UTC").isoformat()
+        self._task = asyncio.create_task(self._loop())
+        logger.info("Cache warmer started")
+
+    async def stop(self) -> None:
+        stocks.SERVE_STALE = False
+        self.running = False
+        for task in (self._task, self._standby_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._standby_task = None
+        logger.info("Cache warmer stopped")
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "started_at": self.started_at,
+            "serve_stale": stocks.SERVE_STALE,
+            "hot_tickers": {t: n for t, n in stocks.TICKER_HITS.most_common(HOT_TICKER_COUNT)},
+            "pending_refresh": sorted(stocks._PENDING_REFRESH),
+            "last_session_refresh": dict(self.last_session_refresh),
+            "last_refresh": dict(self.last_refresh),
+            "refresh_count": self.refresh_count,
+            "last_error": self.last_error,
+            "shared_panel": shared_panel.SHARED_PANEL_ENABLED,
+            "panel_role": ("refresher" if shared_panel.is_refresher() else "reader")
+            if shared_panel.SHARED_PANEL_ENABLED else None,
+            "panel_version": self.panel_version,
+        }
+
+
+cache_warmer = CacheWarmer()
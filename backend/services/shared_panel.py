@@ -0,0 +1,292 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl  # POSIX only; without it every process acts as its own refresher
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Multi-worker mode (uvicorn --workers N): one refresher process owns the price
+# store and publishes the aligned Close panel into a memory-mapped .npy file;
+# every other worker maps it read-only and never opens or writes the store.
+SHARED_PANEL_ENABLED = os.environ.get("SHARED_PRICE_PANEL", "0") == "1"
+PANEL_DIR = os.path.join("cache", "price_panel")
+MANIFEST_FILE = os.path.join(PANEL_DIR, "manifest.json")
+LOCK_FILE = os.path.join(PANEL_DIR, "refresher.lock")
+WANTED_FILE = os.path.join(PANEL_DIR, "wanted.txt")
+PANEL_WAIT_SECONDS = 30.0  # How long a reader waits for the refresher to publish missing tickers
+PANEL_POLL_SECONDS = 0.25
+PANEL_RETRY_AFTER_SECONDS = 10  # Retry-After sent when a reader gives up waiting
+
+_lock_fd = None  # Held for the lifetime of the refresher process
+
+
+class PanelUnavailable(RuntimeError):
+    """The published panel does not (yet) cover the requested tickers."""
+
+    def __init__(self, missing: list[str]):
+        super().__init__(f"Price data not published yet for: {', '.join(missing)}")
+        self.missing = missing
+
+
+def acquire_refresher_lock() -> bool:
+    """Try to become the single refresher process. Non-blocking."""
+    global _lock_fd
+    if _lock_fd is not None:
+        return True
+    if fcntl is None:
+        return True
+
+    os.makedirs(PANEL_DIR, exist_ok=True)
+    fd = os.open(LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return False
+    _lock_fd = fd
+    logger.info("Acquired price panel refresher lock | pid=%d", os.getpid())
+    return True
+
+
+def is_refresher() -> bool:
+    return _lock_fd is not None or fcntl is None
+
+
+def _atomic_write(path: str, write) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)  # Atomic on POSIX: readers see the old or the new file
+
+
+def _read_manifest() -> dict | None:
+    try:
+        with open(MANIFEST_FILE, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _previous_panel(manifest: dict | None):
+    if manifest is None:
+        return None, None
+    try:
+        values = np.load(os.path.join(PANEL_DIR, manifest["values"]), mmap_mode="r")
+        dates = pd.DatetimeIndex(np.load(os.path.join(PANEL_DIR, manifest["dates"])))
+    except FileNotFoundError:
+        return None, None
+    return values, dates
+
+
+def publish(updated: dict[str, pd.Timestamp], load: Callable[[str], pd.Series | None]) -> int:
+    """
+    Write the aligned panel (one contiguous row per ticker) plus its index and
+    flip the manifest to the new version. `updated` maps every ticker to its
+    last refresh time, which is stored per ticker so readers version data per
+    ticker. Tickers whose time matches the current panel are copied from it;
+    only the others are read with `load(ticker)` (None: skip the ticker).
+    Returns the published version, or the current one if nothing changed.
+    """
+    os.makedirs(PANEL_DIR, exist_ok=True)
+    stamps = {t: pd.Timestamp(u).isoformat() for t, u in updated.items()}
+    previous = _read_manifest()
+    published = {t: e[3] for t, e in previous["tickers"].items() if len(e) > 3} if previous else None
+    if published == stamps:
+        return previous["version"]
+
+    prev_values, prev_dates = _previous_panel(previous)
+    series = {}
+    loaded_count = 0
+    for t, stamp in stamps.items():
+        entry = previous["tickers"].get(t) if prev_values is not None else None
+        if entry is not None and len(entry) > 3 and entry[3] == stamp:
+            row, start, stop = entry[:3]
+            series[t] = pd.Series(prev_values[row, start:stop], index=prev_dates[start:stop])
+            continue
+        loaded = load(t)
+        if loaded is not None:
+            series[t] = loaded
+            loaded_count += 1
+    if published == {t: stamps[t] for t in series}:
+        return previous["version"]  # Only tickers that could not be loaded differ
+
+    tickers = list(series)
+    frame = pd.concat([series[t] for t in tickers], axis=1, sort=True) if tickers else pd.DataFrame()
+
+    # Ticker-major layout so each ticker's history is a contiguous, zero-copy row view
+    values = np.ascontiguousarray(frame.to_numpy(dtype=np.float64).T)
+    dates = frame.index.values.astype("datetime64[ns]").view("int64")
+
+    index = {}
+    for row, t in enumerate(tickers):
+        valid = np.flatnonzero(~np.isnan(values[row]))
+        start, stop = (int(valid[0]), int(valid[-1]) + 1) if len(valid) else (0, 0)
+        index[t] = [row, start, stop, stamps[t]]  # ticker -> row, first/last+1 date offset, last refresh
+
+    version = (previous["version"] if previous else 0) + 1
+    values_file = f"values_v{version}.npy"
+    dates_file = f"dates_v{version}.npy"
+    _atomic_write(os.path.join(PANEL_DIR, values_file), lambda f: np.save(f, values))
+    _atomic_write(os.path.join(PANEL_DIR, dates_file), lambda f: np.save(f, dates))
+
+    manifest = {
+        "version": version,
+        "published_at": pd.Timestamp.now(tz="UTC").isoformat(),
+        "values": values_file,
+        "dates": dates_file,
+        "tickers": index,
+    }
+    _atomic_write(MANIFEST_FILE, lambda f: f.write(json.dumps(manifest).encode("utf-8")))
+
+    # Keep the previous version around for readers that have not flipped yet
+    # (already-mapped files stay valid after unlink anyway)
+    for name in os.listdir(PANEL_DIR):
+        if name.endswith(".npy") and not name.endswith((f"_v{version}.npy", f"_v{version - 1}.npy")):
+            os.remove(os.path.join(PANEL_DIR, name))
+
+    logger.info(
+        "Published price panel | version=%d | tickers=%d | loaded=%d | dates=%d",
+        version, len(tickers), loaded_count, len(dates),
+    )
+    return version
+
+
+class PanelState(NamedTuple):
+    version: int
+    published_at: pd.Timestamp
+    values: np.ndarray  # (tickers, dates) memmap
+    dates: pd.DatetimeIndex
+    tickers: dict  # ticker -> [row, first date offset, last + 1, last refresh (ISO)]
+
+
+def ticker_version(state: PanelState, ticker: str) -> str:
+    """
+    Data version of one published ticker, in the same form as the price
+    store's (services/stocks.get_data_version), so it only changes when that
+    ticker was refreshed and matches across refresher and reader workers.
+    """
+    entry = state.tickers[ticker]
+    stop = entry[2]
+    last_date = state.dates[stop - 1] if stop else None
+    if len(entry) < 4:
+        return f"{ticker}@panel{state.version}:{last_date}"  # Manifest from before per-ticker stamps
+    return f"{ticker}@{pd.Timestamp(entry[3]).value}:{last_date}"
+
+
+class PanelReader:
+    """Per-process read-only view of the published panel, re-mapped when the version flips."""
+
+    def __init__(self):
+        self._stamp = None  # (inode, mtime) of the manifest last read
+        self._state = None
+        self._lock = threading.Lock()
+
+    def current(self) -> PanelState | None:
+        try:
+            st = os.stat(MANIFEST_FILE)
+        except FileNotFoundError:
+            return None
+        # os.replace gives every published manifest a new inode, even within the mtime resolution
+        stamp = (st.st_ino, st.st_mtime_ns)
+        if stamp == self._stamp:
+            return self._state
+
+        with self._lock:
+            manifest = _read_manifest()
+            if manifest is None:
+                return self._state
+            if self._state is None or self._state.version != manifest["version"]:
+                values = np.load(os.path.join(PANEL_DIR, manifest["values"]), mmap_mode="r")
+                dates = pd.DatetimeIndex(np.load(os.path.join(PANEL_DIR, manifest["dates"])), name="Date")
+                self._state = PanelState(
+                    manifest["version"], pd.Timestamp(manifest["published_at"]),
+                    values, dates, manifest["tickers"],
+                )
+            self._stamp = stamp
+        return self._state
+
+    @property
+    def version(self) -> int | None:
+        state = self.current()
+        return state.version if state else None
+
+    def column(self, ticker: str) -> np.ndarray | None:
+        """Zero-copy view of one ticker's prices over its own valid date range."""
+        state = self.current()
+        if state is None or ticker not in state.tickers:
+            return None
+        row, start, stop = state.tickers[ticker][:3]
+        return state.values[row, start:stop]
+
+    def missing(self, tickers: list[str]) -> list[str]:
+        state = self.current()
+        if state is None:
+            return list(tickers)
+        return [t for t in tickers if t not in state.tickers]
+
+    def wait_for(self, tickers: list[str], timeout: float | None = None) -> PanelState:
+        """
+        Current state once it covers every ticker. Readers never download:
+        missing tickers are left to the refresher (see note_wanted), and
+        PanelUnavailable is raised if it has not published them in time.
+        """
+        deadline = time.monotonic() + (PANEL_WAIT_SECONDS if timeout is None else timeout)
+        while True:
+            state = self.current()
+            missing = list(tickers) if state is None else [t for t in tickers if t not in state.tickers]
+            if not missing:
+                return state
+            if time.monotonic() >= deadline:
+                raise PanelUnavailable(missing)
+            time.sleep(PANEL_POLL_SECONDS)
+
+    def frame(self, tickers: list[str], state: PanelState | None = None) -> pd.DataFrame | None:
+        """
+        Close frame for `tickers` over their combined date range, or None if
+        any is missing. Columns wrap the mapped rows without copying, so the
+        frame can include dates on which none of `tickers` traded (all-NaN
+        rows); calendar_index.AlignedPrices drops those when it aligns.
+        """
+        state = state if state is not None else self.current()
+        if state is None or any(t not in state.tickers for t in tickers):
+            return None
+
+        start = min(state.tickers[t][1] for t in tickers)
+        stop = max(state.tickers[t][2] for t in tickers)
+        data = {t: state.values[state.tickers[t][0], start:stop] for t in tickers}
+        return pd.DataFrame(data, index=state.dates[start:stop], columns=tickers, copy=False)
+
+
+def note_wanted(tickers: list[str]) -> None:
+    """Tell the refresher (another process) which tickers workers are asking for."""
+    if not tickers:
+        return
+    os.makedirs(PANEL_DIR, exist_ok=True)
+    with open(WANTED_FILE, "a") as f:
+        f.write("".join(f"{t}\n" for t in tickers))
+
+
+def take_wanted() -> list[str]:
+    """Drain the wanted-tickers spool (refresher only)."""
+    try:
+        tmp = f"{WANTED_FILE}.{os.getpid()}.drain"
+        os.replace(WANTED_FILE, tmp)
+    except FileNotFoundError:
+        return []
+    with open(tmp, "r") as f:
+        wanted = [line.strip() for line in f if line.strip()]
+    os.remove(tmp)
+    return wanted
+
+
+PANEL = PanelReader()
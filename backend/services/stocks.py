@@ -1,52 +1,301 @@
 import yfinance as yf
 import pandas as pd
 import pickle, os
+import threading
+import logging
+from collections import Counter, OrderedDict
+from functools import lru_cache
 
-CACHE_FILE = "stock_cache.pkl"
+from services import shared_panel, intraday_store, calendar_index
+from services.price_cache import PriceCache, entry_bytes
+from services.materialize import materialize
+from utils.helpers import get_ticker_exchange_code, LOCAL_BENCHMARKS, ALLOWED_BENCHMARKS
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.join("cache", "stock_cache")  # Per-ticker pickles (spill / persistence store)
+CACHE_FILE = "stock_cache.pkl"  # Legacy single-file cache, migrated into CACHE_DIR on startup
 CACHE_EXPIRY_DAYS = 1
+CACHE_MAX_BYTES = 256 * 1024 * 1024  # Resident budget; least recently/frequently used tickers spill to disk
+CACHE_EVICTION_POLICY = "lru"  # "lru" or "lfu"
+
+# Opened lazily: shared-panel reader processes never load or write it
+STOCK_CACHE = PriceCache(CACHE_DIR, CACHE_MAX_BYTES, CACHE_EVICTION_POLICY)
+
+
+def migrate_legacy_cache() -> None:
+    """Move the legacy whole-cache pickle into the per-ticker store (once, store owner only)."""
+    if not os.path.exists(CACHE_FILE):
+        return
+    with open(CACHE_FILE, "rb") as f, STOCK_CACHE.batch():
+        for t, entry in pickle.load(f).items():
+            if t not in STOCK_CACHE:
+                STOCK_CACHE[t] = entry
+    os.replace(CACHE_FILE, CACHE_FILE + ".migrated")
+    logger.info("Migrated %s into %s | tickers=%d", CACHE_FILE, CACHE_DIR, len(STOCK_CACHE))
+
+
+# Stale-while-revalidate switch. While a background refresher is running
+# (services/scheduler.py), expired tickers are served from cache and queued for
+# refresh instead of blocking the request on a yfinance download.
+SERVE_STALE = False
+
+# Shared-panel readers have no materialized store: derived series are computed
+# from the mapped prices once per ticker data version and kept here (LRU, byte-bounded)
+DERIVED_CACHE_MAX_BYTES = 64 * 1024 * 1024
+_DERIVED_CACHE = OrderedDict()  # ticker -> (data version, derived, bytes)
+_derived_bytes = 0
+
+TICKER_HITS = Counter()  # Request-traffic popularity per ticker (read by the cache warmer)
+_PENDING_REFRESH = set()  # Expired tickers served stale, waiting for a background refresh
+_CACHE_LOCK = threading.RLock()  # Guards STOCK_CACHE updates across threads
+
+
+def _is_expired(ticker: str, today: pd.Timestamp) -> bool:
+    # Metadata only: never reloads a spilled ticker just to check its age
+    return today - STOCK_CACHE.meta(ticker)["last_updated"] > pd.Timedelta(days=CACHE_EXPIRY_DAYS)
+
+
+def stale_tickers(tickers: list[str]) -> list[str]:
+    """Tickers that are missing from the cache or older than CACHE_EXPIRY_DAYS."""
+    today = pd.Timestamp.today(tz=None)
+    return [t for t in tickers if t not in STOCK_CACHE or _is_expired(t, today)]
+
+
+def refresh_stock_data(tickers: list[str]) -> list[str]:
+    """
+    Download full daily Close history for `tickers` in one yfinance call and
+    store it in STOCK_CACHE. Returns the tickers that were actually updated.
+    """
+    if not tickers:
+        return []
+
+    today = pd.Timestamp.today(tz=None)  # Use timezone-naive timestamp for deterministic cache expiry checks
+    fetched = yf.download(
+        tickers, period="max", interval="1d",
+        auto_adjust=True, progress=False, threads=True
+    )
+
+    refreshed = []
+    with _CACHE_LOCK, STOCK_CACHE.batch():  # One index write per refresh
+        # Store Close price series for each fetched ticker in cache
+        for t in tickers:
+            # Assumes fetched has a MultiIndex and contains Close data
+            series = fetched["Close"][t].dropna()
+
+            # Never replace good (if stale) history with a failed/empty download
+            if series.empty and t in STOCK_CACHE:
+                continue
+
+            # Derived per-ticker series are materialized here, once per refresh
+            STOCK_CACHE[t] = {"data": series, "last_updated": today, "derived": materialize(series)}
+            refreshed.append(t)
+
+    return refreshed
+
+
+def take_pending_refresh() -> list[str]:
+    """Drain the set of tickers that were served stale since the last call."""
+    with _CACHE_LOCK:
+        pending = sorted(_PENDING_REFRESH)
+        _PENDING_REFRESH.clear()
+    return pending
+
+
+def get_data_version(tickers: list[str], interval: str = "1d") -> str | None:
+    """
+    Version token for the cached prices behind `tickers`. Changes whenever any
+    of them is refreshed; None if a ticker is not cached yet (version unknown).
+    Independent of the order `tickers` are given in.
+    """
+    if interval != "1d":
+        return intraday_store.data_version(tickers, interval)
+    if _reads_shared_panel():
+        # Readers serve only from the panel, which records each ticker's refresh time
+        state = shared_panel.PANEL.current()
+        if state is None or any(t not in state.tickers for t in tickers):
+            return None
+        return _panel_version(tickers, state)
+
+    parts = []
+    for t in sorted(set(tickers)):
+        meta = STOCK_CACHE.meta(t)
+        if meta is None:
+            return None
+        parts.append(f"{t}@{meta['last_updated'].value}:{meta['last_date']}")
+    return "|".join(parts)
+
+
+def _panel_version(tickers: list[str], state: shared_panel.PanelState) -> str:
+    # Per ticker, same form as the store's: publishing other tickers changes nothing here
+    return "|".join(shared_panel.ticker_version(state, t) for t in sorted(set(tickers)))
+
+
+def _peek_close(ticker: str) -> pd.Series | None:
+    # peek(): bulk export must not thrash the resident set
+    try:
+        return STOCK_CACHE.peek(ticker)["data"]
+    except KeyError:
+        return None  # Pickle vanished from disk; refetched on next request
+
 
-# Load cache from disk if it exists, otherwise start fresh
-if os.path.exists(CACHE_FILE):
-    with open(CACHE_FILE, "rb") as f:
-        STOCK_CACHE = pickle.load(f)
-else:
-    STOCK_CACHE = {}
+def publish_panel() -> int:
+    """
+    Publish every cached Close series to the shared panel (refresher only).
+    Tickers not refreshed since the last publish are copied from the current
+    panel rather than read back from the store.
+    """
+    updated = {}
+    for t in STOCK_CACHE:
+        meta = STOCK_CACHE.meta(t)
+        if meta is not None:
+            updated[t] = meta["last_updated"]
+    return shared_panel.publish(updated, _peek_close)
 
-def fetch_stock_data(tickers: list[str]) -> pd.DataFrame:
+
+def _reads_shared_panel() -> bool:
+    # Only non-refresher workers read the shared panel; the refresher owns STOCK_CACHE
+    return shared_panel.SHARED_PANEL_ENABLED and not shared_panel.is_refresher()
+
+
+def _panel_state(tickers: list[str]) -> shared_panel.PanelState:
+    # Let the refresher know what this worker is asking for (popularity + missing tickers),
+    # then wait for it to publish anything missing; readers never download or write the store
+    shared_panel.note_wanted(tickers)
+    return shared_panel.PANEL.wait_for(tickers)
+
+
+def _ensure_fresh(tickers: list[str]) -> None:
     today = pd.Timestamp.today(tz=None)  # Use timezone-naive timestamp for deterministic cache expiry checks
     tickers_to_fetch = []  # Track which tickers need fresh data
 
-    # Decide whether each ticker should be fetched
-    for t in tickers:
-        # Fetch if:
-        # - ticker not cached, OR
-        # - cached data is older than CACHE_EXPIRY_DAYS
-        if t not in STOCK_CACHE or today - STOCK_CACHE[t]["last_updated"] > pd.Timedelta(days=CACHE_EXPIRY_DAYS):
-            tickers_to_fetch.append(t)
+    with _CACHE_LOCK:
+        TICKER_HITS.update(tickers)
+
+        # Decide whether each ticker should be fetched
+        for t in tickers:
+            # Fetch if:
+            # - ticker not cached, OR
+            # - cached data is older than CACHE_EXPIRY_DAYS (unless serving stale)
+            if t not in STOCK_CACHE:
+                tickers_to_fetch.append(t)
+            elif _is_expired(t, today):
+                if SERVE_STALE:
+                    _PENDING_REFRESH.add(t)
+                else:
+                    tickers_to_fetch.append(t)
 
     # Fetch missing / expired tickers in one yfinance call
-    if tickers_to_fetch:
-        fetched = yf.download(
-            tickers_to_fetch, period="max", interval="1d",
-            auto_adjust=True, progress=False, threads=True
-        )
+    refresh_stock_data(tickers_to_fetch)
 
-        # Store Close price series for each fetched ticker in cache
-        for t in tickers_to_fetch:
-            STOCK_CACHE[t] = {
-                # Assumes fetched has a MultiIndex and contains Close data
-                "data": fetched["Close"][t].dropna(),
-                "last_updated": today
-            }
-
-        # Persist updated cache to disk
-        with open(CACHE_FILE, "wb") as f:
-            pickle.dump(STOCK_CACHE, f)
-
-    combined = pd.concat([STOCK_CACHE[t]["data"] for t in tickers], axis=1)
+
+def _cached_entry(ticker: str) -> dict:
+    try:
+        return STOCK_CACHE[ticker]
+    except KeyError:
+        # Spilled pickle vanished from disk (the cache just dropped it): refetch once
+        refresh_stock_data([ticker])
+        return STOCK_CACHE[ticker]
+
+
+def _concat_cached(tickers: list[str]) -> pd.DataFrame:
+    combined = pd.concat([_cached_entry(t)["data"] for t in tickers], axis=1)
     combined.columns = tickers  # Ensure column names match input tickers
     return combined
 
+
+def fetch_stock_data(tickers: list[str], interval: str = "1d", start: pd.Timestamp | None = None) -> pd.DataFrame:
+    """
+    Close prices for `tickers` on their union calendar. `start` (see
+    utils.helpers.range_start) limits how much intraday history is read;
+    daily prices always cover the full history.
+    """
+    if interval != "1d":
+        # Intraday bars live in their own time-partitioned store
+        return intraday_store.fetch_intraday_prices(tickers, interval, start)
+
+    # Union-calendar frame from the alignment cache: concatenated once per data version
+    return fetch_aligned(tickers).prices()
+
+
+def fetch_aligned(tickers: list[str], interval: str = "1d",
+                  start: pd.Timestamp | None = None) -> calendar_index.AlignedPrices:
+    """Prices for `tickers` on their union calendar, cached per data version (see services/calendar_index.py)."""
+    if interval != "1d":
+        # Already cheap to read; only the alignment work is cached (per start: frames differ)
+        prices = fetch_stock_data(tickers, interval, start)
+        version = get_data_version(tickers, interval)
+        if version is not None and start is not None:
+            version = f"{version}|from:{start.isoformat()}"
+        return calendar_index.aligned(tickers, interval, version, lambda: prices)
+
+    if _reads_shared_panel():
+        # Version and frame come from the same mapped panel state
+        state = _panel_state(tickers)
+        return calendar_index.aligned(
+            tickers, interval, _panel_version(tickers, state),
+            lambda: shared_panel.PANEL.frame(tickers, state)
+        )
+
+    _ensure_fresh(tickers)
+    return calendar_index.aligned(tickers, interval, get_data_version(tickers), lambda: _concat_cached(tickers))
+
+
+def fetch_derived(tickers: list[str], interval: str = "1d", start: pd.Timestamp | None = None) -> dict[str, dict]:
+    """Materialized per-ticker series (see services/materialize.py) keyed by ticker."""
+    if interval != "1d":
+        # Intraday series are short and change every few minutes: derive on read
+        prices = fetch_stock_data(tickers, interval, start)
+        return {t: materialize(prices[t].dropna(), interval, get_ticker_exchange_code(t)) for t in tickers}
+
+    if _reads_shared_panel():
+        # Panel workers hold no STOCK_CACHE entries: derive from the mapped prices
+        return _panel_derived(tickers, _panel_state(tickers))
+
+    _ensure_fresh(tickers)
+
+    derived = {}
+    for t in tickers:
+        entry = _cached_entry(t)
+        if "derived" not in entry:
+            # Entry cached before materialization existed: backfill it once
+            entry = {**entry, "derived": materialize(entry["data"])}
+            with _CACHE_LOCK:
+                STOCK_CACHE[t] = entry
+        derived[t] = entry["derived"]
+    return derived
+
+
+def _panel_derived(tickers: list[str], state: shared_panel.PanelState) -> dict[str, dict]:
+    global _derived_bytes
+    versions = {t: shared_panel.ticker_version(state, t) for t in tickers}
+    derived = {}
+    with _CACHE_LOCK:
+        for t in tickers:
+            cached = _DERIVED_CACHE.get(t)
+            if cached is not None and cached[0] == versions[t]:
+                _DERIVED_CACHE.move_to_end(t)
+                derived[t] = cached[1]
+
+    todo = [t for t in tickers if t not in derived]
+    if todo:
+        prices = shared_panel.PANEL.frame(todo, state)
+        for t in todo:
+            derived[t] = materialize(prices[t].dropna())
+            with _CACHE_LOCK:
+                old = _DERIVED_CACHE.pop(t, None)
+                if old is not None:
+                    _derived_bytes -= old[2]
+                size = entry_bytes(derived[t])
+                _DERIVED_CACHE[t] = (versions[t], derived[t], size)
+                _derived_bytes += size
+                while _derived_bytes > DERIVED_CACHE_MAX_BYTES and len(_DERIVED_CACHE) > 1:
+                    _, (_, _, old_size) = _DERIVED_CACHE.popitem(last=False)
+                    _derived_bytes -= old_size
+    return {t: derived[t] for t in tickers}
+
+
+@lru_cache(maxsize=4096)  # A listing's exchange does not change; spares a yfinance call per request
 def get_stock_exchange(ticker: str) -> str:
     info = yf.Ticker(ticker).info  # Retrieve metadata for the ticker from yfinance
 
@@ -54,3 +303,16 @@ def get_stock_exchange(ticker: str) -> str:
     if "exchange" not in info or info["exchange"] is None:
         raise ValueError(f"Exchange not found for stock {ticker}")
     return info["exchange"]
+
+
+def resolve_benchmarks(stocks: list[str], benchmark: str | None = None) -> dict[str, str]:
+    """
+    Benchmark index per stock for /beta: the custom `benchmark` for all of
+    them, else each stock's local exchange index. Raises ValueError for an
+    unknown custom benchmark.
+    """
+    if benchmark:
+        if benchmark not in ALLOWED_BENCHMARKS:
+            raise ValueError(f"Invalid benchmark '{benchmark}'")
+        return {stock: ALLOWED_BENCHMARKS[benchmark] for stock in stocks}
+    return {stock: LOCAL_BENCHMARKS[get_stock_exchange(stock)] for stock in stocks}
@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+
+from core import admission
+from core.admission import AdmissionGate, AdmissionControlMiddleware, Rejected, route_class
+
+
+def test_route_class_separates_cheap_and_heavy_requests():
+    # Search and LLM have their own classes; large universes count as heavy
+    assert route_class("/search", b"query=app") == "search"
+    assert route_class("/generate_summary", b"") == "llm"
+    assert route_class("/volatility", b"stocks=AAPL&stocks=MSFT") == "metrics"
+    assert route_class("/volatility", "&".join(f"stocks=T{i}" for i in range(100)).encode()) == "heavy"
+    assert route_class("/returns", ("range=All&" + "&".join(f"stocks=T{i}" for i in range(25))).encode()) == "heavy"
+    assert route_class("/cache/status", b"") is None
+
+
+def test_gate_queues_in_order_then_rejects_when_full():
+    # limit 1, queue 1: second request waits for the slot, third is turned away
+    async def scenario():
+        gate = AdmissionGate("test", limit=1, queue=1, timeout=1.0, status=503)
+        await gate.acquire()
+        waiting = asyncio.create_task(gate.acquire())
+        await asyncio.sleep(0)
+        assert gate.queued == 1
+
+        with pytest.raises(Rejected) as rejected:
+            await gate.acquire()
+        assert rejected.value.retry_after >= 1
+
+        gate.release(0.5)
+        await waiting
+        assert gate.active == 1 and gate.queued == 0
+        gate.release(0.5)
+        return gate.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["admitted"] == 2 and stats["rejected"] == 1 and stats["active"] == 0
+    assert stats["wait_max"] > 0
+
+
+def test_gate_times_out_waiters():
+    # A waiter that never gets a slot is rejected after `timeout`
+    async def scenario():
+        gate = AdmissionGate("test", limit=1, queue=4, timeout=0.01, status=503)
+        await gate.acquire()
+        with pytest.raises(Rejected):
+            await gate.acquire()
+        return gate
+
+    gate = asyncio.run(scenario())
+    assert gate.timeouts == 1 and gate.queued == 0 and gate.active == 1
+
+
+def test_middleware_rejects_with_retry_after(monkeypatch):
+    # A saturated class answers immediately with its status and Retry-After
+    gate = AdmissionGate("search", limit=1, queue=0, timeout=1.0, status=503)
+    gate.active = 1
+    monkeypatch.setitem(admission.GATES, "search", gate)
+
+    async def app(scope, receive, send):
+        raise AssertionError("should not be called")
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "path": "/search", "query_string": b"query=a"}
+    asyncio.run(AdmissionControlMiddleware(app)(scope, None, send))
+
+    assert sent[0]["status"] == 503
+    assert (b"retry-after", b"1") in sent[0]["headers"]
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from services import calendar_index
+from services.calendar_index import AlignedPrices
+from utils.helpers import get_calendar_offset
+
+
+def mixed_calendar_prices():
+    # LSE closed on day 3, NYSE closed on day 5
+    idx = pd.bdate_range("2024-01-01", periods=6)
+    return pd.DataFrame({
+        "NYSE": [100.0, 101.0, 102.0, 103.0, np.nan, 105.0],
+        "LSE": [50.0, 51.0, np.nan, 53.0, 54.0, 55.0],
+    }, index=idx)
+
+
+def test_alignment_modes():
+    # intersect spans the holidays, ffill carries prices, pairwise keeps each own calendar
+    aligned = AlignedPrices(mixed_calendar_prices())
+
+    intersect = aligned.returns("intersect")
+    assert len(intersect) == 3
+    assert np.isclose(intersect["LSE"].iloc[1], 53 / 51 - 1)  # Return across the LSE holiday
+
+    ffill = aligned.returns("ffill")
+    assert len(ffill) == 5 and ffill["LSE"].iloc[1] == 0.0 and ffill["NYSE"].iloc[3] == 0.0
+
+    pairwise = aligned.returns("pairwise")
+    assert np.isnan(pairwise["LSE"].iloc[1]) and np.isclose(pairwise["LSE"].iloc[2], 53 / 51 - 1)
+    assert list(aligned.positions("NYSE")) == [0, 1, 2, 3, 5]
+
+
+def test_aligned_cache_loads_once_per_version():
+    # Same tickers + version reuse the alignment; a new version rebuilds it
+    calendar_index.clear_align_cache()
+    loads = []
+
+    def load():
+        loads.append(1)
+        return mixed_calendar_prices()
+
+    first = calendar_index.aligned(["NYSE", "LSE"], "1d", "v1", load)
+    assert calendar_index.aligned(["NYSE", "LSE"], "1d", "v1", load) is first
+    calendar_index.aligned(["NYSE", "LSE"], "1d", "v2", load)
+    calendar_index.aligned(["NYSE", "LSE"], "1d", None, load)
+    assert len(loads) == 3
+
+
+def test_calendar_offset_is_binary_search():
+    # Offset of the range start, matching the boolean-mask slice
+    idx = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=500)
+    offset = get_calendar_offset("1Y", idx)
+    assert offset == int((idx < pd.Timestamp.today().normalize() - pd.DateOffset(years=1)).sum())
+    assert get_calendar_offset("All", idx) == 0
+
+
+def test_aligned_cache_is_bounded_by_bytes(monkeypatch):
+    # Derived frames count toward the budget: building them later evicts the oldest set
+    calendar_index.clear_align_cache()
+    first = calendar_index.aligned(["NYSE", "LSE"], "1d", "v1", mixed_calendar_prices)
+    monkeypatch.setattr(calendar_index, "ALIGN_CACHE_MAX_BYTES", 2 * first.nbytes())
+    calendar_index.aligned(["NYSE", "LSE"], "1d", "v2", mixed_calendar_prices)
+    assert calendar_index.align_cache_stats()["entries"] == 2
+
+    first.returns("pairwise")
+    calendar_index.aligned(["NYSE", "LSE"], "1d", "v3", mixed_calendar_prices)
+    assert calendar_index.aligned(["NYSE", "LSE"], "1d", "v1", mixed_calendar_prices) is not first
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services import clustering
+from services.clustering import canonical_order
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clustering.clear_order_cache()
+    yield
+    clustering.clear_order_cache()
+
+
+def sample_corr():
+    rng = np.random.default_rng(0)
+    f1, f2 = rng.normal(size=(2, 300))
+    returns = pd.DataFrame({
+        "A": f1 + 0.3 * rng.normal(size=300),
+        "X": f2 + 0.3 * rng.normal(size=300),
+        "B": f1 + 0.3 * rng.normal(size=300),
+        "Y": f2 + 0.3 * rng.normal(size=300),
+    })
+    return returns.corr()
+
+
+def test_order_is_memoized_per_ticker_set_and_version():
+    calls = []
+
+    def correlation(names):
+        calls.append(names)
+        return sample_corr()
+
+    first = canonical_order(["A", "X", "B", "Y"], "1Y", "v1", correlation)
+    # Different request order, same set: served from the cache
+    second = canonical_order(["Y", "B", "X", "A"], "1Y", "v1", correlation)
+    assert first == second
+    assert len(calls) == 1
+
+    # Cluster members end up next to each other
+    assert {frozenset(first[:2]), frozenset(first[2:])} == {frozenset("AB"), frozenset("XY")}
+
+    # New data version: recomputed
+    canonical_order(["A", "X", "B", "Y"], "1Y", "v2", correlation)
+    assert len(calls) == 2
+
+
+def test_unknown_data_version_is_not_cached():
+    calls = []
+    for _ in range(2):
+        canonical_order(list("AXBY"), "1Y", None, lambda names: calls.append(1) or sample_corr())
+    assert len(calls) == 2
+
+
+def test_optimal_leaf_ordering_is_computed_once(monkeypatch):
+    calls = []
+    real = clustering.optimal_leaf_ordering
+    monkeypatch.setattr(clustering, "optimal_leaf_ordering", lambda *a: calls.append(1) or real(*a))
+
+    first = canonical_order(list("AXBY"), "1Y", "v1", lambda names: sample_corr(), optimal_ordering=True)
+    second = canonical_order(list("AXBY"), "1Y", "v1", lambda names: sample_corr(), optimal_ordering=True)
+    assert first == second
+    assert len(calls) == 1
+
+
+def test_window_key_moves_with_the_resolved_start():
+    # Same range name and version, but the cutoff moved a day: a different cache entry
+    returns = pd.DataFrame({"A": range(3)}, index=pd.date_range("2024-01-02", periods=3))
+    assert clustering.window_key(returns, "intersect") != clustering.window_key(returns.iloc[1:], "intersect")
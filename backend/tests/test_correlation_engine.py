@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes.Metrics import correlations
+from services import correlation_engine
+from services.calendar_index import AlignedPrices
+from services.correlation_engine import standardize, top_k_pairs, threshold_pairs, approximate_order
+
+
+def sample_returns(n_days=250, seed=0):
+    # Two clusters of three tickers each, driven by different common factors
+    rng = np.random.default_rng(seed)
+    f1, f2 = rng.normal(size=(2, n_days))
+    cols = {}
+    for i in range(3):
+        cols[f"A{i}"] = f1 + 0.5 * rng.normal(size=n_days)
+        cols[f"B{i}"] = f2 + 0.5 * rng.normal(size=n_days)
+    return pd.DataFrame(cols) / 100
+
+
+def test_blocked_correlation_matches_pandas():
+    returns = sample_returns()
+    z, tickers, dropped = standardize(returns)
+
+    # Small block size forces several blocks
+    blocks = [b for _, b in correlation_engine.iter_correlation_blocks(z, block_size=4)]
+    np.testing.assert_allclose(np.vstack(blocks), returns.corr().to_numpy(), atol=1e-5)
+    assert dropped == []
+
+
+def test_top_k_pairs_finds_cluster_partners():
+    returns = sample_returns()
+    z, tickers, _ = standardize(returns)
+    pairs = top_k_pairs(z, tickers, k=2, block_size=4)
+
+    assert {p["ticker"] for p in pairs["A0"]["most"]} == {"A1", "A2"}
+    assert pairs["A0"]["most"][0]["corr"] >= pairs["A0"]["most"][1]["corr"]
+    assert all(p["ticker"].startswith("B") for p in pairs["A0"]["least"])
+
+
+def test_threshold_pairs_are_unique_and_capped(monkeypatch):
+    z, tickers, _ = standardize(sample_returns())
+    pairs, truncated = threshold_pairs(z, tickers, threshold=0.5)
+    assert not truncated
+    assert {(p["a"], p["b"]) for p in pairs} == {
+        ("A0", "A1"), ("A0", "A2"), ("A1", "A2"), ("B0", "B1"), ("B0", "B2"), ("B1", "B2")
+    }
+
+    # Capped: the strongest pairs across all blocks survive, not the first ones scanned
+    everything, _ = threshold_pairs(z, tickers, threshold=0.5)
+    monkeypatch.setattr(correlation_engine, "MAX_THRESHOLD_PAIRS", 2)
+    pairs, truncated = threshold_pairs(z, tickers, threshold=0.5, block_size=1)
+    assert truncated and len(pairs) == 2
+    assert [(p["a"], p["b"]) for p in pairs] == [(p["a"], p["b"]) for p in everything[:2]]
+
+
+def test_approximate_order_keeps_clusters_contiguous():
+    z, tickers, _ = standardize(sample_returns())
+    order = "".join(tickers[i][0] for i in approximate_order(z))
+    assert order in ("AAABBB", "BBBAAA")
+
+
+def test_short_history_tickers_are_dropped():
+    returns = sample_returns()
+    returns.loc[10:, "B2"] = np.nan
+    _, tickers, dropped = standardize(returns)
+    assert dropped == ["B2"] and "B2" not in tickers
+
+
+def test_pairs_route_ignores_duplicate_tickers(monkeypatch):
+    returns = sample_returns()
+    prices = (1 + returns).cumprod() * 100
+    prices.index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=len(prices))
+    monkeypatch.setattr(correlations, "fetch_aligned", lambda tickers, interval="1d", start=None: AlignedPrices(prices[tickers]))
+
+    app = FastAPI()
+    app.include_router(correlations.router)
+    r = TestClient(app).get("/correlations/pairs", params={"stocks": ["A0", "A0", "A1", "B0"], "k": 1, "range": "All"})
+    assert r.status_code == 200
+    assert sorted(r.json()["order"]) == ["A0", "A1", "B0"]
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+from services import factor_model
+from services.factor_model import randomized_svd, fit_factor_model, cached_factor_model, portfolio_risk
+
+
+def sample_returns(t=500, n=30, seed=0):
+    # Two true factors plus noise
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(0, 0.01, (t, 2))
+    betas = rng.normal(1, 0.3, (2, n))
+    noise = rng.normal(0, 0.005, (t, n))
+    return pd.DataFrame(factors @ betas + noise, columns=[f"T{i}" for i in range(n)])
+
+
+def test_randomized_svd_matches_exact_top_singular_values():
+    x = sample_returns().to_numpy()
+    _, s, _ = randomized_svd(x, 3)
+    exact = np.linalg.svd(x, compute_uv=False)[:3]
+    # Factor directions are exact; the third value sits in the noise bulk, so only approximately
+    np.testing.assert_allclose(s[:2], exact[:2], rtol=1e-6)
+    np.testing.assert_allclose(s[2], exact[2], rtol=2e-2)
+
+
+def test_factor_and_idiosyncratic_variance_add_up_to_total():
+    returns = sample_returns()
+    model = fit_factor_model(returns, k=2)
+    weights = {t: 1 / returns.shape[1] for t in returns.columns}
+    risk = portfolio_risk(model, weights)
+
+    # k=2 captures the true factors, so the split reproduces the sample variance closely
+    w = np.full(returns.shape[1], 1 / returns.shape[1])
+    sample_vol = np.sqrt(w @ returns.cov().to_numpy() @ w * 252) * 100
+    assert abs(risk["total_vol"] - sample_vol) / sample_vol < 0.02
+    assert risk["total_vol"] ** 2 - (risk["factor_vol"] ** 2 + risk["idiosyncratic_vol"] ** 2) < 1e-9
+    assert risk["factor_share"] > 0.9
+    assert model["explained_variance_ratio"].sum() > 0.8
+
+
+def test_model_cached_per_universe_and_version():
+    calls = []
+
+    def returns(tickers):
+        calls.append(tickers)
+        return sample_returns()[tickers]
+
+    factor_model._MODEL_CACHE.clear()
+    tickers = [f"T{i}" for i in range(10)]
+    first = cached_factor_model(tickers, "1Y", "v1", 2, returns)
+    second = cached_factor_model(list(reversed(tickers)), "1Y", "v1", 2, returns)
+    assert first is second and len(calls) == 1
+
+    cached_factor_model(tickers, "1Y", "v2", 2, returns)
+    assert len(calls) == 2
+    factor_model._MODEL_CACHE.clear()
+
+
+def test_factor_risk_route_versions_after_fetch_and_rejects_tiny_samples(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from routes.Metrics import factor_risk
+    from services.calendar_index import AlignedPrices
+
+    idx = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=300)
+    prices = (1 + sample_returns(t=300, n=4).set_index(idx)).cumprod()
+    calls = []
+    monkeypatch.setattr(factor_model, "_MODEL_CACHE", factor_model.OrderedDict())
+    monkeypatch.setattr(factor_risk, "fetch_aligned", lambda tickers: calls.append("fetch") or AlignedPrices(prices[tickers]))
+    monkeypatch.setattr(factor_risk, "get_data_version", lambda tickers: calls.append("version") or "v1")
+
+    app = FastAPI()
+    app.include_router(factor_risk.router)
+    client = TestClient(app)
+
+    r = client.get("/factor_risk", params={"stocks": ["T0", "T1", "T2", "T3"], "k": 2})
+    assert r.status_code == 200
+    assert calls == ["fetch", "version"]  # Version read after the fetch refreshed the data
+
+    r = client.get("/factor_risk", params={"stocks": ["T0", "T1"], "k": 2})
+    assert r.status_code == 400
+
+    # Duplicates are merged after the length check: weights 1+1 on T0 vs 1 on T1..T3
+    calls.clear()
+    dup = client.get("/factor_risk", params={"stocks": ["T0", "T0", "T1", "T2", "T3"], "weights": [1, 1, 1, 1, 1], "k": 2})
+    merged = client.get("/factor_risk", params={"stocks": ["T0", "T1", "T2", "T3"], "weights": [2, 1, 1, 1], "k": 2})
+    assert dup.status_code == 200
+    assert dup.json()["portfolio"] == merged.json()["portfolio"]
@@ -0,0 +1,104 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from core import http_cache
+from services import stocks
+from services.price_cache import PriceCache
+
+
+@pytest.fixture()
+def calls():
+    return []
+
+
+@pytest.fixture()
+def client(calls, tmp_path, monkeypatch):
+    # Minimal app with one metric-like route behind the middleware
+    cache = PriceCache(str(tmp_path), 1024 * 1024)
+    cache["AAPL"] = {
+        "data": pd.Series([1.0, 2.0], index=pd.date_range("2024-01-01", periods=2)),
+        "last_updated": pd.Timestamp.today(),
+    }
+    monkeypatch.setattr(stocks, "STOCK_CACHE", cache)
+    monkeypatch.setattr(http_cache, "RESPONSE_CACHE", http_cache.ResponseCache(1024 * 1024))
+
+    app = FastAPI()
+    app.add_middleware(http_cache.ConditionalCacheMiddleware)
+
+    @app.get("/metric")
+    def metric(stocks: list[str] = Query(...)):
+        calls.append(stocks)
+        return JSONResponse(content={"value": len(calls)})
+
+    return TestClient(app)
+
+
+def test_response_carries_etag_and_cache_control(client):
+    r = client.get("/metric", params={"stocks": "AAPL"})
+    assert r.status_code == 200
+    assert r.headers["etag"].startswith('W/"')
+    assert "max-age" in r.headers["cache-control"]
+
+
+def test_if_none_match_returns_304_without_computing(client, calls, monkeypatch):
+    monkeypatch.setattr(http_cache, "RESPONSE_CACHE_ENABLED", False)
+    etag = client.get("/metric", params={"stocks": "AAPL"}).headers["etag"]
+
+    r = client.get("/metric", params={"stocks": "AAPL"}, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert len(calls) == 1
+
+
+def test_serialized_body_is_served_from_response_cache(client, calls):
+    first = client.get("/metric", params={"stocks": "AAPL"})
+    second = client.get("/metric", params={"stocks": "AAPL"})
+    assert second.json() == first.json()
+    assert len(calls) == 1
+
+
+def test_data_refresh_changes_etag(client):
+    etag = client.get("/metric", params={"stocks": "AAPL"}).headers["etag"]
+    entry = stocks.STOCK_CACHE["AAPL"]
+    stocks.STOCK_CACHE["AAPL"] = {**entry, "last_updated": entry["last_updated"] + pd.Timedelta(minutes=1)}
+
+    r = client.get("/metric", params={"stocks": "AAPL"}, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+
+
+def test_uncached_tickers_are_not_tagged(client):
+    r = client.get("/metric", params={"stocks": "MSFT"})
+    assert r.status_code == 200
+    assert "etag" not in r.headers
+
+
+def test_etag_changes_with_the_date(client, monkeypatch):
+    # Relative ranges move their cutoff daily even when the data does not change
+    etag = client.get("/metric", params={"stocks": "AAPL"}).headers["etag"]
+
+    class Tomorrow(date):
+        @classmethod
+        def today(cls):
+            return date(2099, 1, 2)
+
+    monkeypatch.setattr(http_cache, "date", Tomorrow)
+    r = client.get("/metric", params={"stocks": "AAPL"}, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+
+
+def test_beta_tickers_follow_the_routes_benchmark(monkeypatch):
+    # The ETag covers the benchmark the route resolves from the listing exchange, not the suffix
+    monkeypatch.setattr(stocks, "get_stock_exchange", lambda t: "LSE")
+    scope = {"type": "http", "method": "GET", "path": "/beta", "query_string": b"stocks=AAPL", "headers": []}
+    assert http_cache._request_tickers(Request(scope)) == ["AAPL", "^FTSE"]
+
+    scope["query_string"] = b"stocks=AAPL&benchmark=bogus"
+    assert http_cache._request_tickers(Request(scope)) is None
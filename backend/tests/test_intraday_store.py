@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes.Metrics import returns
+from services import intraday_store
+from utils.helpers import window_bars, annualization_factor, convert_timestamps, bars_per_day, session_exchange
+
+
+def minute_bars(n=390, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range("2024-03-04 14:30", periods=n, freq="1min")
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.001, n))
+    return pd.DataFrame({
+        "Open": close * (1 + rng.normal(0, 0.0005, n)),
+        "High": close * 1.001,
+        "Low": close * 0.999,
+        "Close": close,
+        "Volume": rng.integers(100, 1000, n).astype(np.float64),
+    }, index=idx)
+
+
+def test_resample_ohlc_matches_pandas_resample():
+    # One-pass reduceat resampler agrees with pandas' OHLC aggregation
+    bars = minute_bars()
+    expected = bars.resample("15min").agg(
+        {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+    ).dropna()
+
+    resampled = intraday_store.resample_ohlc(bars, "15m")
+    pd.testing.assert_frame_equal(resampled, expected, check_freq=False)
+
+
+def test_store_merges_monthly_partitions(tmp_path, monkeypatch):
+    # Overlapping downloads are merged without duplicating bars
+    monkeypatch.setattr(intraday_store, "INTRADAY_DIR", str(tmp_path))
+    bars = minute_bars()
+    intraday_store.store_bars("AAPL", "1m", bars.iloc[:200])
+    intraday_store.store_bars("AAPL", "1m", bars.iloc[100:])
+
+    pd.testing.assert_frame_equal(intraday_store.load_bars("AAPL", "1m"), bars, check_freq=False)
+    assert intraday_store.read_meta("AAPL", "1m")["last_bar"] == bars.index[-1].isoformat()
+
+
+def test_interval_helpers_scale_windows():
+    # Windows are in trading days; intraday intervals scale bars and annualization
+    assert window_bars("30d") == 30
+    assert window_bars("30d", "5m") == 30 * 78
+    assert annualization_factor() == np.sqrt(252)
+    assert annualization_factor("1h") == np.sqrt(252 * 7)
+    assert list(convert_timestamps(minute_bars(2)).index) == ["2024-03-04 14:30", "2024-03-04 14:31"]
+
+
+def test_bars_per_day_follow_each_exchange_session():
+    assert bars_per_day("5m", "LSE") == 102  # 08:00-16:30
+    assert bars_per_day("1m", "TSE") == 330  # 09:00-15:30 less the lunch break
+    assert window_bars("7d", "1h", "LSE") == 7 * 9
+    assert session_exchange(["AAPL", "VOD.L"]) == "LSE"  # Longest session in a mixed set
+
+
+def test_resample_buckets_start_at_the_session_open():
+    # Hourly NYSE bars start at 09:30 New York (14:30 UTC in winter), not on the UTC hour
+    hourly = intraday_store.resample_ohlc(minute_bars(), "1h", "NYSE")
+    assert hourly.index[0] == pd.Timestamp("2024-03-04 14:30")
+    assert hourly.index[1] == pd.Timestamp("2024-03-04 15:30")
+
+    # LSE in summer time: 08:00 London is 07:00 UTC, 30m buckets from there
+    bars = minute_bars(120)
+    bars.index = pd.date_range("2024-07-01 07:10", periods=120, freq="1min")
+    half_hourly = intraday_store.resample_ohlc(bars, "30m", "LSE")
+    assert list(half_hourly.index[:2]) == [pd.Timestamp("2024-07-01 07:00"), pd.Timestamp("2024-07-01 07:30")]
+
+
+def test_prune_and_start_limit_partitions_read(tmp_path, monkeypatch):
+    monkeypatch.setattr(intraday_store, "INTRADAY_DIR", str(tmp_path))
+    bars = minute_bars(3)
+    for month in ("2024-01", "2024-02", "2024-03"):
+        chunk = bars.copy()
+        chunk.index = pd.date_range(f"{month}-05 14:30", periods=3, freq="1min")
+        intraday_store.store_bars("AAPL", "5m", chunk)
+
+    # Only partitions from `start`'s month on are read
+    loaded = intraday_store.load_bars("AAPL", "5m", pd.Timestamp("2024-02-10"))
+    assert loaded.index.min() >= pd.Timestamp("2024-03-01")
+
+    # 5m bars are kept 60 days: January lies entirely before that on 2024-04-10
+    assert intraday_store.prune_partitions("AAPL", "5m", now=pd.Timestamp("2024-04-10")) == ["2024-01"]
+    assert len(intraday_store.load_bars("AAPL", "5m")) == 6
+
+
+def test_returns_route_serves_intraday_interval(tmp_path, monkeypatch):
+    # 15m returns are resampled from stored 5m bars without another download
+    monkeypatch.setattr(intraday_store, "INTRADAY_DIR", str(tmp_path))
+    monkeypatch.setattr(intraday_store, "refresh_bars", lambda tickers, source: None)
+    bars = minute_bars().iloc[::5]
+    bars.index = bars.index.floor("5min")
+    bars.index = bars.index + (pd.Timestamp.today().normalize() - bars.index[0].normalize())
+    intraday_store.store_bars("AAPL", "5m", bars)
+
+    app = FastAPI()
+    app.include_router(returns.router)
+    client = TestClient(app)
+    r = client.get("/returns", params={"stocks": "AAPL", "range": "1M", "interval": "15m"})
+
+    assert r.status_code == 200
+    assert len(r.json()["returns"]["AAPL"]) == len(bars) // 3 - 1
+    assert client.get("/returns", params={"stocks": "AAPL", "interval": "3m"}).status_code == 400
@@ -0,0 +1,102 @@
+import asyncio
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes.PortfolioTools import live as live_route
+from services import live
+from services.live import RollingWindowStats, PortfolioLiveState, Subscription, FeedHub
+
+
+def sample_prices(n=120, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range("2024-01-01", periods=n)
+    values = 100 * np.cumprod(1 + rng.normal(0, 0.01, (n, 2)), axis=0)
+    return pd.DataFrame(values, index=idx, columns=["AAA", "BBB"])
+
+
+def test_rolling_window_stats_match_pandas():
+    values = np.random.default_rng(1).normal(size=50)
+    stats = RollingWindowStats(7)
+    for x in values:
+        stats.push(x)
+    assert abs(stats.std() - pd.Series(values).rolling(7).std().iloc[-1]) < 1e-12
+
+
+def test_incremental_state_matches_batch_computation():
+    prices = sample_prices()
+    weights = np.array([0.25, 0.75])
+    state = PortfolioLiveState(["AAA", "BBB"], weights, ["30d"])
+    state.seed(prices.iloc[:-1])
+    delta = state.on_bar(prices.index[-1], prices.iloc[-1].to_numpy())
+
+    # Same definitions as /portfolio_metrics
+    port = (prices.pct_change().dropna() * weights).sum(axis=1)
+    cumulative = (1 + port).cumprod()
+    expected_vol = port.rolling(30).std().iloc[-1] * np.sqrt(252) * 100
+    expected_dd = ((cumulative - cumulative.cummax()) / cumulative.cummax()).min() * 100
+
+    assert abs(delta["vol"]["30d"] - expected_vol) < 1e-9
+    assert abs(delta["max_drawdown"] - expected_dd) < 1e-9
+    assert abs(delta["cumulative_return"] - (cumulative.iloc[-1] - 1) * 100) < 1e-9
+
+
+def test_feed_polls_each_ticker_once_and_fans_out(monkeypatch):
+    prices = sample_prices()
+    polls = []
+
+    def fake_fetch(tickers):
+        polls.append(list(tickers))
+        return prices[tickers]
+
+    monkeypatch.setattr(live.stocks, "fetch_stock_data", fake_fetch)
+
+    async def scenario():
+        hub = FeedHub()
+        subs = []
+        for _ in range(3):
+            state = PortfolioLiveState(["AAA", "BBB"], np.array([0.5, 0.5]), ["7d"])
+            state.seed(prices.iloc[:-1])
+            sub = Subscription(state)
+            hub.subscribe(sub)
+            subs.append(sub)
+
+        await hub.poll_once()
+        for sub in subs:
+            hub.unsubscribe(sub)
+        return hub, subs
+
+    hub, subs = asyncio.run(scenario())
+    assert polls == [["AAA", "BBB"]]
+    assert all(sub.queue.qsize() == 1 for sub in subs)
+    assert subs[0].queue.get_nowait()["date"] == prices.index[-1].strftime("%Y-%m-%d")
+    assert hub.feeds() == {}
+
+
+def test_websocket_sends_snapshot_and_rejects_bad_portfolio(monkeypatch):
+    prices = sample_prices()
+    monkeypatch.setattr(live_route, "fetch_stock_data", lambda tickers: prices[tickers])
+    monkeypatch.setattr(live, "POLL_SECONDS", 3600)
+
+    app = FastAPI()
+    app.include_router(live_route.router)
+    client = TestClient(app)
+
+    with client.websocket_connect("/ws/portfolio") as ws:
+        ws.send_json({"stocks": ["AAA", "BBB"], "weights": [1, 1], "rolling": ["30d"]})
+        snapshot = ws.receive_json()
+        assert snapshot["type"] == "snapshot"
+        assert snapshot["date"] == prices.index[-1].strftime("%Y-%m-%d")
+        assert snapshot["vol"]["30d"] > 0
+
+    with client.websocket_connect("/ws/portfolio") as ws:
+        ws.send_json({"stocks": ["AAA"], "weights": [1, 2]})
+        assert ws.receive_json()["type"] == "error"
+
+
+def test_duplicate_tickers_merge_their_weights():
+    # One position per ticker, so every bar can complete
+    stocks, weights, _ = live_route._validate({"stocks": ["AAA", "BBB", "AAA"], "weights": [1, 2, 1]})
+    assert stocks == ["AAA", "BBB"]
+    assert np.allclose(weights, [0.5, 0.5])
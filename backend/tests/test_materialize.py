@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes.Metrics import volatility
+from services import stocks
+from services.materialize import materialize
+from services.price_cache import PriceCache
+
+
+def sample_prices(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n)
+    return pd.Series(100 * np.cumprod(1 + rng.normal(0, 0.01, n)), index=idx)
+
+
+def test_materialized_volatility_matches_direct_computation():
+    prices = sample_prices()
+    derived = materialize(prices)
+
+    expected = prices.pct_change().dropna().rolling(30).std() * np.sqrt(252) * 100
+    pd.testing.assert_series_equal(derived["volatility"]["30d"], expected)
+    assert (derived["drawdown"] <= 0).all()
+
+
+def test_volatility_route_serves_materialized_series(tmp_path, monkeypatch):
+    # Legacy entry without "derived": backfilled once, then served by slicing
+    cache = PriceCache(str(tmp_path), 16 * 1024 * 1024)
+    cache["AAPL"] = {"data": sample_prices(), "last_updated": pd.Timestamp.today()}
+    monkeypatch.setattr(stocks, "STOCK_CACHE", cache)
+
+    app = FastAPI()
+    app.include_router(volatility.router)
+    r = TestClient(app).get("/volatility", params={"stocks": "AAPL", "range": "1M"})
+
+    assert r.status_code == 200
+    assert "derived" in cache["AAPL"]
+    series = r.json()["volatility"]["30d"]["AAPL"]
+    assert 15 <= len(series) <= 25
+    assert all(v > 0 for v in series.values())
+
@@ -0,0 +1,51 @@
+import json
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes.Metrics import volatility
+from services import stocks
+from services.price_cache import PriceCache
+from utils.helpers import frame_to_ndjson
+
+
+def sample_prices(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n)
+    return pd.Series(100 * np.cumprod(1 + rng.normal(0, 0.01, n)), index=idx)
+
+
+def test_frame_to_ndjson_yields_one_line_per_column():
+    frame = pd.DataFrame({"A": [1.0, np.nan], "B": [2.0, 3.0]})
+    lines = [json.loads(line) for line in frame_to_ndjson(frame, window="7d")]
+    assert lines == [
+        {"window": "7d", "ticker": "A", "values": [1.0, 0.0]},
+        {"window": "7d", "ticker": "B", "values": [2.0, 3.0]},
+    ]
+
+
+def test_volatility_route_streams_ndjson(tmp_path, monkeypatch):
+    cache = PriceCache(str(tmp_path), 16 * 1024 * 1024)
+    cache["AAPL"] = {"data": sample_prices(seed=1), "last_updated": pd.Timestamp.today()}
+    cache["MSFT"] = {"data": sample_prices(seed=2), "last_updated": pd.Timestamp.today()}
+    monkeypatch.setattr(stocks, "STOCK_CACHE", cache)
+
+    app = FastAPI()
+    app.include_router(volatility.router)
+    r = TestClient(app).get(
+        "/volatility",
+        params={"stocks": ["AAPL", "MSFT"], "range": "1M", "rolling": ["7d", "30d"], "format": "ndjson"},
+    )
+
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    header, *lines = [json.loads(line) for line in r.text.splitlines()]
+    assert [(l["window"], l["ticker"]) for l in lines] == [
+        ("7d", "AAPL"), ("7d", "MSFT"), ("30d", "AAPL"), ("30d", "MSFT")
+    ]
+    assert all(len(l["values"]) == len(header["dates"]) for l in lines)
+
+    # Same numbers as the JSON form
+    full = TestClient(app).get("/volatility", params={"stocks": ["AAPL", "MSFT"], "range": "1M"}).json()
+    assert list(full["volatility"]["30d"]["MSFT"].values()) == lines[3]["values"]
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from services import offload
+from services.metric_jobs import max_drawdowns
+
+
+def sample_prices(n=500, k=4, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range("2020-01-01", periods=n)
+    values = 100 * np.cumprod(1 + rng.normal(0, 0.01, (n, k)), axis=0)
+    values[:50, 0] = np.nan  # Late listing
+    return pd.DataFrame(values, index=idx, columns=[f"T{i}" for i in range(k)])
+
+
+def test_offloaded_job_matches_inline(monkeypatch):
+    # Same result whether the frame runs inline or through shared memory in the pool
+    prices = sample_prices()
+    inline = offload.run_frame_job(max_drawdowns, prices)
+    assert not offload.should_offload(prices)
+
+    monkeypatch.setattr(offload, "OFFLOAD_MIN_CELLS", 1)
+    try:
+        assert offload.should_offload(prices)
+        assert offload.run_frame_job(max_drawdowns, prices) == inline
+    finally:
+        offload.shutdown()
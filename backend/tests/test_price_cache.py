@@ -0,0 +1,104 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.price_cache import PriceCache, entry_bytes
+
+
+def make_entry(n=100):
+    idx = pd.date_range("2020-01-01", periods=n, freq="D")
+    return {"data": pd.Series(np.arange(n, dtype=float), index=idx), "last_updated": pd.Timestamp("2024-01-01")}
+
+
+@pytest.fixture()
+def one_entry_bytes():
+    return entry_bytes(make_entry())
+
+
+def test_lru_evicts_least_recently_used_and_reloads_from_disk(tmp_path, one_entry_bytes):
+    # Budget for two entries: adding a third spills the least recently used one
+    cache = PriceCache(str(tmp_path), 2 * one_entry_bytes, "lru")
+    cache["A"] = make_entry()
+    cache["B"] = make_entry()
+    cache["A"]  # A is now more recent than B
+    cache["C"] = make_entry()
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["resident_tickers"] == 2
+    assert stats["resident_bytes"] <= 2 * one_entry_bytes
+
+    # B was spilled but is still known and reloads transparently
+    assert "B" in cache
+    assert list(cache["B"]["data"]) == list(make_entry()["data"])
+    assert cache.stats()["reloads"] == 1
+
+
+def test_lfu_keeps_frequently_used_tickers(tmp_path, one_entry_bytes):
+    cache = PriceCache(str(tmp_path), 2 * one_entry_bytes, "lfu")
+    cache["A"] = make_entry()
+    for _ in range(5):
+        cache["A"]
+    cache["B"] = make_entry()
+    cache["C"] = make_entry()
+
+    assert "A" in cache._resident
+    assert "B" not in cache._resident
+
+
+def test_metadata_survives_restart_without_loading_data(tmp_path):
+    cache = PriceCache(str(tmp_path), 1024 * 1024)
+    cache["^GSPC"] = make_entry()
+
+    reopened = PriceCache(str(tmp_path), 1024 * 1024)
+    assert "^GSPC" in reopened
+    assert reopened.meta("^GSPC")["last_date"] == pd.Timestamp("2020-04-09")
+    assert reopened.stats()["resident_tickers"] == 0
+
+
+def test_missing_ticker_raises_key_error_and_counts_miss(tmp_path):
+    cache = PriceCache(str(tmp_path), 1024)
+    with pytest.raises(KeyError):
+        cache["NOPE"]
+    assert cache.get("NOPE") is None
+    assert cache.stats()["misses"] == 2
+
+
+def test_missing_spilled_pickle_raises_key_error_and_is_forgotten(tmp_path, one_entry_bytes):
+    cache = PriceCache(str(tmp_path), one_entry_bytes)
+    cache["A"] = make_entry()
+    cache["B"] = make_entry()  # Spills A
+    os.remove(cache._path("A"))
+
+    with pytest.raises(KeyError):
+        cache["A"]
+    assert "A" not in cache
+    assert cache.get("A") is None
+    assert "A" not in PriceCache(str(tmp_path), one_entry_bytes)  # Dropped from index.json too
+
+
+def test_batch_writes_the_index_once(tmp_path, monkeypatch):
+    cache = PriceCache(str(tmp_path), 1024 * 1024)
+    writes = []
+    real_replace = os.replace
+    monkeypatch.setattr(os, "replace", lambda src, dst: (writes.append(dst), real_replace(src, dst)))
+
+    with cache.batch():
+        for t in ("A", "B", "C"):
+            cache[t] = make_entry()
+
+    assert writes.count(cache._index_file) == 1
+
+
+def test_index_flush_merges_entries_written_by_other_processes(tmp_path):
+    # Two workers sharing one store: neither overwrites the other's index entries
+    first = PriceCache(str(tmp_path), 1024 * 1024)
+    second = PriceCache(str(tmp_path), 1024 * 1024)
+    assert len(first) == len(second) == 0  # Both have read the (empty) index
+    first["A"] = make_entry()
+    second["B"] = make_entry()
+
+    reopened = PriceCache(str(tmp_path), 1024 * 1024)
+    assert sorted(reopened) == ["A", "B"]
+    assert "A" in second  # Adopted on its flush
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes.Metrics import rolling_correlations
+from services import rolling_correlation
+from services.rolling_correlation import (
+    rolling_pairwise_correlation, rolling_benchmark_correlation, average_pairwise_correlation
+)
+
+
+def sample_returns(t=120, n=4, seed=0):
+    rng = np.random.default_rng(seed)
+    common = rng.normal(size=(t, 1))
+    return pd.DataFrame(0.01 * (common + rng.normal(size=(t, n))), columns=list("ABCD")[:n])
+
+
+def test_pairwise_matches_pandas_rolling_corr(monkeypatch):
+    # Small chunks force the chunk-boundary path
+    monkeypatch.setattr(rolling_correlation, "TIME_CHUNK", 16)
+    df = sample_returns()
+    corr = rolling_pairwise_correlation(df.to_numpy(), 30)
+
+    expected = df["A"].rolling(30).corr(df["C"]).dropna().to_numpy()
+    np.testing.assert_allclose(corr[:, 0, 2], expected, atol=1e-9)
+    assert corr.shape == (len(df) - 29, 4, 4)
+
+
+def test_benchmark_mode_and_float32():
+    df = sample_returns()
+    corr = rolling_benchmark_correlation(df[["A", "B"]].to_numpy(), df["D"].to_numpy(), 20, np.float32)
+
+    assert corr.dtype == np.float32
+    expected = df["B"].rolling(20).corr(df["D"]).dropna().to_numpy()
+    np.testing.assert_allclose(corr[:, 1], expected, atol=1e-5)
+
+
+def test_average_pairwise_correlation():
+    df = sample_returns(n=3)
+    avg = average_pairwise_correlation(df.to_numpy(), 25)
+    full = rolling_pairwise_correlation(df.to_numpy(), 25)
+    expected = (full[:, 0, 1] + full[:, 0, 2] + full[:, 1, 2]) / 3
+    np.testing.assert_allclose(avg, expected, atol=1e-12)
+
+
+def test_average_without_pair_matrix_matches_full_matrix(monkeypatch):
+    # Chunk boundaries and a flat stretch (zero variance) agree with the N x N path
+    monkeypatch.setattr(rolling_correlation, "TIME_CHUNK", 16)
+    x = sample_returns(n=4).to_numpy(copy=True)
+    x[40:80, 2] = 0.0
+    full = rolling_pairwise_correlation(x, 25)
+    expected = (np.nansum(full, axis=(1, 2)) - np.trace(np.nan_to_num(full), axis1=1, axis2=2)) / 12
+    np.testing.assert_allclose(average_pairwise_correlation(x, 25), expected, atol=1e-9)
+
+
+def test_pairwise_chunks_sized_from_byte_budget(monkeypatch):
+    # A tiny budget shrinks chunks to a few rows; results still match pandas
+    monkeypatch.setattr(rolling_correlation, "CHUNK_BYTES", 8 * 8 * 16 * 3)
+    assert rolling_correlation._pairwise_chunk(4) == 3
+    assert rolling_correlation._pairwise_chunk(1000) == 1
+    df = sample_returns()
+    corr = rolling_pairwise_correlation(df.to_numpy(), 30)
+
+    expected = df["B"].rolling(30).corr(df["D"]).dropna().to_numpy()
+    np.testing.assert_allclose(corr[:, 1, 3], expected, atol=1e-9)
+
+
+def test_route_caps_full_pairwise_tickers(monkeypatch):
+    monkeypatch.setattr(rolling_correlations, "MAX_PAIRWISE_TICKERS", 3)
+    app = FastAPI()
+    app.include_router(rolling_correlations.router)
+    r = TestClient(app).get("/rolling_correlations", params={"stocks": list("ABCD")})
+    assert r.status_code == 400 and "average_only" in r.json()["error"]
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes.Metrics import rolling_var
+from services.calendar_index import AlignedPrices
+from services.rolling_var import rolling_var_es
+
+
+def test_sliding_window_matches_resorting_each_window():
+    # Incremental sorted windows give the same VaR/ES as sorting every window (ties included)
+    rng = np.random.default_rng(0)
+    x = np.round(rng.normal(0, 1, (200, 4)), 1)
+    W = 30
+
+    var, es = rolling_var_es(x, W)
+    for level in (0.95, 0.99):
+        k = int(np.floor((1 - level) * (W - 1)))
+        windows = np.stack([np.sort(x[i:i + W], axis=0) for i in range(len(x) - W + 1)])
+        np.testing.assert_allclose(var[level], -windows[:, k])
+        np.testing.assert_allclose(es[level], -windows[:, :k + 1].mean(axis=1))
+        assert (es[level] >= var[level] - 1e-12).all()
+
+
+def test_rolling_var_route_includes_portfolio(monkeypatch):
+    # Per-ticker and weighted-portfolio series share the in-range date axis
+    rng = np.random.default_rng(1)
+    idx = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=400)
+    prices = pd.DataFrame(100 * np.cumprod(1 + rng.normal(0, 0.01, (400, 2)), axis=0), index=idx, columns=["A", "B"])
+    monkeypatch.setattr(rolling_var, "fetch_aligned", lambda tickers, interval="1d", start=None: AlignedPrices(prices[tickers]))
+
+    app = FastAPI()
+    app.include_router(rolling_var.router)
+    client = TestClient(app)
+    r = client.get("/rolling_var", params={"stocks": ["A", "B"], "weights": [1, 1], "window": "30d", "range": "6M"})
+
+    body = r.json()
+    assert r.status_code == 200
+    assert set(body["var"]) == {"A", "B", "portfolio"}
+    assert len(body["var"]["portfolio"]["0.99"]) == len(body["dates"])
+    assert body["dates"][0] >= (pd.Timestamp.today().normalize() - pd.DateOffset(months=6)).strftime("%Y-%m-%d")
+    assert client.get("/rolling_var", params={"stocks": ["A"], "window": "9d"}).status_code == 400
+    # 1260 trading days of 1m bars: far more than the 7 days of minute history kept
+    assert client.get("/rolling_var", params={"stocks": ["A"], "window": "1260d", "interval": "1m"}).status_code == 400
+
+    # Duplicated tickers are one column: each name keeps its own series
+    dup = client.get("/rolling_var", params={"stocks": ["A", "A", "B"], "window": "30d", "range": "6M"}).json()
+    assert dup["var"]["B"] == body["var"]["B"] and dup["var"]["A"] == body["var"]["A"]
+    weighted = client.get("/rolling_var", params={"stocks": ["A", "A", "B"], "weights": [1, 1, 2], "window": "30d", "range": "6M"})
+    assert weighted.status_code == 200
+    assert weighted.json()["var"]["portfolio"] == body["var"]["portfolio"]
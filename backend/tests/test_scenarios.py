@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes.PortfolioTools import scenarios as scenarios_route
+from services.scenarios import replay_scenarios
+
+
+def sample_prices():
+    # AAA falls 50% then fully recovers; BBB is flat; CCC only starts trading later
+    idx = pd.bdate_range("2020-01-01", periods=8)
+    return pd.DataFrame({
+        "AAA": [100, 80, 50, 60, 90, 100, 110, 120],
+        "BBB": [10, 10, 10, 10, 10, 10, 10, 10],
+        "CCC": [np.nan, np.nan, np.nan, 5, 5, 5, 5, 5],
+    }, index=idx, dtype=float)
+
+
+def test_replay_matches_hand_computed_paths():
+    prices = sample_prices()
+    weights = np.array([
+        [1.0, 0.0, 0.0],
+        [0.5, 0.5, 0.0],
+    ])
+    scenario = {"crash": {"start": "2020-01-01", "end": "2020-01-07"}}
+
+    single, mixed = replay_scenarios(prices, weights, scenario)["crash"]
+
+    # Scenario covers 100 -> 90 for AAA; trough at 50, recovered to 100 three days later
+    assert abs(single["return"] - (-10.0)) < 1e-9
+    assert abs(single["max_drawdown"] - (-50.0)) < 1e-9
+    assert single["trough_date"] == "2020-01-03"
+    assert single["recovery_days"] == 3
+    assert single["recovered_on"] == "2020-01-08"
+
+    # 50/50 with a flat asset halves the drawdown
+    assert abs(mixed["max_drawdown"] - (-25.0)) < 1e-9
+
+
+def test_assets_missing_at_scenario_start_are_reported():
+    weights = np.array([[0.0, 0.5, 0.5]])
+    result = replay_scenarios(sample_prices(), weights, {"s": {"start": "2020-01-01", "end": "2020-01-08"}})["s"][0]
+    assert result["return"] is None
+    assert result["missing"] == ["CCC"]
+
+
+def test_scenario_outside_data_is_empty():
+    result = replay_scenarios(sample_prices(), np.array([[1.0, 0, 0]]), {"old": {"start": "1990-01-01", "end": "1990-02-01"}})
+    assert result["old"][0]["return"] is None
+
+
+def test_scenario_starting_before_the_history_is_not_truncated():
+    # Data begins 2020-01-01: a 2019 scenario cannot be replayed from its real start
+    weights = np.array([[1.0, 0.0, 0.0]])
+    result = replay_scenarios(sample_prices(), weights, {"s": {"start": "2019-12-02", "end": "2020-01-08"}})["s"][0]
+    assert result["return"] is None
+    assert result["missing"] == ["AAA"]
+
+    covered = replay_scenarios(sample_prices(), weights, {"s": {"start": "2020-01-01", "end": "2020-01-08"}})["s"][0]
+    assert covered["start_date"] == "2020-01-01"
+
+
+def test_custom_scenario_cannot_replace_a_builtin():
+    app = FastAPI()
+    app.include_router(scenarios_route.router)
+    r = TestClient(app).post("/scenarios", json={
+        "portfolios": [{"stocks": ["AAA"], "weights": [1]}],
+        "custom": [{"name": "covid_2020", "start": "2020-01-01", "end": "2020-06-01"}],
+    })
+    assert r.status_code == 400
+
+
+def test_custom_scenario_with_empty_dates_is_rejected():
+    app = FastAPI()
+    app.include_router(scenarios_route.router)
+    client = TestClient(app)
+    for dates in ({"start": "", "end": "2020-06-01"}, {"start": "2020-01-01", "end": ""}):
+        r = client.post("/scenarios", json={
+            "portfolios": [{"stocks": ["AAA"], "weights": [1]}],
+            "custom": [{"name": "mine", **dates}],
+        })
+        assert r.status_code == 400
@@ -0,0 +1,108 @@
+import asyncio
+import pandas as pd
+import pytest
+
+from services import scheduler, stocks
+from services.price_cache import PriceCache
+
+
+@pytest.fixture()
+def warmer(tmp_path, monkeypatch):
+    monkeypatch.setattr(stocks, "STOCK_CACHE", PriceCache(str(tmp_path), 1024 * 1024))
+    monkeypatch.setattr(stocks, "TICKER_HITS", stocks.Counter())
+    monkeypatch.setattr(stocks, "_PENDING_REFRESH", set())
+    monkeypatch.setattr(scheduler, "REFRESH_BATCH_PAUSE_SECONDS", 0)
+    return scheduler.CacheWarmer()
+
+
+def test_due_exchanges_waits_for_close_plus_grace(warmer):
+    # 16:10 New York on a Wednesday: NYSE closed, but still inside the grace period
+    before = pd.Timestamp("2024-03-06 16:10", tz="America/New_York")
+    assert "NYSE" not in warmer.due_exchanges(before)
+
+    after = pd.Timestamp("2024-03-06 16:45", tz="America/New_York")
+    assert "NYSE" in warmer.due_exchanges(after)
+
+
+def test_due_exchanges_skips_weekends(warmer):
+    saturday = pd.Timestamp("2024-03-09 23:00", tz="America/New_York")
+    assert "NYSE" not in warmer.due_exchanges(saturday)
+
+
+def test_run_once_refreshes_hot_and_benchmark_tickers_once_per_session(warmer, monkeypatch):
+    batches = []
+    monkeypatch.setattr(stocks, "refresh_stock_data", lambda batch: batches.append(batch) or batch)
+    stocks.TICKER_HITS.update(["AAPL", "AAPL", "VOD.L"])
+
+    now = pd.Timestamp("2024-03-06 17:00", tz="America/New_York")
+    submitted = asyncio.run(warmer.run_once(now))
+
+    # VOD.L (LSE) closed too by then, so both the US and UK names are refreshed
+    assert "AAPL" in submitted and "^GSPC" in submitted
+    assert "VOD.L" in submitted and "^FTSE" in submitted
+    assert all(len(b) <= scheduler.REFRESH_BATCH_SIZE for b in batches)
+    assert warmer.last_session_refresh["NYSE"] == "2024-03-06"
+
+    # Same session again: nothing left to do
+    assert asyncio.run(warmer.run_once(now)) == []
+
+
+def test_run_once_drains_stale_queue(warmer, monkeypatch):
+    monkeypatch.setattr(stocks, "refresh_stock_data", lambda batch: batch)
+    stocks._PENDING_REFRESH.add("MSFT")
+
+    saturday = pd.Timestamp("2024-03-09 12:00", tz="UTC")
+    assert asyncio.run(warmer.run_once(saturday)) == ["MSFT"]
+    assert "MSFT" in warmer.last_refresh
+
+
+def test_missing_wanted_tickers_are_fetched_between_passes(warmer, monkeypatch):
+    # Readers wait on the panel for tickers the store does not have: fetch those right away
+    monkeypatch.setattr(stocks, "refresh_stock_data", lambda batch: batch)
+    monkeypatch.setattr(stocks, "stale_tickers", lambda tickers: tickers)
+    monkeypatch.setattr(stocks, "STOCK_CACHE", {"AAPL": {}})
+    monkeypatch.setattr(scheduler.shared_panel, "take_wanted", lambda: ["NEW", "AAPL"])
+
+    assert asyncio.run(warmer.refresh_wanted_missing()) == ["NEW"]
+    assert warmer._wanted_stale == {"AAPL"}  # Expired, left for the next full pass
+
+
+def test_panel_publishes_are_coalesced(warmer, monkeypatch):
+    # A burst of small refreshes publishes once; the rest waits for the loop
+    publishes = []
+    monkeypatch.setattr(scheduler.shared_panel, "SHARED_PANEL_ENABLED", True)
+    monkeypatch.setattr(stocks, "refresh_stock_data", lambda batch: batch)
+    monkeypatch.setattr(stocks, "publish_panel", lambda: publishes.append(1) or len(publishes))
+
+    asyncio.run(warmer.refresh(["NEW"]))
+    asyncio.run(warmer.refresh(["NEWER"]))
+    assert len(publishes) == 1 and warmer._panel_dirty
+
+    monkeypatch.setattr(scheduler, "PANEL_PUBLISH_MIN_SECONDS", 0)
+    asyncio.run(warmer.publish_panel())
+    assert len(publishes) == 2 and not warmer._panel_dirty
+
+
+def test_failed_batch_leaves_the_session_due(warmer, monkeypatch):
+    # A transient download error must not skip the day's post-close refresh
+    def fail(batch):
+        raise RuntimeError("Yahoo unavailable")
+
+    monkeypatch.setattr(stocks, "refresh_stock_data", fail)
+    now = pd.Timestamp("2024-03-06 17:00", tz="America/New_York")
+    asyncio.run(warmer.run_once(now))
+    assert "NYSE" in warmer.due_exchanges(now)
+
+
+def test_only_tickers_updated_before_the_close_are_refreshed(warmer, monkeypatch):
+    # After a restart past the close: fetched this morning -> refreshed, fetched after the close -> skipped
+    monkeypatch.setattr(stocks, "refresh_stock_data", lambda batch: batch)
+    monkeypatch.setattr(warmer, "tracked_tickers", lambda: ["AAPL", "MSFT"])
+    now = pd.Timestamp("2024-03-06 17:00", tz="America/New_York")
+    close = pd.Timestamp("2024-03-06 16:30", tz="America/New_York").to_pydatetime().astimezone().replace(tzinfo=None)
+    series = pd.Series([1.0], index=pd.to_datetime(["2024-03-06"]))
+    stocks.STOCK_CACHE["AAPL"] = {"data": series, "last_updated": pd.Timestamp(close) - pd.Timedelta(hours=6)}
+    stocks.STOCK_CACHE["MSFT"] = {"data": series, "last_updated": pd.Timestamp(close) + pd.Timedelta(minutes=5)}
+
+    assert asyncio.run(warmer.run_once(now)) == ["AAPL"]
+    assert warmer.last_session_refresh["NYSE"] == "2024-03-06"
@@ -0,0 +1,152 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from services import shared_panel
+
+
+@pytest.fixture()
+def panel_dir(tmp_path, monkeypatch):
+    # Keep the published files inside the test's temporary directory
+    d = str(tmp_path / "price_panel")
+    monkeypatch.setattr(shared_panel, "PANEL_DIR", d)
+    monkeypatch.setattr(shared_panel, "MANIFEST_FILE", os.path.join(d, "manifest.json"))
+    monkeypatch.setattr(shared_panel, "WANTED_FILE", os.path.join(d, "wanted.txt"))
+    return d
+
+
+STAMP = pd.Timestamp("2024-01-05 18:00")
+
+
+def publish(series, updated=None):
+    # Every ticker refreshed at STAMP unless given its own time
+    return shared_panel.publish({t: (updated or {}).get(t, STAMP) for t in series}, series.get)
+
+
+def sample_series():
+    # Two tickers on partially overlapping calendars
+    a = pd.Series([1.0, 2.0, 3.0], index=pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03"]))
+    b = pd.Series([10.0, 20.0], index=pd.to_datetime(["2024-01-03", "2024-01-04"]))
+    return {"AAA": a, "BBB": b}
+
+
+def test_published_frame_matches_concat(panel_dir):
+    series = sample_series()
+    publish(series)
+
+    frame = shared_panel.PanelReader().frame(["AAA", "BBB"])
+    expected = pd.concat([series["AAA"], series["BBB"]], axis=1)
+    expected.columns = ["AAA", "BBB"]
+    np.testing.assert_array_equal(frame.to_numpy(), expected.to_numpy())
+    assert list(frame.index) == list(expected.index)
+
+
+def test_single_ticker_frame_only_has_its_own_dates(panel_dir):
+    publish(sample_series())
+    frame = shared_panel.PanelReader().frame(["BBB"])
+    assert list(frame["BBB"]) == [10.0, 20.0]
+
+
+def test_column_is_a_view_onto_the_mapped_file(panel_dir):
+    publish(sample_series())
+    column = shared_panel.PanelReader().column("AAA")
+    assert isinstance(column.base, np.memmap) or isinstance(column, np.memmap)
+    assert list(column) == [1.0, 2.0, 3.0]
+
+
+def test_reader_flips_to_new_version(panel_dir):
+    reader = shared_panel.PanelReader()
+    assert reader.frame(["AAA"]) is None
+
+    v1 = publish(sample_series())
+    assert reader.version == v1
+
+    series = sample_series()
+    series["CCC"] = series.pop("AAA") * 2
+    v2 = publish(series)
+    assert reader.version == v2 == v1 + 1
+    assert reader.missing(["AAA", "CCC"]) == ["AAA"]
+
+
+def test_wanted_spool_round_trip(panel_dir):
+    shared_panel.note_wanted(["AAPL", "MSFT"])
+    shared_panel.note_wanted(["AAPL"])
+    assert shared_panel.take_wanted() == ["AAPL", "MSFT", "AAPL"]
+    assert shared_panel.take_wanted() == []
+
+
+def test_frame_wraps_the_mapped_rows_without_copying(panel_dir):
+    publish(sample_series())
+    reader = shared_panel.PanelReader()
+    frame = reader.frame(["AAA", "BBB"])
+    state = reader.current()
+    assert np.shares_memory(frame["AAA"].to_numpy(), state.values)
+    assert np.shares_memory(frame["BBB"].to_numpy(), state.values)
+
+
+def test_wait_for_gives_up_on_unpublished_tickers(panel_dir):
+    publish(sample_series())
+    with pytest.raises(shared_panel.PanelUnavailable) as e:
+        shared_panel.PanelReader().wait_for(["AAA", "ZZZ"], timeout=0)
+    assert e.value.missing == ["ZZZ"]
+
+
+def test_reader_worker_serves_from_panel_without_opening_the_store(panel_dir, tmp_path, monkeypatch):
+    from services import stocks, calendar_index
+    from services.price_cache import PriceCache
+
+    store = PriceCache(str(tmp_path / "stock_cache"), 1024 * 1024)
+    monkeypatch.setattr(stocks, "STOCK_CACHE", store)
+    monkeypatch.setattr(stocks, "_reads_shared_panel", lambda: True)
+    monkeypatch.setattr(stocks.yf, "download", lambda *a, **k: pytest.fail("reader downloaded"))
+    monkeypatch.setattr(shared_panel, "PANEL", shared_panel.PanelReader())
+    calendar_index.clear_align_cache()
+
+    publish(sample_series())
+    frame = stocks.fetch_stock_data(["BBB"])
+
+    assert list(frame["BBB"]) == [10.0, 20.0]
+    assert not os.path.exists(store.directory)  # Never opened, never written
+    assert shared_panel.take_wanted() == ["BBB"]
+
+
+def test_reader_derives_series_once_per_ticker_version(panel_dir, monkeypatch):
+    from services import stocks
+
+    monkeypatch.setattr(stocks, "_reads_shared_panel", lambda: True)
+    monkeypatch.setattr(shared_panel, "PANEL", shared_panel.PanelReader())
+    monkeypatch.setattr(stocks, "_DERIVED_CACHE", stocks.OrderedDict())
+    calls = []
+    real = stocks.materialize
+    monkeypatch.setattr(stocks, "materialize", lambda series: calls.append(series.name) or real(series))
+
+    publish(sample_series())
+    first = stocks.fetch_derived(["AAA", "BBB"])
+    assert stocks.fetch_derived(["BBB", "AAA"])["AAA"] is first["AAA"]
+    assert len(calls) == 2
+
+    # Only BBB was refreshed: AAA's derived series and data version survive the new panel
+    aaa_version = stocks.get_data_version(["AAA"])
+    publish(sample_series(), {"BBB": STAMP + pd.Timedelta(days=1)})
+    assert stocks.get_data_version(["AAA"]) == aaa_version
+    assert stocks.get_data_version(["BBB"]) != aaa_version
+    assert stocks.fetch_derived(["AAA", "BBB"])["AAA"] is first["AAA"]
+    assert len(calls) == 3
+
+
+def test_publish_only_loads_refreshed_tickers(panel_dir):
+    series = sample_series()
+    loads = []
+
+    def load(t):
+        loads.append(t)
+        return series[t]
+
+    v1 = shared_panel.publish({"AAA": STAMP, "BBB": STAMP}, load)
+    assert shared_panel.publish({"AAA": STAMP, "BBB": STAMP}, load) == v1  # Nothing changed: no new version
+    v2 = shared_panel.publish({"AAA": STAMP, "BBB": STAMP + pd.Timedelta(hours=1)}, load)
+
+    assert v2 == v1 + 1
+    assert loads == ["AAA", "BBB", "BBB"]
+    assert list(shared_panel.PanelReader().frame(["AAA"])["AAA"]) == [1.0, 2.0, 3.0]
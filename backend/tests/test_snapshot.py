@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes.PortfolioTools import portfolio_metrics, snapshot
+from services.aggregate import latest_values, compute_overall
+from services.calendar_index import AlignedPrices
+
+
+def sample_prices(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n)
+    values = 100 * np.cumprod(1 + rng.normal(0.0005, 0.01, (n, 3)), axis=0)
+    return pd.DataFrame(values, index=idx, columns=["AAA", "BBB", "CCC"])
+
+
+def test_latest_values_and_overall_skip_missing():
+    # Last valid value per column; NaN stocks are left out of the averages
+    values = np.array([[1.0, np.nan, np.nan], [2.0, 5.0, np.nan], [np.nan, 6.0, np.nan]])
+    latest = latest_values(values)
+    assert latest[0] == 2.0 and latest[1] == 6.0 and np.isnan(latest[2])
+
+    overall = compute_overall(latest, latest, latest, latest, latest)
+    assert overall["vol"] == 4.0 and overall["max_drawdown"] == 4.0
+
+
+def test_snapshot_matches_portfolio_metrics(monkeypatch):
+    # Summary-card numbers agree with the full /portfolio_metrics series
+    prices = sample_prices()
+    monkeypatch.setattr(snapshot, "fetch_aligned", lambda tickers, interval="1d", start=None: AlignedPrices(prices[tickers]))
+    monkeypatch.setattr(portfolio_metrics, "fetch_aligned", lambda tickers, interval="1d", start=None: AlignedPrices(prices[tickers]))
+
+    app = FastAPI()
+    app.include_router(snapshot.router)
+    app.include_router(portfolio_metrics.router)
+    client = TestClient(app)
+    params = {"stocks": ["AAA", "BBB", "CCC"], "weights": [0.5, 0.3, 0.2], "range": "6M"}
+
+    snap = client.get("/portfolio_snapshot", params={**params, "rolling": "30d"}).json()
+    full = client.get("/portfolio_metrics", params={**params, "rolling": ["30d"]}).json()["portfolio_metrics"]
+
+    portfolio = snap["portfolio"]
+    returns = list(full["returns"].values())
+    vols = list(full["vol"]["30d"].values())
+    assert np.isclose(portfolio["avg_return"], np.mean(returns))
+    assert np.isclose(portfolio["avg_vol"], np.mean(vols))
+    assert np.isclose(portfolio["latest_vol"], vols[-1])
+    assert np.isclose(portfolio["max_drawdown"], full["max_drawdown"])
+    assert np.isclose(portfolio["sharpe"], full["sharpe"])
+    assert np.isclose(portfolio["sortino"], full["sortino"])
+    assert snap["stocks"]["tickers"] == ["AAA", "BBB", "CCC"] and len(snap["stocks"]["sharpe"]) == 3
+
+
+def test_snapshot_merges_duplicate_tickers(monkeypatch):
+    prices = sample_prices()
+    monkeypatch.setattr(snapshot, "fetch_aligned", lambda tickers, interval="1d", start=None: AlignedPrices(prices[tickers]))
+    app = FastAPI()
+    app.include_router(snapshot.router)
+    client = TestClient(app)
+
+    dup = client.get("/portfolio_snapshot", params={"stocks": ["AAA", "AAA", "BBB"], "weights": [0.25, 0.25, 0.5]})
+    merged = client.get("/portfolio_snapshot", params={"stocks": ["AAA", "BBB"], "weights": [0.5, 0.5]})
+    assert dup.status_code == 200
+    assert dup.json()["stocks"]["tickers"] == ["AAA", "BBB"]
+    assert dup.json()["portfolio"] == merged.json()["portfolio"]
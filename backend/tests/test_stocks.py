@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+
+from services import stocks
+from services.price_cache import PriceCache
+
+
+def make_download(calls):
+    # Fake yf.download returning a MultiIndex ("Close", ticker) frame like yfinance does
+    def fake_download(tickers, **kwargs):
+        calls.append(list(tickers))
+        idx = pd.date_range("2024-01-01", periods=5, freq="D")
+        frames = {("Close", t): pd.Series(range(1, 6), index=idx, dtype=float) for t in tickers}
+        return pd.DataFrame(frames)
+    return fake_download
+
+
+@pytest.fixture()
+def cache(tmp_path, monkeypatch):
+    # Isolate the module-level cache and keep pickles out of the working directory
+    monkeypatch.setattr(stocks, "STOCK_CACHE", PriceCache(str(tmp_path / "stock_cache"), 1024 * 1024))
+    monkeypatch.setattr(stocks, "_PENDING_REFRESH", set())
+    monkeypatch.setattr(stocks, "TICKER_HITS", stocks.Counter())
+    return stocks.STOCK_CACHE
+
+
+def expired_entry():
+    idx = pd.date_range("2023-01-01", periods=3, freq="D")
+    return {
+        "data": pd.Series([1.0, 2.0, 3.0], index=idx),
+        "last_updated": pd.Timestamp.today() - pd.Timedelta(days=stocks.CACHE_EXPIRY_DAYS + 1),
+    }
+
+
+def test_fetch_downloads_missing_tickers_in_one_call(cache, monkeypatch):
+    calls = []
+    monkeypatch.setattr(stocks.yf, "download", make_download(calls))
+
+    df = stocks.fetch_stock_data(["AAPL", "MSFT"])
+
+    assert calls == [["AAPL", "MSFT"]]
+    assert list(df.columns) == ["AAPL", "MSFT"]
+    assert stocks.TICKER_HITS == {"AAPL": 1, "MSFT": 1}
+
+
+def test_fetch_blocks_on_expired_ticker_without_refresher(cache, monkeypatch):
+    calls = []
+    monkeypatch.setattr(stocks.yf, "download", make_download(calls))
+    monkeypatch.setattr(stocks, "SERVE_STALE", False)
+    cache["AAPL"] = expired_entry()
+
+    df = stocks.fetch_stock_data(["AAPL"])
+
+    assert calls == [["AAPL"]]
+    assert len(df) == 5
+
+
+def test_fetch_serves_stale_and_queues_refresh(cache, monkeypatch):
+    # Stale-while-revalidate: no download in the request, ticker queued for the warmer
+    calls = []
+    monkeypatch.setattr(stocks.yf, "download", make_download(calls))
+    monkeypatch.setattr(stocks, "SERVE_STALE", True)
+    cache["AAPL"] = expired_entry()
+
+    df = stocks.fetch_stock_data(["AAPL"])
+
+    assert calls == []
+    assert len(df) == 3
+    assert stocks.take_pending_refresh() == ["AAPL"]
+    assert stocks.take_pending_refresh() == []
+
+
+def test_refresh_keeps_stale_history_when_download_is_empty(cache, monkeypatch):
+    def empty_download(tickers, **kwargs):
+        return pd.DataFrame({("Close", t): pd.Series(dtype=float) for t in tickers})
+
+    monkeypatch.setattr(stocks.yf, "download", empty_download)
+    cache["AAPL"] = expired_entry()
+
+    assert stocks.refresh_stock_data(["AAPL"]) == []
+    assert len(cache["AAPL"]["data"]) == 3
@@ -1,12 +1,42 @@
+import json
+import numpy as np
 import pandas as pd
 
+def date_format(index: pd.DatetimeIndex) -> str:
+    # Intraday bars need the time as well, otherwise keys collide per day
+    if len(index) and (index != index.normalize()).any():
+        return "%Y-%m-%d %H:%M"
+    return "%Y-%m-%d"
+
 def convert_timestamps(df: pd.DataFrame) -> pd.DataFrame:
     df_copy = df.copy()
     if not isinstance(df_copy.index, pd.DatetimeIndex):
         df_copy.index = pd.to_datetime(df_copy.index, errors="coerce")
-    df_copy.index = df_copy.index.map(lambda x: x.strftime("%Y-%m-%d"))
+    df_copy.index = df_copy.index.strftime(date_format(df_copy.index))
     return df_copy
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def ndjson_line(obj: dict) -> bytes:
+    return (json.dumps(obj) + "\n").encode("utf-8")
+
+def frame_to_ndjson(frame: pd.DataFrame, **labels):
+    """
+    Yield one NDJSON line per column ({**labels, "ticker", "values"}), NaN -> 0.
+    Only one column's list is materialised at a time, so memory stays bounded by
+    a single ticker instead of the whole nested dict.
+    """
+    for col in frame.columns:
+        values = np.nan_to_num(frame[col].to_numpy(dtype=np.float64), nan=0.0)
+        yield ndjson_line({**labels, "ticker": col, "values": values.tolist()})
+
+def merge_positions(stocks: list[str], weights: list[float]) -> tuple[list[str], list[float]]:
+    """One position per ticker: a ticker listed more than once gets the sum of its weights."""
+    merged = {}
+    for stock, weight in zip(stocks, weights):
+        merged[stock] = merged.get(stock, 0.0) + float(weight)
+    return list(merged), list(merged.values())
+
 ROLLING_WINDOWS = {
     "7d": 7,
     "30d": 30,
@@ -14,6 +44,52 @@ ROLLING_WINDOWS = {
     "252d": 252,
 }
 
+# Rolling windows plus the longer lookbacks historical VaR is usually quoted on
+VAR_WINDOWS = {**ROLLING_WINDOWS, "504d": 504, "756d": 756, "1260d": 1260}
+
+# Bar interval -> bar width in minutes (None: one bar per trading day).
+# Windows in ROLLING_WINDOWS are in trading days; intraday they scale with the
+# bars per day of the listing exchange's session (see bars_per_day).
+INTERVALS = {
+    "1m": 1,
+    "2m": 2,
+    "5m": 5,
+    "15m": 15,
+    "30m": 30,
+    "1h": 60,
+    "1d": None,
+}
+
+# Interval actually downloaded for each interval; coarser intraday bars are
+# resampled locally from the finer source instead of being downloaded again
+INTERVAL_SOURCES = {
+    "1m": "1m",
+    "2m": "1m",
+    "5m": "5m",
+    "15m": "5m",
+    "30m": "5m",
+    "1h": "1h",
+    "1d": "1d",
+}
+
+def bars_per_day(interval: str = "1d", exchange: str = "NYSE") -> int:
+    """Bars of `interval` in one trading session of `exchange` (a partial last bar counts)."""
+    if INTERVALS[interval] is None:
+        return 1
+    return int(np.ceil(session_minutes(exchange) / INTERVALS[interval]))
+
+def window_bars(window: str, interval: str = "1d", exchange: str = "NYSE") -> int:
+    """Rolling / VaR window ("30d") expressed in bars of `interval` on `exchange`'s session."""
+    return VAR_WINDOWS[window] * bars_per_day(interval, exchange)
+
+def periods_per_year(interval: str = "1d", exchange: str = "NYSE") -> int:
+    """Bars per year: 252 for daily bars."""
+    return 252 * bars_per_day(interval, exchange)
+
+def annualization_factor(interval: str = "1d", exchange: str = "NYSE") -> float:
+    """sqrt(bars per year): sqrt(252) for daily bars."""
+    return float(np.sqrt(periods_per_year(interval, exchange)))
+
 def get_calendar_cutoff(range: str, returns: pd.DataFrame) -> pd.Timestamp:
     today = pd.Timestamp.today().normalize()
 
@@ -36,6 +112,24 @@ def get_calendar_cutoff(range: str, returns: pd.DataFrame) -> pd.Timestamp:
 
     return calendar_cutoff
 
+def range_start(range: str, lookback_days: int = 0) -> pd.Timestamp | None:
+    """
+    Earliest date a `range` request reads: the calendar cutoff less
+    `lookback_days` trading days (plus holiday slack) for rolling windows.
+    None means the full history ("All"). Lets the intraday store skip older
+    partitions; daily data is unaffected.
+    """
+    if range not in ("YTD", "1M", "3M", "6M", "1Y", "3Y"):
+        return None
+    cutoff = get_calendar_cutoff(range, pd.DataFrame())
+    return cutoff - pd.offsets.BDay(lookback_days + lookback_days // 20 + 5)
+
+def get_calendar_offset(range: str, index: pd.DatetimeIndex) -> int:
+    """Row offset where `range` starts in a sorted index: a binary search, so callers slice with iloc."""
+    if len(index) == 0:
+        return 0
+    return int(index.searchsorted(get_calendar_cutoff(range, pd.DataFrame(index=index))))
+
 LOCAL_BENCHMARKS = {
     # United States
     "NYSE": "^GSPC",
@@ -102,3 +196,92 @@ ALLOWED_BENCHMARKS = {
     "DAX": "^GDAXI",
     "Nikkei 225": "^N225"
 }
+
+
+# Local regular trading session per canonical exchange code: (timezone, open, close).
+# Used to schedule post-close cache refreshes and to anchor / count intraday
+# bars; aliases (NYQ, NMS, ASQ) map onto their canonical exchange via
+# LOCAL_BENCHMARKS / TICKER_SUFFIX_EXCHANGES instead.
+EXCHANGE_SESSIONS = {
+    "NYSE": ("America/New_York", "09:30", "16:00"),
+    "NASDAQ": ("America/New_York", "09:30", "16:00"),
+    "AMEX": ("America/New_York", "09:30", "16:00"),
+    "LSE": ("Europe/London", "08:00", "16:30"),
+    "TSE": ("Asia/Tokyo", "09:00", "15:30"),
+    "HKEX": ("Asia/Hong_Kong", "09:30", "16:00"),
+    "FWB": ("Europe/Berlin", "09:00", "17:30"),
+    "EPA": ("Europe/Paris", "09:00", "17:30"),
+    "TSX": ("America/Toronto", "09:30", "16:00"),
+    "ASX": ("Australia/Sydney", "10:00", "16:00"),
+    "SSE": ("Asia/Shanghai", "09:30", "15:00"),
+    "SZSE": ("Asia/Shanghai", "09:30", "15:00"),
+    "BSE": ("Asia/Kolkata", "09:15", "15:30"),
+    "NSE": ("Asia/Kolkata", "09:15", "15:30"),
+    "B3": ("America/Sao_Paulo", "10:00", "17:00"),
+    "KRX": ("Asia/Seoul", "09:00", "15:30"),
+    "SGX": ("Asia/Singapore", "09:00", "17:00"),
+    "SIX": ("Europe/Zurich", "09:00", "17:30"),
+    "MOEX": ("Europe/Moscow", "09:50", "18:50"),
+    "JSE": ("Africa/Johannesburg", "09:00", "17:00"),
+}
+
+# Midday breaks (minutes) inside the sessions above; no bars are printed then
+SESSION_BREAK_MINUTES = {
+    "TSE": 60,
+    "HKEX": 60,
+    "SSE": 90,
+    "SZSE": 90,
+}
+
+def session_minutes(exchange: str) -> int:
+    """Trading minutes in one regular session of `exchange` (midday break excluded)."""
+    _, open_time, close_time = EXCHANGE_SESSIONS.get(exchange, EXCHANGE_SESSIONS["NYSE"])
+    length = pd.Timedelta(f"{close_time}:00") - pd.Timedelta(f"{open_time}:00")
+    return int(length.total_seconds() // 60) - SESSION_BREAK_MINUTES.get(exchange, 0)
+
+# Yahoo ticker suffix -> canonical exchange code (no suffix = US listing)
+TICKER_SUFFIX_EXCHANGES = {
+    ".L": "LSE",
+    ".T": "TSE",
+    ".HK": "HKEX",
+    ".DE": "FWB",
+    ".F": "FWB",
+    ".PA": "EPA",
+    ".TO": "TSX",
+    ".AX": "ASX",
+    ".SS": "SSE",
+    ".SZ": "SZSE",
+    ".BO": "BSE",
+    ".NS": "NSE",
+    ".SA": "B3",
+    ".KS": "KRX",
+    ".SI": "SGX",
+    ".SW": "SIX",
+    ".ME": "MOEX",
+    ".JO": "JSE",
+}
+
+def get_ticker_exchange_code(ticker: str) -> str:
+    """
+    Best-effort exchange code for a ticker without a yfinance metadata call.
+    Benchmark indices resolve through LOCAL_BENCHMARKS, everything else by suffix.
+    """
+    if ticker == ALLOWED_BENCHMARKS["NASDAQ"]:
+        return "NASDAQ"
+    for exchange, index in LOCAL_BENCHMARKS.items():
+        if index == ticker and exchange in EXCHANGE_SESSIONS:
+            return exchange
+
+    if "." in ticker:
+        suffix = ticker[ticker.rindex("."):].upper()
+        return TICKER_SUFFIX_EXCHANGES.get(suffix, "NYSE")
+    return "NYSE"
+
+def session_exchange(tickers: list[str]) -> str:
+    """
+    Exchange whose session sets bars per day for a ticker set. Mixed listings
+    use the longest session among them, so intraday windows never cover fewer
+    trading days than requested.
+    """
+    exchanges = sorted({get_ticker_exchange_code(t) for t in tickers}) or ["NYSE"]
+    return max(exchanges, key=session_minutes)
@@ -5,11 +5,9 @@ import Portfolio from "./sections/Portfolio";
 import OverallStats from "./sections/OverallStats";
 import OverallMetrics from "./sections/OverallMetrics";
 import styles from "./styles/Dashboard.module.css";
-import { fetchPortfolioMetrics, streamAISummary } from "./services/api";
+import { fetchPortfolioSnapshot, streamAISummary } from "./services/api";
 
 interface PortfolioMetrics {
-  vol: Record<string, Record<string, number>>; // now keyed by rolling window
-  returns: Record<string, number>;
   max_drawdown: number;
   sharpe: number | null;
   sortino: number | null;
@@ -63,32 +61,24 @@ export default function Dashboard({ mode = "portfolioanalysis" }: { mode: string
         const stocks = selectedStocks;
         const w = stocks.map((s) => weights[s] ?? 0);
 
-        const data = await fetchPortfolioMetrics(stocks, w, selectedRange, [selectedRolling]);
+        // Averages are computed server-side: one small response instead of full series
+        const data = await fetchPortfolioSnapshot(stocks, w, selectedRange, selectedRolling);
         if (!isActive) return;
 
-        // Calculate avgRet
-        const returnsSeries = data.portfolio_metrics.returns as Record<string, number>;
-        const returnsArray = Object.values(returnsSeries);
-        const avgRet =
-          returnsArray.length > 0 ? returnsArray.reduce((a, b) => a + b, 0) / returnsArray.length : 0;
-
-        // Calculate avgVol for the selected rolling period
-        const selectedVolSeries = data.portfolio_metrics.vol[selectedRolling] as
-          | Record<string, number>
-          | undefined;
-
-        const vols = selectedVolSeries ? Object.values(selectedVolSeries) : [];
-        const avgVol = vols.length > 0 ? vols.reduce((a, b) => a + b, 0) / vols.length : 0;
+        const avgRet: number = data.portfolio.avg_return ?? 0;
+        const avgVol: number = data.portfolio.avg_vol ?? 0;
 
         // Store metrics
         setPortfolioMetrics({
-          ...data.portfolio_metrics,
+          max_drawdown: data.portfolio.max_drawdown ?? 0,
+          sharpe: data.portfolio.sharpe,
+          sortino: data.portfolio.sortino,
           avgRet,
           avgVol,
         });
 
         // Compute badges
-        const maxDD = data.portfolio_metrics.max_drawdown;
+        const maxDD: number = data.portfolio.max_drawdown ?? 0;
         const riskScore = avgVol + Math.abs(maxDD);
         let risk: "Low" | "Moderate" | "High";
         if (riskScore < 15) risk = "Low";
@@ -124,9 +114,9 @@ export default function Dashboard({ mode = "portfolioanalysis" }: { mode: string
         const aiMetrics = {
           avgVol,
           avgRet,
-          max_drawdown: data.portfolio_metrics.max_drawdown,
-          sharpe: data.portfolio_metrics.sharpe,
-          sortino: data.portfolio_metrics.sortino,
+          max_drawdown: maxDD,
+          sharpe: data.portfolio.sharpe,
+          sortino: data.portfolio.sortino,
         };
 
         await streamAISummary(aiMetrics, controller.signal, (chunk) => {
@@ -116,6 +116,24 @@ export async function fetchPortfolioMetrics(
   return res.json(); // expect { portfolio_metrics: {...}, range_used: ..., rolling_used: ... }
 }
 
+/* --- NEW: Fetch summary-card snapshot (latest values + averages only) --- */
+export async function fetchPortfolioSnapshot(
+  stocks: string[],
+  weights: number[],
+  range: string = "1Y",
+  rolling: string = "30d"
+) {
+  const params = new URLSearchParams();
+  stocks.forEach((s) => params.append("stocks", s));
+  weights.forEach((w) => params.append("weights", w.toString()));
+  params.append("range", range);
+  params.append("rolling", rolling);
+
+  const res = await fetch(`http://localhost:8000/portfolio_snapshot?${params.toString()}`);
+  if (!res.ok) throw new Error("Failed to fetch portfolio snapshot");
+  return res.json(); // expect { portfolio: {...}, stocks: { tickers: [...], ... }, overall: {...}, as_of: ... }
+}
+
 /* --- NEW: Generate AI summary (streaming) --- */
 export async function streamAISummary(
   metrics: {